@@ -2,7 +2,7 @@ import sys
 
 from pydantic_settings import BaseSettings, CliApp, CliSubCommand
 
-from poptimizer.cli import app, div, income, keychain, metrics, pdf, risk, stats, tinkoff
+from poptimizer.cli import app, div, evolution, income, keychain, metrics, pdf, risk, stats, tinkoff, worker
 
 
 class App(
@@ -16,6 +16,8 @@ class App(
 
     keychain: CliSubCommand[keychain.Keychain]
     run: CliSubCommand[app.Run]
+    worker: CliSubCommand[worker.Worker]
+    evolve: CliSubCommand[evolution.Evolution]
     stats: CliSubCommand[stats.Stats]
     metrics: CliSubCommand[metrics.Metrics]
     income: CliSubCommand[income.Income]
@@ -1,7 +1,7 @@
 import random
 from collections.abc import AsyncGenerator, AsyncIterator
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import UTC, datetime
 from typing import Any, Final
 
 import pymongo
@@ -17,6 +17,10 @@ from poptimizer.fsm import uow
 _MONGO_ID: Final = "_id"
 _VER: Final = "ver"
 _UID: Final = "uid"
+_LEASE: Final = "lease"
+_LEASE_OWNER: Final = f"{_LEASE}.owner"
+_LEASE_EXPIRES: Final = f"{_LEASE}.expires"
+_NEXT_MODEL_SORT: Final = (("day", pymongo.ASCENDING), ("llh", pymongo.DESCENDING))
 
 type MongoDocument = dict[str, Any]
 type MongoClient = pymongo.AsyncMongoClient[MongoDocument]
@@ -41,31 +45,95 @@ async def db(uri: MongoDsn, db: str) -> AsyncGenerator[MongoDatabase]:
         await mongo_client.aclose()
 
 
+def _unleased() -> MongoDocument:
+    return {"$or": [{_LEASE: {"$exists": False}}, {_LEASE_EXPIRES: {"$lt": datetime.now(UTC)}}]}
+
+
 class Repo:
     def __init__(self, mongo_db: MongoDatabase) -> None:
         self._db = mongo_db
 
-    async def next_model_for_update(self) -> tuple[evolve.Model, uow.Version]:
+    async def claim_next_model(self, owner: str, expires: datetime) -> tuple[evolve.Model, uow.Version] | None:
+        """Захватывает в аренду до expires следующую по очереди модель, не арендованную другим владельцем."""
+        return await self._claim(_unleased(), owner, expires)
+
+    async def claim_model(
+        self,
+        day: domain.Day,
+        owner: str,
+        expires: datetime,
+    ) -> tuple[evolve.Model, uow.Version] | None:
+        """Захватывает в аренду до expires устаревшую оцененную модель, не арендованную другим владельцем."""
+        return await self._claim(
+            {
+                "day": {"$lt": datetime(day.year, day.month, day.day)},
+                "mean": {"$ne": []},
+                **_unleased(),
+            },
+            owner,
+            expires,
+        )
+
+    async def _claim(
+        self,
+        query: MongoDocument,
+        owner: str,
+        expires: datetime,
+    ) -> tuple[evolve.Model, uow.Version] | None:
         collection_name = evolve.Model.__name__
         collection = self._db[collection_name]
 
-        async with _wrap_err("can't get next model"):
-            doc = await collection.find_one(
-                sort=[
-                    ("day", pymongo.ASCENDING),
-                    ("llh", pymongo.DESCENDING),
-                ],
+        # Версия модели при захвате не меняется, а аренда снимается при сохранении модели
+        async with _wrap_err("can't claim model"):
+            doc = await collection.find_one_and_update(
+                query,
+                {"$set": {_LEASE: {"owner": owner, "expires": expires}}},
+                sort=list(_NEXT_MODEL_SORT),
+                return_document=pymongo.ReturnDocument.AFTER,
+            )
+
+        if doc is None:
+            return None
+
+        return self._create_obj(evolve.Model, doc)
+
+    async def renew_lease(self, uid: domain.UID, owner: str, expires: datetime) -> bool:
+        collection_name = evolve.Model.__name__
+        collection = self._db[collection_name]
+
+        async with _wrap_err("can't renew lease"):
+            result = await collection.update_one(
+                {_MONGO_ID: uid, _LEASE_OWNER: owner},
+                {"$set": {_LEASE_EXPIRES: expires}},
             )
 
-            return self._create_obj(evolve.Model, doc)
+        return result.matched_count == 1
+
+    async def release_lease(self, uid: domain.UID, owner: str) -> None:
+        collection_name = evolve.Model.__name__
+        collection = self._db[collection_name]
+
+        async with _wrap_err("can't release lease"):
+            await collection.update_one({_MONGO_ID: uid, _LEASE_OWNER: owner}, {"$unset": {_LEASE: ""}})
 
-    async def delete_worst_model(self) -> None:
+    async def next_models(self, n: int) -> list[evolve.Model]:
+        collection_name = evolve.Model.__name__
+        collection = self._db[collection_name]
+
+        async with _wrap_err("can't get next models"):
+            return [
+                self._create_obj(evolve.Model, doc)[0]
+                async for doc in collection.find(_unleased(), sort=list(_NEXT_MODEL_SORT), limit=n)
+            ]
+
+    async def delete_worst_model(self) -> domain.UID | None:
         collection_name = evolve.Model.__name__
         collection = self._db[collection_name]
 
         async with _wrap_err("can't get next model"):
-            await collection.find_one_and_delete(
-                {},
+            doc = await collection.find_one_and_delete(
+                _unleased(),
+                projection={_MONGO_ID: True},
                 sort=random.choice(  # noqa: S311
                     [
                         [("alfa", pymongo.ASCENDING)],
@@ -75,6 +143,11 @@ class Repo:
                 ),
             )
 
+        if doc is None:
+            return None
+
+        return domain.UID(doc[_MONGO_ID])
+
     async def get_models(self, day: domain.Day) -> list[evolve.Model]:
         collection_name = evolve.Model.__name__
         collection = self._db[collection_name]
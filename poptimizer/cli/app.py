@@ -98,7 +98,7 @@ class Run(config.Cfg):
                         memory.Checker(main_task),
                     ),
                     portfolio.build_graph(tinkoff_client),
-                    evolve.build_graph(),
+                    evolve.build_graph(self.evolve),
                     forecast.build_graph(),
                     trading.build_graph(),
                 )
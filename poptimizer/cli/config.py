@@ -12,6 +12,7 @@ from pydantic_settings import (
 )
 
 from poptimizer.core import consts, domain
+from poptimizer.evolve import settings
 
 KEYCHAIN_APP: Final = "poptimizer"
 KEYCHAIN_PREFIX: Final = "keychain:"
@@ -92,6 +93,7 @@ class Cfg(BaseSettings):
     server: CliSuppress[Server] = Server()
     mongo: CliSuppress[Mongo] = Mongo()
     brokers: CliSuppress[Brokers] = Brokers()
+    evolve: CliSuppress[settings.Evolve] = settings.Evolve()
 
     @classmethod
     def settings_customise_sources(
@@ -0,0 +1,106 @@
+import asyncio
+import contextlib
+import logging
+from datetime import datetime, timedelta
+from typing import Final
+
+from pydantic import Field, PositiveFloat, PositiveInt
+
+from poptimizer.adapters import logger, mongo
+from poptimizer.cli import config, safe
+from poptimizer.core import consts, domain, errors, fsm
+from poptimizer.data import actions as data_actions
+from poptimizer.data.events import DataUpdated, DayNotChanged
+from poptimizer.evolve import events, evolve
+from poptimizer.fsm import system, tx, uow
+
+_SECONDS_IN_HOUR: Final = 3600
+
+
+class Evolution(config.Cfg):
+    """Run only evolution for current data day with time or models budget and print throughput."""
+
+    hours: PositiveFloat | None = Field(default=None, description="Wall-clock budget in hours")
+    models: PositiveInt | None = Field(default=None, description="Budget of evaluated models")
+    workers: PositiveInt | None = Field(default=None, description="Number of evaluation processes")
+
+    async def cli_cmd(self) -> None:
+        async with contextlib.AsyncExitStack() as stack:
+            lgr = logger.init()
+            mongo_db = await stack.enter_async_context(mongo.db(self.mongo.uri, self.mongo.db))
+            repo = mongo.Repo(mongo_db)
+
+            await safe.run(lgr, self._run(lgr, repo))
+
+    async def _run(self, lgr: logging.Logger, repo: uow.Repo) -> None:
+        state = await uow.UOW(repo).get(data_actions.DataState)
+        if state.data_day == consts.START_DAY or state.outdated:
+            raise errors.ControllersError("data is outdated - update it with run command")
+
+        evolve_cfg = self.evolve
+        if self.workers is not None:
+            pool = evolve_cfg.pool.model_copy(update={"workers": self.workers})
+            evolve_cfg = evolve_cfg.model_copy(update={"pool": pool})
+
+        dispatcher = tx.Dispatcher()
+        inbox = dispatcher.new_inbox()
+
+        async with asyncio.TaskGroup() as tg:
+            fsm_task = tg.create_task(system.FSMSystem(repo, dispatcher).start(evolve.build_graph(evolve_cfg)))
+
+            try:
+                await self._drive(lgr, dispatcher, inbox, state.data_day)
+            finally:
+                fsm_task.cancel()
+
+    async def _drive(
+        self,
+        lgr: logging.Logger,
+        dispatcher: tx.Dispatcher,
+        inbox: asyncio.Queue[fsm.Event],
+        day: domain.Day,
+    ) -> None:
+        start = datetime.now()
+        deadline = None
+        if self.hours is not None:
+            deadline = asyncio.get_running_loop().time() + self.hours * _SECONDS_IN_HOUR
+
+        initialized = False
+        evaluated = 0
+        accepted = 0
+
+        try:
+            async with asyncio.timeout_at(deadline):
+                while self.models is None or evaluated < self.models:
+                    match await inbox.get():
+                        case fsm.AppStarted():
+                            dispatcher.send(DataUpdated(day=day))
+                        case events.BaseModelNotEvaluated() | events.BaseModelEvaluated() if not initialized:
+                            # Первое событие отправляет инициализация эволюции, а не оценка модели
+                            initialized = True
+                        case events.NewModelCreated(accepted=model_accepted):
+                            evaluated += 1
+                            accepted += model_accepted
+                        case events.BaseModelNotEvaluated():
+                            evaluated += 1
+                        case events.ModelRejected():
+                            evaluated += 1
+                            if self.models is None or evaluated < self.models:
+                                dispatcher.send(DayNotChanged())
+                        case _:
+                            continue
+        except TimeoutError:
+            lgr.info("Time budget is exhausted")
+        finally:
+            _log_throughput(lgr, evaluated, accepted, datetime.now() - start)
+
+
+def _log_throughput(lgr: logging.Logger, evaluated: int, accepted: int, duration: timedelta) -> None:
+    hours = duration.total_seconds() / _SECONDS_IN_HOUR
+    lgr.info(
+        "Evaluated %d models in %s - %.2f models/hour, acceptance rate %.1f%%",
+        evaluated,
+        duration,
+        evaluated / hours if hours else 0,
+        100 * accepted / evaluated if evaluated else 0,
+    )
@@ -0,0 +1,30 @@
+import asyncio
+import logging
+
+import pytest
+
+from poptimizer.cli import evolution
+from poptimizer.core import domain, fsm
+from poptimizer.evolve import events
+from poptimizer.fsm import tx
+
+
+async def test_drive_counts_only_accepted_candidates(caplog: pytest.LogCaptureFixture) -> None:
+    cmd = evolution.Evolution.model_construct(hours=None, models=3, workers=None)
+    dispatcher = tx.Dispatcher()
+    inbox = asyncio.Queue[fsm.Event]()
+
+    for event in (
+        events.BaseModelNotEvaluated(),
+        events.NewModelCreated(),
+        events.NewModelCreated(accepted=True),
+        events.ModelRejected(),
+    ):
+        inbox.put_nowait(event)
+
+    with caplog.at_level(logging.INFO):
+        await cmd._drive(logging.getLogger(), dispatcher, inbox, domain.Day(2024, 1, 1))
+
+    assert "Evaluated 3 models" in caplog.text
+    assert "acceptance rate 33.3%" in caplog.text
+    assert inbox.empty()
@@ -0,0 +1,28 @@
+import contextlib
+from datetime import timedelta
+
+from poptimizer.adapters import logger, mongo
+from poptimizer.cli import config, safe
+from poptimizer.evolve import settings, worker
+from poptimizer.evolve.dl import builder, trainer
+from poptimizer.evolve.models import evolve
+
+
+class Worker(config.Cfg):
+    """Run headless evolution worker - re-evaluates outdated models leased from shared database."""
+
+    async def cli_cmd(self) -> None:
+        async with contextlib.AsyncExitStack() as stack:
+            lgr = logger.init()
+            mongo_db = await stack.enter_async_context(mongo.db(self.mongo.uri, self.mongo.db))
+            repo = mongo.Repo(mongo_db)
+
+            # Worker масштабируется запуском нескольких процессов, поэтому собственный пул не используется
+            evolve_cfg = self.evolve.model_copy(update={"pool": settings.Pool()})
+            evolution_worker = worker.Worker(
+                repo,
+                trainer.Trainer(builder.Builder(), evolve_cfg),
+                evolve.Lease(timedelta(seconds=self.evolve.lease.ttl)),
+            )
+
+            await safe.run(lgr, evolution_worker.run())
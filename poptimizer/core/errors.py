@@ -1,7 +1,7 @@
 import traceback as tb
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
-from typing import Any, Protocol
+from typing import Any, Protocol, Self
 
 from poptimizer.core import domain
 
@@ -15,8 +15,12 @@ class DomainError(POError): ...
 class TooShortHistoryError(DomainError):
     def __init__(self, ticker: domain.Ticker, minimal_returns_days: int) -> None:
         super().__init__(f"{ticker} has too short history - required {minimal_returns_days} returns")
+        self.ticker = ticker
         self.minimal_returns_days = minimal_returns_days
 
+    def __reduce__(self) -> tuple[type[Self], tuple[domain.Ticker, int]]:
+        return self.__class__, (self.ticker, self.minimal_returns_days)
+
 
 class UseCasesError(POError): ...
 
@@ -28,8 +28,9 @@ class Ctx(Protocol):
     ) -> E: ...
     async def get_for_update[E: domain.Entity](self, t_entity: type[E], uid: domain.UID | None = None) -> E: ...
     async def count_models(self) -> int: ...
-    async def next_model_for_update(self) -> evolve.Model: ...
-    async def delete_worst_model(self) -> None: ...
+    async def next_model_for_update(self, lease: evolve.Lease) -> evolve.Model | None: ...
+    async def next_models(self, n: int) -> list[evolve.Model]: ...
+    async def delete_worst_model(self) -> domain.UID | None: ...
     async def get_models(self, day: domain.Day) -> list[evolve.Model]: ...
     async def sample_models(self, n: int) -> list[evolve.Model]: ...
     async def delete(self, entity: domain.Entity) -> None: ...
@@ -3,16 +3,17 @@ import zoneinfo
 from datetime import date, datetime, timedelta
 from typing import Final, Protocol
 
-from poptimizer.core import consts, domain, fsm
+from poptimizer.core import consts, domain, errors, fsm
 from poptimizer.data import events
 from poptimizer.data.cpi import cpi
 from poptimizer.data.div import processed, raw, status
-from poptimizer.data.features import day as day_features
-from poptimizer.data.features import indexes as indexes_features
+from poptimizer.data.features import features, snapshot
+from poptimizer.data.features import market as market_features
 from poptimizer.data.features import quotes as quotes_features
 from poptimizer.data.features import securities as securities_features
 from poptimizer.data.moex import index, quotes, securities
 from poptimizer.portfolio.events import PortfolioRevalued
+from poptimizer.portfolio.models import portfolio
 
 # Часовой пояс MOEX
 _MOEX_TZ: Final = zoneinfo.ZoneInfo(key="Europe/Moscow")
@@ -137,14 +138,32 @@ class UpdateFeaturesAction:
             state_task = tg.create_task(ctx.get_for_update(DataState))
             status_task = tg.create_task(status.update(ctx, self._data_client))
             tg.create_task(raw.update(ctx, self._data_client, status_task))
-            await quotes_features.update(ctx, event.trading_days)
-            tg.create_task(indexes_features.update(ctx, event.trading_days))
+            tg.create_task(market_features.update(ctx, event.trading_days))
+            tg.create_task(quotes_features.update(ctx, event.trading_days))
             tg.create_task(securities_features.update(ctx))
-            tg.create_task(day_features.update(ctx, event.trading_days))
 
         state = await state_task
         state.outdated = False
-        ctx.send(events.DataUpdated(day=state.data_day))
+        ctx.send(events.FeaturesUpdated(day=state.data_day))
+
+
+# Снимок сохраняется после фиксации признаков в базе, чтобы он не опережал сохраненные данные
+class SaveSnapshotAction:
+    async def __call__(self, ctx: fsm.Ctx, event: events.FeaturesUpdated) -> None:
+        async with errors.suppress_poptimizer(ctx, "Features snapshot is not saved"):
+            await _save_snapshot(ctx, event.day)
+
+        ctx.send(events.DataUpdated(day=event.day))
+
+
+async def _save_snapshot(ctx: fsm.Ctx, day: domain.Day) -> None:
+    async with asyncio.TaskGroup() as tg:
+        market_task = tg.create_task(ctx.get(features.MarketFeatures))
+        port = await ctx.get(portfolio.Portfolio)
+        feat_tasks = [tg.create_task(ctx.get(features.Features, domain.UID(ticker))) for ticker in port.tickers]
+
+    snap = snapshot.build(day, port.tickers, [await task for task in feat_tasks], await market_task)
+    await asyncio.to_thread(snap.save)
 
 
 class MemoryChecker(Protocol):
@@ -76,6 +76,16 @@ def build_graph(
     )
     data_graph.add_state(
         PortfolioRevalued,
+        [
+            graph.Transition(
+                on=events.FeaturesUpdated,
+                action=actions.SaveSnapshotAction(),
+                dst=events.FeaturesUpdated,
+            ),
+        ],
+    )
+    data_graph.add_state(
+        events.FeaturesUpdated,
         [
             graph.Transition(
                 on=events.DataUpdated,
@@ -13,6 +13,10 @@ class QuotesUpdated(fsm.Event):
     trading_days: list[domain.Day] = Field(repr=False)
 
 
+class FeaturesUpdated(fsm.Event):
+    day: domain.Day
+
+
 class DataUpdated(fsm.Event):
     day: domain.Day
 
@@ -1,38 +1,22 @@
-import asyncio
+import pandas as pd
 
-from poptimizer.core import domain, fsm
-from poptimizer.data.features.features import EmbeddingSeqFeatDesc, EmbSeqFeat, Features
-from poptimizer.portfolio.models import portfolio
+from poptimizer.data.features.features import EmbSeqFeat
 
 
-async def update(ctx: fsm.Ctx, trading_days: list[domain.Day]) -> None:
-    async with asyncio.TaskGroup() as tg:
-        port = await ctx.get(portfolio.Portfolio)
+def build(trading_days: pd.DatetimeIndex) -> list[dict[EmbSeqFeat, int]]:
+    week_day = trading_days.dayofweek.to_list()
+    week = (trading_days.isocalendar().week - 1).to_list()  # type: ignore[reportUnknownMemberType]
+    month_day = (trading_days.day - 1).to_list()
+    month = (trading_days.month - 1).to_list()
+    year_day = (trading_days.dayofyear - 1).to_list()
 
-        for pos in port.positions:
-            tg.create_task(_create_day_feats(ctx, domain.UID(pos.ticker), trading_days))
-
-
-async def _create_day_feats(ctx: fsm.Ctx, ticker: domain.UID, trading_days: domain.TradingDays) -> None:
-    feat = await ctx.get_for_update(Features, ticker)
-
-    feat.embedding_seq[EmbSeqFeat.WEEK_DAY] = EmbeddingSeqFeatDesc(
-        sequence=[trading_days[-n].timetuple().tm_wday for n in reversed(range(1, len(feat.numerical) + 1))],
-        size=7,
-    )
-    feat.embedding_seq[EmbSeqFeat.WEEK] = EmbeddingSeqFeatDesc(
-        sequence=[trading_days[-n].isocalendar().week - 1 for n in reversed(range(1, len(feat.numerical) + 1))],
-        size=53,
-    )
-    feat.embedding_seq[EmbSeqFeat.MONTH_DAY] = EmbeddingSeqFeatDesc(
-        sequence=[trading_days[-n].timetuple().tm_mday - 1 for n in reversed(range(1, len(feat.numerical) + 1))],
-        size=31,
-    )
-    feat.embedding_seq[EmbSeqFeat.MONTH] = EmbeddingSeqFeatDesc(
-        sequence=[trading_days[-n].timetuple().tm_mon - 1 for n in reversed(range(1, len(feat.numerical) + 1))],
-        size=12,
-    )
-    feat.embedding_seq[EmbSeqFeat.YEAR_DAY] = EmbeddingSeqFeatDesc(
-        sequence=[trading_days[-n].timetuple().tm_yday for n in reversed(range(1, len(feat.numerical) + 1))],
-        size=366,
-    )
+    return [
+        {
+            EmbSeqFeat.WEEK_DAY: week_day[n],
+            EmbSeqFeat.WEEK: week[n],
+            EmbSeqFeat.MONTH_DAY: month_day[n],
+            EmbSeqFeat.MONTH: month[n],
+            EmbSeqFeat.YEAR_DAY: year_day[n],
+        }
+        for n in range(len(trading_days))
+    ]
@@ -1,7 +1,7 @@
 from enum import StrEnum, auto, unique
-from typing import TYPE_CHECKING, Self
+from typing import TYPE_CHECKING, Annotated, Final, Self
 
-from pydantic import BaseModel, Field, FiniteFloat, NonNegativeInt, field_validator, model_validator
+from pydantic import AfterValidator, BaseModel, Field, FiniteFloat, NonNegativeInt, field_validator, model_validator
 
 from poptimizer.core import domain
 
@@ -65,50 +65,62 @@ class EmbSeqFeat(StrEnum):
     YEAR_DAY = auto()
 
 
-class EmbeddingSeqFeatDesc(BaseModel):
-    sequence: list[NonNegativeInt]
-    size: int = Field(ge=2)
+EMB_SEQ_SIZES: Final = {
+    EmbSeqFeat.WEEK_DAY: 7,
+    EmbSeqFeat.WEEK: 53,
+    EmbSeqFeat.MONTH_DAY: 31,
+    EmbSeqFeat.MONTH: 12,
+    EmbSeqFeat.YEAR_DAY: 366,
+}
 
-    @model_validator(mode="after")
-    def _value_less_than_size(self) -> Self:
-        if any(value >= self.size for value in self.sequence):
-            raise ValueError("embedding value not less size")
 
-        return self
+def _numerical_match_labels(numerical: list[dict[NumFeat, FiniteFloat]]) -> list[dict[NumFeat, FiniteFloat]]:
+    if not numerical:
+        return numerical
+
+    keys = numerical[0].keys()
+    if any(row.keys() != keys for row in numerical):
+        raise ValueError("numerical features keys mismatch")
+
+    return numerical
 
 
 class Features(domain.Entity):
-    numerical: list[dict[NumFeat, FiniteFloat]] = Field(default_factory=list[dict[NumFeat, FiniteFloat]])
+    numerical: Annotated[
+        list[dict[NumFeat, FiniteFloat]],
+        AfterValidator(_numerical_match_labels),
+    ] = Field(default_factory=list[dict[NumFeat, FiniteFloat]])
     embedding: dict[EmbFeat, EmbeddingFeatDesc] = Field(default_factory=dict[EmbFeat, EmbeddingFeatDesc])
-    embedding_seq: dict[EmbSeqFeat, EmbeddingSeqFeatDesc] = Field(
-        default_factory=dict[EmbSeqFeat, EmbeddingSeqFeatDesc]
-    )
-
-    @field_validator("numerical")
-    def _numerical_match_labels(
-        cls,
-        numerical: list[dict[str, FiniteFloat]],
-    ) -> list[dict[str, FiniteFloat]]:
-        if not numerical:
-            return numerical
-
-        keys = numerical[0].keys()
-        if any(row.keys() != keys for row in numerical):
-            raise ValueError("numerical features keys mismatch")
 
-        return numerical
+    def update_numerical(self, num_feat_df: pd.DataFrame) -> None:
+        self.numerical = num_feat_df.to_dict("records")  # type: ignore[reportUnknownMemberType]
 
-    @model_validator(mode="after")
-    def _embedding_seq_len_match_numerical(self) -> Self:
-        if not self.embedding_seq:
-            return self
 
-        num_len = len(self.numerical)
-        for desc in self.embedding_seq.values():
-            if len(desc.sequence) != num_len:
-                raise ValueError("embedding sequence length mismatch")
+class MarketRow(BaseModel):
+    day: domain.Day
+    numerical: dict[NumFeat, FiniteFloat]
+    embedding_seq: dict[EmbSeqFeat, NonNegativeInt]
 
-        return self
+    @field_validator("embedding_seq")
+    def _value_less_than_size(cls, embedding_seq: dict[EmbSeqFeat, int]) -> dict[EmbSeqFeat, int]:
+        if any(value >= EMB_SEQ_SIZES[feat] for feat, value in embedding_seq.items()):
+            raise ValueError("embedding value not less size")
 
-    def update_numerical(self, num_feat_df: pd.DataFrame) -> None:
-        self.numerical = num_feat_df.to_dict("records")  # type: ignore[reportUnknownMemberType]
+        return embedding_seq
+
+
+def _market_rows_match_labels(df: list[MarketRow]) -> list[MarketRow]:
+    _numerical_match_labels([row.numerical for row in df])
+
+    if df and any(row.embedding_seq.keys() != df[0].embedding_seq.keys() for row in df):
+        raise ValueError("embedding sequence features keys mismatch")
+
+    return df
+
+
+class MarketFeatures(domain.Entity):
+    df: Annotated[
+        list[MarketRow],
+        AfterValidator(domain.sorted_by_day_validator),
+        AfterValidator(_market_rows_match_labels),
+    ] = Field(default_factory=list[MarketRow])
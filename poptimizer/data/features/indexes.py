@@ -7,22 +7,12 @@ import pandas as pd
 from poptimizer.core import domain, fsm
 from poptimizer.data.features import features
 from poptimizer.data.moex import index
-from poptimizer.portfolio.models import portfolio
 
 if TYPE_CHECKING:
     from pydantic import FiniteFloat
 
 
-async def update(ctx: fsm.Ctx, trading_days: list[domain.Day]) -> None:
-    async with asyncio.TaskGroup() as tg:
-        port_task = tg.create_task(ctx.get(portfolio.Portfolio))
-        indexes = await _load_indexes(ctx, pd.DatetimeIndex(trading_days))
-
-        for pos in (await port_task).positions:
-            tg.create_task(_add_indexes_features(ctx, domain.UID(pos.ticker), indexes))
-
-
-async def _load_indexes(ctx: fsm.Ctx, trading_days: pd.DatetimeIndex) -> list[dict[features.NumFeat, FiniteFloat]]:
+async def build(ctx: fsm.Ctx, trading_days: pd.DatetimeIndex) -> list[dict[features.NumFeat, FiniteFloat]]:
     async with asyncio.TaskGroup() as tg:
         tasks = [tg.create_task(ctx.get(index.Index, domain.UID(uid))) for uid in index.INDEXES]
 
@@ -46,16 +36,3 @@ async def _load_indexes(ctx: fsm.Ctx, trading_days: pd.DatetimeIndex) -> list[di
         {features.NumFeat(uid.lower()): indexes[col].iloc[row, 0] for col, uid in enumerate(index.INDEXES)}  # type: ignore[reportUnknownMemberType]
         for row in range(1, len(trading_days))
     ]
-
-
-async def _add_indexes_features(
-    ctx: fsm.Ctx,
-    ticker: domain.UID,
-    indexes: list[dict[features.NumFeat, FiniteFloat]],
-) -> None:
-    features_table = await ctx.get_for_update(features.Features, ticker)
-
-    delta_len = len(indexes) - len(features_table.numerical)
-
-    for n in range(len(features_table.numerical)):
-        features_table.numerical[n] |= indexes[n + delta_len]
@@ -0,0 +1,22 @@
+import asyncio
+
+import pandas as pd
+
+from poptimizer.core import domain, fsm
+from poptimizer.data.features import day, indexes
+from poptimizer.data.features.features import MarketFeatures, MarketRow
+
+
+async def update(ctx: fsm.Ctx, trading_days: list[domain.Day]) -> None:
+    async with asyncio.TaskGroup() as tg:
+        market_task = tg.create_task(ctx.get_for_update(MarketFeatures))
+        index = pd.DatetimeIndex(trading_days)
+        indexes_rows = await indexes.build(ctx, index)
+
+    day_rows = day.build(index[1:])
+
+    market = await market_task
+    market.df = [
+        MarketRow(day=trading_day, numerical=num, embedding_seq=emb_seq)
+        for trading_day, num, emb_seq in zip(trading_days[1:], indexes_rows, day_rows, strict=True)
+    ]
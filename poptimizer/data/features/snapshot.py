@@ -0,0 +1,205 @@
+import itertools
+import shutil
+from pathlib import Path
+from typing import TYPE_CHECKING, Final
+
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, ValidationError
+
+from poptimizer.core import consts, domain, errors
+from poptimizer.data.features import features
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+NUM_FEAT: Final = sorted(features.NumFeat)
+EMB_FEAT: Final = sorted(features.EmbFeat)
+EMB_SEQ_FEAT: Final = sorted(features.EmbSeqFeat)
+
+_DIR: Final = consts.ROOT / "snapshots"
+_VERSION: Final = 1
+_META: Final = "meta.json"
+_NUM_FEAT: Final = "num_feat.npy"
+_EMB_SEQ_FEAT: Final = "emb_seq_feat.npy"
+_EMBEDDING: Final = "embedding.npy"
+
+
+class _Meta(BaseModel):
+    version: int = _VERSION
+    day: domain.Day
+    tickers: tuple[domain.Ticker, ...]
+    bounds: list[int]
+    num_feat: list[features.NumFeat] = NUM_FEAT
+    emb_feat: list[features.EmbFeat] = EMB_FEAT
+    emb_seq_feat: list[features.EmbSeqFeat] = EMB_SEQ_FEAT
+    embedding_sizes: dict[features.EmbFeat, int]
+
+    def match(self, day: domain.Day, tickers: tuple[domain.Ticker, ...]) -> bool:
+        return (
+            self.version == _VERSION
+            and self.day == day
+            and self.tickers == tickers
+            and self.num_feat == NUM_FEAT
+            and self.emb_feat == EMB_FEAT
+            and self.emb_seq_feat == EMB_SEQ_FEAT
+        )
+
+
+class Snapshot:
+    """Признаки всех тикеров за день в виде непрерывных массивов.
+
+    Признаки тикеров расположены подряд по оси дней в границах bounds, а колонки упорядочены по NUM_FEAT,
+    EMB_FEAT и EMB_SEQ_FEAT. Сохраненный снимок отображается в память, поэтому страницы файлов разделяются
+    между процессами через кэш ОС.
+    """
+
+    def __init__(
+        self,
+        meta: _Meta,
+        num_feat: NDArray[np.float32],
+        emb_seq_feat: NDArray[np.int64],
+        embedding: NDArray[np.int64],
+    ) -> None:
+        self._meta = meta
+        self.num_feat = num_feat
+        self.emb_seq_feat = emb_seq_feat
+        self.embedding = embedding
+
+    @property
+    def day(self) -> domain.Day:
+        return self._meta.day
+
+    @property
+    def tickers(self) -> tuple[domain.Ticker, ...]:
+        return self._meta.tickers
+
+    @property
+    def bounds(self) -> list[int]:
+        return self._meta.bounds
+
+    @property
+    def embedding_sizes(self) -> dict[features.EmbFeat, int]:
+        return self._meta.embedding_sizes
+
+    def save(self) -> None:
+        path = _path(self.day)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+
+        try:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            tmp_path.mkdir(parents=True)
+
+            np.save(tmp_path / _NUM_FEAT, self.num_feat)
+            np.save(tmp_path / _EMB_SEQ_FEAT, self.emb_seq_feat)
+            np.save(tmp_path / _EMBEDDING, self.embedding)
+            (tmp_path / _META).write_text(self._meta.model_dump_json())
+
+            shutil.rmtree(path, ignore_errors=True)
+            tmp_path.rename(path)
+
+            for old_path in _DIR.iterdir():
+                if old_path != path:
+                    shutil.rmtree(old_path, ignore_errors=True)
+        except OSError as err:
+            raise errors.AdapterError(f"can't save features snapshot {path}") from err
+
+
+def _path(day: domain.Day) -> Path:
+    return _DIR / f"{day}.v{_VERSION}"
+
+
+def load(day: domain.Day, tickers: tuple[domain.Ticker, ...]) -> Snapshot | None:
+    path = _path(day)
+
+    try:
+        meta = _Meta.model_validate_json((path / _META).read_text())
+    except OSError, ValidationError:
+        return None
+
+    if not meta.match(day, tickers):
+        return None
+
+    try:
+        return Snapshot(
+            meta,
+            np.load(path / _NUM_FEAT, mmap_mode="c"),
+            np.load(path / _EMB_SEQ_FEAT, mmap_mode="c"),
+            np.load(path / _EMBEDDING, mmap_mode="c"),
+        )
+    except OSError, ValueError:
+        return None
+
+
+def build(
+    day: domain.Day,
+    tickers: tuple[domain.Ticker, ...],
+    feats: list[features.Features],
+    market: features.MarketFeatures,
+) -> Snapshot:
+    bounds = list(itertools.accumulate((len(feat.numerical) for feat in feats), initial=0))
+    num_feat, emb_seq_feat = _build_seq_feat(tickers, feats, market, bounds)
+    embedding, embedding_sizes = _build_embedding(tickers, feats)
+
+    return Snapshot(
+        _Meta(day=day, tickers=tickers, bounds=bounds, embedding_sizes=embedding_sizes),
+        num_feat,
+        emb_seq_feat,
+        embedding,
+    )
+
+
+def _build_seq_feat(
+    tickers: tuple[domain.Ticker, ...],
+    feats: list[features.Features],
+    market: features.MarketFeatures,
+    bounds: list[int],
+) -> tuple[NDArray[np.float32], NDArray[np.int64]]:
+    market_len = len(market.df)
+    market_num = pd.DataFrame([row.numerical for row in market.df])
+    market_emb_seq = pd.DataFrame(
+        [row.embedding_seq for row in market.df],
+        columns=EMB_SEQ_FEAT,
+    ).to_numpy(np.int64)
+
+    num_feat = np.empty((len(NUM_FEAT), bounds[-1]), dtype=np.float32)
+    emb_seq_feat = np.empty((len(EMB_SEQ_FEAT), bounds[-1]), dtype=np.int64)
+
+    for ticker, feat, (start, end) in zip(tickers, feats, itertools.pairwise(bounds), strict=True):
+        if (market_start := market_len - (end - start)) < 0:
+            raise errors.UseCasesError(f"market features are shorter than {ticker} features")
+
+        if start == end:
+            continue
+
+        ticker_num = pd.DataFrame(feat.numerical).join(market_num.iloc[market_start:].reset_index(drop=True))
+
+        try:
+            num_feat[:, start:end] = ticker_num[NUM_FEAT].to_numpy(np.float32).T
+        except KeyError as err:
+            raise errors.UseCasesError(f"{ticker} has incomplete features") from err
+
+        emb_seq_feat[:, start:end] = market_emb_seq[market_start:].T
+
+    return num_feat, emb_seq_feat
+
+
+def _build_embedding(
+    tickers: tuple[domain.Ticker, ...],
+    feats: list[features.Features],
+) -> tuple[NDArray[np.int64], dict[features.EmbFeat, int]]:
+    if not feats:
+        raise errors.DomainError("no features for snapshot")
+
+    embedding_sizes = {feat: desc.size for feat, desc in feats[0].embedding.items()}
+    embedding = np.zeros((len(feats), len(EMB_FEAT)), dtype=np.int64)
+
+    for n, (ticker, feat) in enumerate(zip(tickers, feats, strict=True)):
+        if {emb: desc.size for emb, desc in feat.embedding.items()} != embedding_sizes:
+            raise errors.UseCasesError(f"unequal embeddings sizes for {ticker}")
+
+        for k, emb in enumerate(EMB_FEAT):
+            if (desc := feat.embedding.get(emb)) is not None:
+                embedding[n, k] = desc.value
+
+    return embedding, embedding_sizes
@@ -1,11 +1,16 @@
-from poptimizer.core import fsm
+from poptimizer.core import errors, fsm
 from poptimizer.data.events import DataUpdated
 from poptimizer.evolve import events
 from poptimizer.evolve.dl import trainer
-from poptimizer.evolve.models import evolve
+from poptimizer.evolve.models import evolve, surrogate
 from poptimizer.portfolio.models import portfolio
 
 
+def _observe(screen: surrogate.Surrogate | None, model: evolve.Model, results: evolve.TestResults | None) -> None:
+    if screen is not None and results is not None:
+        screen.observe(model.genotype.genes, model.llh)
+
+
 class InitEvolutionAction:
     async def __call__(self, ctx: fsm.Ctx, event: DataUpdated) -> None:
         evolution = await ctx.get_for_update(evolve.Evolution)
@@ -22,8 +27,15 @@ class InitEvolutionAction:
 
 
 class EvaluateBaseModelAction:
-    def __init__(self, trainer: trainer.Trainer) -> None:
+    def __init__(
+        self,
+        trainer: trainer.Trainer,
+        screen: surrogate.Surrogate | None,
+        limits: evolve.CostLimits,
+    ) -> None:
         self._trainer = trainer
+        self._screen = screen
+        self._limits = limits
 
     async def __call__(self, ctx: fsm.Ctx) -> None:
         evolution = await ctx.get_for_update(evolve.Evolution)
@@ -34,8 +46,9 @@ class EvaluateBaseModelAction:
             evolution,
             model,
         )
+        _observe(self._screen, model, results)
 
-        evolution.previous_model = await evolve.make_new_model(ctx, evolution, model)
+        evolution.previous_model = await evolve.make_new_model(ctx, evolution, model, self._screen, self._limits)
 
         if not results:
             ctx.send(events.BaseModelNotEvaluated())
@@ -47,8 +60,15 @@ class EvaluateBaseModelAction:
 
 
 class EvaluateNewModelAction:
-    def __init__(self, trainer: trainer.Trainer) -> None:
+    def __init__(
+        self,
+        trainer: trainer.Trainer,
+        screen: surrogate.Surrogate | None,
+        limits: evolve.CostLimits,
+    ) -> None:
         self._trainer = trainer
+        self._screen = screen
+        self._limits = limits
 
     async def __call__(self, ctx: fsm.Ctx) -> None:
         evolution = await ctx.get_for_update(evolve.Evolution)
@@ -59,25 +79,44 @@ class EvaluateNewModelAction:
             evolution,
             model,
         )
+        _observe(self._screen, model, results)
+
+        accepted = results is not None and await evolve.is_accepted(ctx, evolution, model, results, self._limits)
+        # Штраф за длительность считается относительно моделей, оцененных до кандидата
+        if results:
+            evolution.model_evaluated(model)
 
         match results:
-            case evolve.TestResults() if await evolve.is_accepted(ctx, evolution, model, results):
+            case evolve.TestResults() if accepted:
                 evolution.model_accepted()
                 evolution.new_base(results)
-                evolution.previous_model = await evolve.make_new_model(ctx, evolution, model)
-                ctx.send(events.NewModelCreated())
+                evolution.previous_model = await evolve.make_new_model(
+                    ctx, evolution, model, self._screen, self._limits
+                )
+                ctx.send(events.NewModelCreated(accepted=True))
             case _ if await ctx.count_models() != 0:
                 evolution.model_rejected()
                 ctx.send(events.ModelRejected())
             case _:
                 evolution.model_rejected()
-                evolution.previous_model = await evolve.make_new_model(ctx, evolution, model)
+                evolution.previous_model = await evolve.make_new_model(
+                    ctx, evolution, model, self._screen, self._limits
+                )
                 ctx.send(events.BaseModelNotEvaluated())
 
 
 class EvaluateExistingModelAction:
-    def __init__(self, trainer: trainer.Trainer) -> None:
+    def __init__(
+        self,
+        trainer: trainer.Trainer,
+        screen: surrogate.Surrogate | None,
+        limits: evolve.CostLimits,
+        lease: evolve.Lease,
+    ) -> None:
         self._trainer = trainer
+        self._screen = screen
+        self._limits = limits
+        self._lease = lease
 
     async def __call__(self, ctx: fsm.Ctx) -> None:
         evolution = await ctx.get_for_update(evolve.Evolution)
@@ -86,10 +125,14 @@ class EvaluateExistingModelAction:
 
         if await ctx.count_models() > evolution.cnt:
             deleted = True
-            await ctx.delete_worst_model()
+            if uid := await ctx.delete_worst_model():
+                self._trainer.delete_saved_state(uid)
             ctx.info("Deleting worst model")
 
-        model = await ctx.next_model_for_update()
+        model = await ctx.next_model_for_update(self._lease)
+        if model is None:
+            raise errors.UseCasesError("all models are leased by workers")
+
         evolution.previous_model = model.uid
 
         evolution.cnt += deleted and evolution.cnt * 2 < evolution.step
@@ -99,16 +142,21 @@ class EvaluateExistingModelAction:
             evolution,
             model,
         )
+        _observe(self._screen, model, results)
 
         match results:
             case evolve.TestResults() if await evolve.is_accepted(ctx, evolution, model, results):
-                evolution.previous_model = await evolve.make_new_model(ctx, evolution, model)
-                ctx.send(events.NewModelCreated())
+                evolution.previous_model = await evolve.make_new_model(
+                    ctx, evolution, model, self._screen, self._limits
+                )
+                ctx.send(events.NewModelCreated(accepted=True))
             case _ if await ctx.count_models() != 0:
                 ctx.send(events.ModelRejected())
             case _:
                 evolution.model_rejected()
-                evolution.previous_model = await evolve.make_new_model(ctx, evolution, model)
+                evolution.previous_model = await evolve.make_new_model(
+                    ctx, evolution, model, self._screen, self._limits
+                )
                 ctx.send(events.BaseModelNotEvaluated())
 
         if results:
@@ -0,0 +1,82 @@
+"""Сравнение скорости формирования обучающих батчей.
+
+Запуск: python -m poptimizer.evolve.dl.benchmarks.bench_data_loaders
+"""
+
+import itertools
+import logging
+import time
+from typing import Final
+
+import torch
+from torch.utils import data
+
+from poptimizer.core import domain
+from poptimizer.evolve.dl import data_loaders, datasets
+
+_TICKERS: Final = 300
+_DAYS: Final = 2500
+_NUM_FEAT: Final = 12
+_EMB_SEQ_FEAT: Final = 5
+_BATCH_SIZE: Final = 128
+_BATCHES: Final = 200
+_DAYS_PARAMS: Final = datasets.Days(history=252, forecast=21, test=64)
+
+lgr = logging.getLogger("Benchmark")
+
+
+def _make_all_data() -> data_loaders.AllTickersData:
+    all_data: data_loaders.AllTickersData = []
+
+    for n in range(_TICKERS):
+        log_returns = torch.randn(_DAYS) / 100
+
+        all_data.append(
+            datasets.TickerData(
+                ticker=domain.Ticker(f"T{n:03}"),
+                days=_DAYS_PARAMS,
+                num_feat=torch.randn(_NUM_FEAT, _DAYS),
+                emb_feat=[n % 10],
+                emb_seq_feat=torch.randint(7, (_EMB_SEQ_FEAT, _DAYS)),
+                lag_feat=True,
+                labels=datasets.forward_growth(log_returns, _DAYS_PARAMS.forecast),
+                returns=log_returns.exp().sub(1),
+            ),
+        )
+
+    return all_data
+
+
+def _concat_loader(all_data: data_loaders.AllTickersData) -> data.DataLoader[datasets.TrainBatch]:
+    return data.DataLoader(  # type: ignore[reportUnknownMemberType]
+        dataset=data.ConcatDataset(ticker.train_dataset() for ticker in all_data),  # type: ignore[reportUnknownMemberType]
+        batch_size=_BATCH_SIZE,
+        shuffle=True,
+        drop_last=False,
+    )
+
+
+def _batches_per_sec(loader: data.DataLoader[datasets.TrainBatch]) -> float:
+    start = time.perf_counter()
+
+    for batch in itertools.islice(loader, _BATCHES):
+        batch.num_feat.sum()
+
+    return _BATCHES / (time.perf_counter() - start)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    all_data = _make_all_data()
+
+    concat_speed = _batches_per_sec(_concat_loader(all_data))
+    lgr.info("ConcatDataset of ticker datasets - %.1f batches/sec", concat_speed)
+
+    vectorized_speed = _batches_per_sec(data_loaders.train(all_data, _BATCH_SIZE))
+    lgr.info("Vectorized dataset - %.1f batches/sec", vectorized_speed)
+
+    lgr.info("Speedup - %.1fx", vectorized_speed / concat_speed)
+
+
+if __name__ == "__main__":
+    main()
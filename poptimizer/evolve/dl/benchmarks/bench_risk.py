@@ -0,0 +1,56 @@
+"""Сравнение скорости оптимизации портфелей тестовых дней с эталонным SLSQP.
+
+Запуск: python -m poptimizer.evolve.dl.benchmarks.bench_risk
+"""
+
+import logging
+import time
+from typing import Final
+
+import numpy as np
+
+from poptimizer.core import consts
+from poptimizer.evolve.dl import ledoit_wolf, risk
+
+_TICKERS: Final = 300
+_DAYS: Final = 32
+_HISTORY: Final = 252
+_FORECAST_DAYS: Final = 21
+_CFG: Final = risk.Cfg(risk_tolerance=0.5)
+
+lgr = logging.getLogger("Benchmark")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    rng = np.random.default_rng(0)
+
+    mean = rng.normal(0.01, 0.02, (_DAYS, _TICKERS, 1))
+    std = np.abs(rng.normal(0.05, 0.01, (_DAYS, _TICKERS, 1)))
+    labels = rng.normal(0, 0.05, (_DAYS, _TICKERS, 1))
+    cor = ledoit_wolf.ledoit_wolf_cor(rng.normal(0, 0.02, (_DAYS, _TICKERS, _HISTORY)))[0]
+
+    start = time.perf_counter()
+    _, weights = risk.optimize_days(mean, std, labels, cor, _CFG, _FORECAST_DAYS)
+    batched = time.perf_counter() - start
+    lgr.info("Batched solver - %.3f sec / %.1f days/sec", batched, _DAYS / batched)
+
+    year_multiplier = consts.YEAR_IN_TRADING_DAYS / _FORECAST_DAYS
+    sigma = std * year_multiplier**0.5 * cor * (std * year_multiplier**0.5).swapaxes(-1, -2)
+
+    start = time.perf_counter()
+    slsqp = np.stack(
+        [
+            risk.slsqp_weights(day_mean[:, 0] * year_multiplier, day_sigma, _CFG.risk_tolerance)
+            for day_mean, day_sigma in zip(mean, sigma, strict=True)
+        ],
+    )
+    reference = time.perf_counter() - start
+    lgr.info("SLSQP - %.3f sec / %.1f days/sec", reference, _DAYS / reference)
+
+    lgr.info("Speedup - %.1fx", reference / batched)
+    lgr.info("Max weights difference - %.2e", np.abs(weights - slsqp).max())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Сравнение скорости тестирования последовательных дней по отдельным окнам и с общими активациями на CPU.
+
+Запуск: python -m poptimizer.evolve.dl.benchmarks.bench_sliding
+"""
+
+import logging
+import time
+from collections.abc import Callable
+from typing import Final
+
+import torch
+
+from poptimizer.evolve.dl.wave_net import backbone, wave_net
+
+_TICKERS: Final = 64
+_HISTORY: Final = 256
+_DAYS: Final = 64
+_NUM_FEATS: Final = 16
+_REPEATS: Final = 3
+_CFG: Final = backbone.Cfg(
+    use_bn=True,
+    sub_blocks=2,
+    kernels=5,
+    residual_channels=8,
+    gate_channels=8,
+    skip_channels=8,
+    head_channels=8,
+    mixture_size=3,
+)
+
+lgr = logging.getLogger("Benchmark")
+
+
+def _best_time(func: Callable[[], object]) -> float:
+    timings: list[float] = []
+
+    for _ in range(_REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    torch.manual_seed(0)  # type: ignore[reportUnknownMemberType]
+    net = wave_net.Net(
+        cfg=_CFG,
+        history_days=_HISTORY,
+        num_feat_count=_NUM_FEATS,
+        emb_size=[10],
+        emb_seq_size=[7],
+    ).eval()
+
+    generator = torch.Generator().manual_seed(0)
+    length = _HISTORY + _DAYS - 1
+    num_feat = torch.randn(_TICKERS, _NUM_FEATS, length, generator=generator)
+    emb_feat = torch.randint(0, 10, (_TICKERS, 1), generator=generator)
+    emb_seq_feat = torch.randint(0, 7, (_TICKERS, 1, length), generator=generator)
+    labels = torch.rand(_TICKERS, _DAYS, generator=generator) + 0.5
+
+    windows_num = num_feat.unfold(2, _HISTORY, 1).permute(2, 0, 1, 3).reshape(-1, _NUM_FEATS, _HISTORY)
+    windows_emb_seq = emb_seq_feat.unfold(2, _HISTORY, 1).permute(2, 0, 1, 3).reshape(-1, 1, _HISTORY)
+    windows_emb = emb_feat.repeat(_DAYS, 1)
+    windows_labels = labels.T.reshape(-1, 1)
+
+    with torch.inference_mode():
+        windows = _best_time(
+            lambda: net.llh_and_forecast_mean_and_std(windows_num, windows_emb, windows_emb_seq, windows_labels),
+        )
+        sliding = _best_time(
+            lambda: net.sliding_llh_and_forecast_mean_and_std(num_feat, emb_feat, emb_seq_feat, labels)
+        )
+        llh, *_ = net.llh_and_forecast_mean_and_std(windows_num, windows_emb, windows_emb_seq, windows_labels)
+        sliding_llh, *_ = net.sliding_llh_and_forecast_mean_and_std(num_feat, emb_feat, emb_seq_feat, labels)
+
+    lgr.info(
+        "Threads - %d / Tickers - %d / History - %d / Days - %d", torch.get_num_threads(), _TICKERS, _HISTORY, _DAYS
+    )
+    lgr.info("Windows - %.1f days/sec", _DAYS / windows)
+    lgr.info(
+        "Sliding - %.1f days/sec / %.2fx / LLH difference %.2e",
+        _DAYS / sliding,
+        windows / sliding,
+        (sliding_llh.T.reshape(-1, 1) - llh).abs().max().item(),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Сравнение скорости шага обучения сети в обычном, fused, компилированном и bfloat16 режимах на CPU.
+
+Запуск: python -m poptimizer.evolve.dl.benchmarks.bench_wave_net
+"""
+
+import logging
+import time
+from typing import Final
+
+import torch
+
+from poptimizer.core import errors
+from poptimizer.evolve.dl.wave_net import backbone, wave_net
+
+_BATCH: Final = 512
+_HISTORY: Final = 128
+_NUM_FEATS: Final = 16
+_STEPS: Final = 30
+_WARMUP: Final = 5
+_CFG: Final = backbone.Cfg(
+    use_bn=True,
+    sub_blocks=2,
+    kernels=5,
+    residual_channels=8,
+    gate_channels=8,
+    skip_channels=8,
+    head_channels=8,
+    mixture_size=3,
+)
+
+lgr = logging.getLogger("Benchmark")
+
+
+def _make_net(*, fused: bool, backend: str | None) -> wave_net.Net:
+    torch.manual_seed(0)  # type: ignore[reportUnknownMemberType]
+    net = wave_net.Net(
+        cfg=_CFG,
+        history_days=_HISTORY,
+        num_feat_count=_NUM_FEATS,
+        emb_size=[10],
+        emb_seq_size=[7],
+        fused=fused,
+    )
+
+    if backend is not None:
+        net.compile_backbone(backend)
+
+    return net
+
+
+def _steps_per_sec(
+    net: wave_net.Net,
+    batch: tuple[torch.Tensor, ...],
+    *,
+    bfloat16: bool = False,
+) -> tuple[float, float]:
+    optimizer = torch.optim.SGD(net.parameters(), lr=1e-4)
+
+    def step() -> float:
+        optimizer.zero_grad()
+        with torch.autocast("cpu", dtype=torch.bfloat16, enabled=bfloat16):
+            llh = net.llh(*batch)
+
+        (-llh).backward()  # type: ignore[no-untyped-call]
+        optimizer.step()  # type: ignore[reportUnknownMemberType]
+
+        return llh.item()
+
+    for _ in range(_WARMUP):
+        step()
+
+    start = time.perf_counter()
+    llh = [step() for _ in range(_STEPS)]
+
+    return _STEPS / (time.perf_counter() - start), llh[0]
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    generator = torch.Generator().manual_seed(0)
+    batch = (
+        torch.randn(_BATCH, _NUM_FEATS, _HISTORY, generator=generator),
+        torch.randint(0, 10, (_BATCH, 1), generator=generator),
+        torch.randint(0, 7, (_BATCH, 1, _HISTORY), generator=generator),
+        torch.rand(_BATCH, 1, generator=generator) + 0.5,
+    )
+
+    lgr.info("Threads - %d", torch.get_num_threads())
+    eager, eager_llh = _steps_per_sec(_make_net(fused=False, backend=None), batch)
+    lgr.info("Eager - %.1f steps/sec", eager)
+
+    for name, fused, backend, bfloat16 in (
+        ("Fused", True, None, False),
+        ("Fused and compiled", True, "inductor", False),
+        ("Bfloat16", False, None, True),
+        ("Fused bfloat16", True, None, True),
+    ):
+        try:
+            speed, llh = _steps_per_sec(_make_net(fused=fused, backend=backend), batch, bfloat16=bfloat16)
+        except (RuntimeError, errors.POError) as err:
+            lgr.warning("%s - unavailable %s", name, err)
+
+            continue
+
+        lgr.info("%s - %.1f steps/sec / %.2fx / LLH difference %.2e", name, speed, speed / eager, abs(llh - eager_llh))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""Набор бенчмарков обучения на синтетических данных с сохранением истории результатов.
+
+Результаты добавляются в benchmarks/history.json в корне проекта, а изменения относительно предыдущего запуска
+выводятся в лог, чтобы замедления были заметны.
+
+Запуск: python -m poptimizer.evolve.dl.benchmarks.suite
+"""
+
+import asyncio
+import functools
+import itertools
+import logging
+import platform
+import resource
+import sys
+import time
+from collections.abc import Callable
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, Final
+
+import numpy as np
+import torch
+from pydantic import BaseModel, TypeAdapter
+
+from poptimizer.core import consts
+from poptimizer.evolve.dl import builder, data_loaders, datasets, ledoit_wolf, ledoit_wolf_nonlinear, risk, trainer
+from poptimizer.evolve.dl.benchmarks import synthetic
+from poptimizer.evolve.dl.wave_net import wave_net
+from poptimizer.evolve.models import genotype
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+_HISTORY_PATH: Final = consts.ROOT / "benchmarks" / "history.json"
+_TICKERS: Final = 100
+_MARKET_DAYS: Final = 1500
+_DAYS: Final = datasets.Days(history=252, forecast=21, test=64)
+_BATCH_SIZE: Final = 128
+_LOADER_BATCHES: Final = 100
+_NET_STEPS: Final = 10
+_REPEATS: Final = 3
+_RISK_TICKERS: Final = (50, 100, 200, 300)
+_RISK_DAYS: Final = 32
+_COR_DAYS: Final = 32
+_REGRESSION: Final = 0.1
+# Размер сети и длина истории типичных генотипов
+_GENOTYPES: Final = {
+    "small": {"history_days": 64, "sub_blocks": 1, "kernels": 2, "channels": 4},
+    "medium": {"history_days": 252, "sub_blocks": 2, "kernels": 5, "channels": 8},
+    "large": {"history_days": 273, "sub_blocks": 2, "kernels": 8, "channels": 16},
+}
+
+lgr = logging.getLogger("Benchmark")
+
+
+class _Record(BaseModel):
+    time: datetime
+    python: str
+    torch: str
+    platform: str
+    threads: int
+    results: dict[str, float]
+
+
+_History = TypeAdapter(list[_Record])
+
+
+def _peak_rss_mb() -> float:
+    """Пиковая память процесса с начала запуска - растет по мере выполнения бенчмарков."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _best_time(func: Callable[[], object]) -> float:
+    timings: list[float] = []
+
+    for _ in range(_REPEATS):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+def _cfg(name: str) -> trainer.Cfg:
+    params = _GENOTYPES[name]
+    cfg = trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+    cfg.batch.size = _BATCH_SIZE
+    cfg.batch.num_feats = builder.NumFeatures.model_validate(dict.fromkeys(builder.NumFeatures.model_fields, True))
+    cfg.batch.emb_feats = builder.EmbFeatures.model_validate(dict.fromkeys(builder.EmbFeatures.model_fields, True))
+    cfg.batch.emb_seq_feats = builder.EmbSeqFeatures.model_validate(
+        dict.fromkeys(builder.EmbSeqFeatures.model_fields, True),
+    )
+    cfg.batch.use_lag_feat = False
+    cfg.batch.history_days = params["history_days"]
+    cfg.net.sub_blocks = params["sub_blocks"]
+    cfg.net.kernels = params["kernels"]
+    cfg.net.residual_channels = params["channels"]
+    cfg.net.gate_channels = params["channels"]
+    cfg.net.skip_channels = params["channels"]
+    cfg.net.head_channels = params["channels"]
+
+    return cfg
+
+
+def _data(ctx: synthetic.Ctx, cfg: trainer.Cfg) -> tuple[list[datasets.TickerData], list[int], list[int]]:
+    days = _DAYS.model_copy(update={"history": cfg.batch.history_days})
+
+    return asyncio.run(synthetic.build(ctx, _TICKERS, days, cfg.batch))
+
+
+def _bench_data(ctx: synthetic.Ctx) -> dict[str, float]:
+    cfg = _cfg("medium")
+    build_time = _best_time(lambda: _data(ctx, cfg))
+    all_data, _, _ = _data(ctx, cfg)
+
+    def load() -> None:
+        for batch in itertools.islice(data_loaders.train(all_data, _BATCH_SIZE), _LOADER_BATCHES):
+            batch.num_feat.sum()
+
+    samples_per_sec = _LOADER_BATCHES * _BATCH_SIZE / _best_time(load)
+
+    return {
+        "builder.build_sec": build_time,
+        "data_loaders.train_samples_per_sec": samples_per_sec,
+        "data.peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _bench_net(ctx: synthetic.Ctx, name: str) -> dict[str, float]:
+    cfg = _cfg(name)
+    all_data, emb_size, emb_seq_size = _data(ctx, cfg)
+    batch = next(iter(data_loaders.train(all_data, _BATCH_SIZE)))
+    torch.manual_seed(0)  # type: ignore[reportUnknownMemberType]
+    net = wave_net.Net(cfg.net, cfg.batch.history_days, cfg.batch.num_feat_count, emb_size, emb_seq_size)
+    optimizer = torch.optim.SGD(net.parameters(), lr=1e-4)
+
+    def forward() -> None:
+        with torch.inference_mode():
+            for _ in range(_NET_STEPS):
+                net.llh(*batch)
+
+    def step() -> None:
+        for _ in range(_NET_STEPS):
+            optimizer.zero_grad()
+            (-net.llh(*batch)).backward()  # type: ignore[no-untyped-call]
+            optimizer.step()  # type: ignore[reportUnknownMemberType]
+
+    return {
+        f"wave_net.{name}.forward_ms": _best_time(forward) / _NET_STEPS * 1000,
+        f"wave_net.{name}.forward_backward_ms": _best_time(step) / _NET_STEPS * 1000,
+        f"wave_net.{name}.peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _bench_risk() -> dict[str, float]:
+    rng = np.random.default_rng(0)
+    cfg = risk.Cfg(risk_tolerance=0.5)
+    rez: dict[str, float] = {}
+
+    for tickers in _RISK_TICKERS:
+        mean = rng.normal(0.01, 0.02, (_RISK_DAYS, tickers, 1))
+        std = np.abs(rng.normal(0.05, 0.01, (_RISK_DAYS, tickers, 1)))
+        labels = rng.normal(0, 0.05, (_RISK_DAYS, tickers, 1))
+        cor = ledoit_wolf.ledoit_wolf_cor(rng.normal(0, 0.02, (_RISK_DAYS, tickers, _DAYS.history)))[0]
+
+        duration = _best_time(functools.partial(risk.optimize_days, mean, std, labels, cor, cfg, _DAYS.forecast))
+        rez[f"risk.optimize_days.{tickers}_tickers_ms_per_day"] = duration / _RISK_DAYS * 1000
+
+    return rez
+
+
+def _by_day(estimator: Callable[[NDArray[np.double]], object], tot_ret: NDArray[np.double]) -> None:
+    """Оценка ковариации отдельно для каждого дня - копия нужна, так как оценка центрирует доходности на месте."""
+    for day_ret in tot_ret:
+        estimator(day_ret.T.copy())
+
+
+def _bench_ledoit_wolf() -> dict[str, float]:
+    rng = np.random.default_rng(0)
+    tot_ret = rng.normal(0, 0.02, (_COR_DAYS, _TICKERS, _DAYS.history))
+    shrinkage = _best_time(functools.partial(ledoit_wolf.shrinkage, tot_ret.swapaxes(-1, -2)))
+    cor = _best_time(functools.partial(ledoit_wolf.ledoit_wolf_cor, tot_ret))
+    qis = _best_time(functools.partial(_by_day, ledoit_wolf_nonlinear.qis, tot_ret))
+    analytical = _best_time(functools.partial(_by_day, ledoit_wolf_nonlinear.analytical_shrinkage, tot_ret))
+
+    return {
+        "ledoit_wolf.shrinkage_ms_per_day": shrinkage / _COR_DAYS * 1000,
+        "ledoit_wolf.ledoit_wolf_cor_ms_per_day": cor / _COR_DAYS * 1000,
+        "ledoit_wolf_nonlinear.qis_ms_per_day": qis / _COR_DAYS * 1000,
+        "ledoit_wolf_nonlinear.analytical_shrinkage_ms_per_day": analytical / _COR_DAYS * 1000,
+        "ledoit_wolf.peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _higher_is_better(name: str) -> bool:
+    return name.endswith("_per_sec")
+
+
+def _log_changes(previous: dict[str, float], current: dict[str, float]) -> None:
+    for name, value in current.items():
+        if not (old := previous.get(name)):
+            lgr.info("%s - %.3f", name, value)
+
+            continue
+
+        change = value / old - 1
+        worse = -change if _higher_is_better(name) else change
+        mark = " REGRESSION" if worse > _REGRESSION else ""
+        lgr.info("%s - %.3f / %+.1f%%%s", name, value, change * 100, mark)
+
+
+def _load_history() -> list[_Record]:
+    if not _HISTORY_PATH.exists():
+        return []
+
+    return _History.validate_json(_HISTORY_PATH.read_bytes())
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    ctx = synthetic.make_ctx(_TICKERS, _MARKET_DAYS)
+
+    results = _bench_data(ctx)
+    for name in _GENOTYPES:
+        results |= _bench_net(ctx, name)
+    results |= _bench_risk()
+    results |= _bench_ledoit_wolf()
+    results["peak_rss_mb"] = _peak_rss_mb()
+
+    history = _load_history()
+    _log_changes(history[-1].results if history else {}, results)
+
+    history.append(
+        _Record(
+            time=datetime.now(UTC),
+            python=platform.python_version(),
+            torch=torch.__version__,
+            platform=platform.platform(),
+            threads=torch.get_num_threads(),
+            results=results,
+        ),
+    )
+    _HISTORY_PATH.parent.mkdir(parents=True, exist_ok=True)
+    _HISTORY_PATH.write_bytes(_History.dump_json(history, indent=2))
+    lgr.info("History saved to %s", _HISTORY_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Синтетические признаки в формате features.Features и MarketFeatures для бенчмарков."""
+
+from datetime import date, timedelta
+from typing import Any, Final
+
+import numpy as np
+
+from poptimizer.core import domain
+from poptimizer.data.features import features
+from poptimizer.evolve.dl import builder, datasets
+
+DAY: Final = date(2025, 1, 10)
+# Признаки, которые в реальных данных рассчитываются по котировкам тикера, остальные - общие для рынка
+_TICKER_FEAT: Final = (
+    features.NumFeat.OPEN,
+    features.NumFeat.CLOSE,
+    features.NumFeat.HIGH,
+    features.NumFeat.LOW,
+    features.NumFeat.DIVIDENDS,
+    features.NumFeat.RETURNS,
+    features.NumFeat.TURNOVER,
+)
+_MARKET_FEAT: Final = tuple(feat for feat in features.NumFeat if feat not in _TICKER_FEAT)
+_RETURNS_STD: Final = 0.02
+_EMB_SIZES: Final = {
+    features.EmbFeat.TICKER_TYPE: 4,
+    features.EmbFeat.SECTOR: 12,
+}
+
+
+class Ctx:
+    """Отдает синтетические признаки вместо загрузки из базы."""
+
+    def __init__(self, feats: list[features.Features], market: features.MarketFeatures) -> None:
+        self._feats = {feat.uid: feat for feat in feats}
+        self._market = market
+
+    async def get(self, t_entity: type[Any], uid: domain.UID | None = None) -> Any:
+        if t_entity is features.MarketFeatures:
+            return self._market
+
+        return self._feats[domain.UID(str(uid))]
+
+    def warning(self, msg: str, *args: Any) -> None: ...
+
+
+def tickers(count: int) -> tuple[domain.Ticker, ...]:
+    return tuple(domain.Ticker(f"T{n:03}") for n in range(count))
+
+
+def make_ctx(count: int, days: int, seed: int = 0) -> Ctx:
+    """Признаки count тикеров за days торговых дней до DAY."""
+    rng = np.random.default_rng(seed)
+    ticker_feats = [_ticker_features(ticker, n, count, days, rng) for n, ticker in enumerate(tickers(count))]
+
+    return Ctx(ticker_feats, _market_features(days, rng))
+
+
+async def build(
+    ctx: Ctx,
+    count: int,
+    days: datasets.Days,
+    batch: builder.Batch,
+) -> tuple[list[datasets.TickerData], list[int], list[int]]:
+    """Данные модели, подготовленные из синтетических признаков штатным Builder."""
+    return await builder.Builder().build(ctx, DAY, tickers(count), days, batch)  # type: ignore[arg-type]
+
+
+def _ticker_features(
+    ticker: domain.Ticker,
+    n: int,
+    count: int,
+    days: int,
+    rng: np.random.Generator,
+) -> features.Features:
+    values = rng.normal(0, 1, (days, len(_TICKER_FEAT)))
+    values[:, _TICKER_FEAT.index(features.NumFeat.RETURNS)] *= _RETURNS_STD
+
+    embedding = {
+        features.EmbFeat.TICKER: features.EmbeddingFeatDesc(value=n, size=max(2, count)),
+    } | {
+        feat: features.EmbeddingFeatDesc(value=int(rng.integers(size)), size=size) for feat, size in _EMB_SIZES.items()
+    }
+
+    return features.Features(
+        uid=domain.UID(ticker),
+        numerical=[dict(zip(_TICKER_FEAT, row, strict=True)) for row in values.tolist()],
+        embedding=embedding,
+    )
+
+
+def _market_features(days: int, rng: np.random.Generator) -> features.MarketFeatures:
+    values = rng.normal(0, 1, (days, len(_MARKET_FEAT)))
+    rows: list[features.MarketRow] = []
+
+    for n, row in enumerate(values.tolist()):
+        day = DAY - timedelta(days=days - 1 - n)
+        rows.append(
+            features.MarketRow(
+                day=day,
+                numerical=dict(zip(_MARKET_FEAT, row, strict=True)),
+                embedding_seq={
+                    features.EmbSeqFeat.WEEK_DAY: day.weekday(),
+                    features.EmbSeqFeat.WEEK: day.isocalendar().week - 1,
+                    features.EmbSeqFeat.MONTH_DAY: day.day - 1,
+                    features.EmbSeqFeat.MONTH: day.month - 1,
+                    features.EmbSeqFeat.YEAR_DAY: day.timetuple().tm_yday - 1,
+                },
+            ),
+        )
+
+    return features.MarketFeatures(uid=domain.UID("MarketFeatures"), df=rows)
@@ -1,9 +1,13 @@
 import asyncio
+import itertools
+from enum import StrEnum
+from typing import NamedTuple, cast
 
+import torch
 from pydantic import BaseModel
 
 from poptimizer.core import consts, domain, errors, fsm
-from poptimizer.data.features import features
+from poptimizer.data.features import features, snapshot
 from poptimizer.evolve.dl import datasets
 
 
@@ -61,13 +65,34 @@ class Batch(BaseModel):
         return sum(on for _, on in self.num_feats)
 
 
+class Data(NamedTuple):
+    ticker_data: list[datasets.TickerData]
+    emb_size: list[int]
+    emb_seq_size: list[int]
+
+
+def _columns[F: StrEnum](all_feats: list[F], selected: BaseModel) -> list[int]:
+    return [n for n, feat in enumerate(all_feats) if getattr(selected, feat)]
+
+
 class Builder:
+    """Готовит данные для моделей на основе общих для всех моделей тензоров признаков за день.
+
+    Все признаки, метки и доходности материализуются один раз за день в непрерывные тензоры, а для
+    отдельных моделей выбираются нужные колонки, и нарезаются представления для каждого тикера.
+    Признаки загружаются из отображаемого в память снимка за день, а при его отсутствии - из базы.
+    """
+
     def __init__(self) -> None:
         self._day = consts.START_DAY
         self._tickers: tuple[domain.Ticker, ...] = ()
-        self._cache: list[features.Features] = []
+        self._bounds: list[int] = [0]
+        self._num_feat = torch.empty(len(snapshot.NUM_FEAT), 0)
+        self._emb_seq_feat = torch.empty(len(snapshot.EMB_SEQ_FEAT), 0, dtype=torch.long)
+        self._embedding = torch.empty(0, len(snapshot.EMB_FEAT), dtype=torch.long)
         self._embedding_sizes: dict[features.EmbFeat, int] = {}
-        self._embedding_seq_sizes: dict[features.EmbSeqFeat, int] = {}
+        self._returns = torch.empty(0)
+        self._labels: dict[int, torch.Tensor] = {}
 
     async def build(
         self,
@@ -76,32 +101,92 @@ class Builder:
         tickers: tuple[domain.Ticker, ...],
         days: datasets.Days,
         batch: Batch,
-    ) -> tuple[list[datasets.TickerData], list[int], list[int]]:
+    ) -> Data:
         await self._update_cache(ctx, day, tickers)
 
-        emb_feat_selected = sorted(features.EmbFeat(feat) for feat, on in batch.emb_feats if on)
-        emb_seq_feat_selected = sorted(features.EmbSeqFeat(feat) for feat, on in batch.emb_seq_feats if on)
-        emb_seq_feat_size = [self._embedding_seq_sizes[feat] for feat in emb_seq_feat_selected]
+        return self._select(tickers, days, batch)
+
+    def build_from_snapshot(
+        self,
+        day: domain.Day,
+        tickers: tuple[domain.Ticker, ...],
+        days: datasets.Days,
+        batch: Batch,
+    ) -> Data:
+        """Готовит данные только из сохраненного снимка признаков - используется в процессах без доступа к базе."""
+        if self._day != day or self._tickers != tickers:
+            if (snap := snapshot.load(day, tickers)) is None:
+                raise errors.UseCasesError(f"features snapshot for {day} not found")
+
+            self._set_cache(snap)
+
+        return self._select(tickers, days, batch)
+
+    async def save_snapshot(self, ctx: fsm.Ctx, day: domain.Day, tickers: tuple[domain.Ticker, ...]) -> None:
+        """Сохраняет отсутствующий снимок признаков, чтобы из него могли готовить данные другие процессы."""
+        if await asyncio.to_thread(snapshot.load, day, tickers) is not None:
+            return
+
+        snap = await self._build_snapshot(ctx, day, tickers)
+        ctx.warning("Features snapshot for %s not found - saved from database", day)
+        await asyncio.to_thread(snap.save)
+
+    def _select(self, tickers: tuple[domain.Ticker, ...], days: datasets.Days, batch: Batch) -> Data:
+        emb_feat_cols = _columns(snapshot.EMB_FEAT, batch.emb_feats)
+        emb_seq_feat_cols = _columns(snapshot.EMB_SEQ_FEAT, batch.emb_seq_feats)
+        emb_seq_feat_size = [features.EMB_SEQ_SIZES[snapshot.EMB_SEQ_FEAT[n]] for n in emb_seq_feat_cols]
         if batch.use_lag_feat:
             emb_seq_feat_size.append(days.history)
 
-        return (
+        num_feat = self._num_feat[_columns(snapshot.NUM_FEAT, batch.num_feats)]
+        emb_seq_feat = self._emb_seq_feat[emb_seq_feat_cols]
+        embedding = cast("list[list[int]]", self._embedding[:, emb_feat_cols].tolist())  # type: ignore[reportUnknownMemberType]
+        labels = self._forecast_labels(days.forecast)
+
+        return Data(
             [
                 datasets.TickerData(
                     ticker=ticker,
                     days=days,
-                    num_feat=feat.numerical,
-                    num_feat_selected=sorted(features.NumFeat(feat) for feat, on in batch.num_feats if on),
-                    emb_feat=[feat.embedding[selected].value for selected in emb_feat_selected],
-                    emb_seq_feat=[feat.embedding_seq[selected].sequence for selected in emb_seq_feat_selected],
+                    num_feat=num_feat[:, start:end],
+                    emb_feat=emb_feat,
+                    emb_seq_feat=emb_seq_feat[:, start:end],
                     lag_feat=batch.use_lag_feat,
+                    labels=labels[start:end],
+                    returns=self._returns[start:end],
+                )
+                for ticker, emb_feat, (start, end) in zip(
+                    tickers,
+                    embedding,
+                    itertools.pairwise(self._bounds),
+                    strict=True,
                 )
-                for ticker, feat in zip(tickers, self._cache, strict=True)
             ],
-            [self._embedding_sizes[feat] for feat in emb_feat_selected],
+            [self._embedding_size(snapshot.EMB_FEAT[n]) for n in emb_feat_cols],
             emb_seq_feat_size,
         )
 
+    def _embedding_size(self, feat: features.EmbFeat) -> int:
+        if (size := self._embedding_sizes.get(feat)) is None:
+            raise errors.UseCasesError(f"no embedding {feat}")
+
+        return size
+
+    def _forecast_labels(self, forecast_days: int) -> torch.Tensor:
+        if (labels := self._labels.get(forecast_days)) is not None:
+            return labels
+
+        log_returns = self._num_feat[snapshot.NUM_FEAT.index(features.NumFeat.RETURNS)]
+        labels = torch.cat(
+            [
+                datasets.forward_growth(log_returns[start:end], forecast_days)
+                for start, end in itertools.pairwise(self._bounds)
+            ],
+        )
+        self._labels[forecast_days] = labels
+
+        return labels
+
     async def _update_cache(
         self,
         ctx: fsm.Ctx,
@@ -111,24 +196,33 @@ class Builder:
         if self._day == day and self._tickers == tickers:
             return
 
-        self._day = day
-        self._tickers = tickers
+        snap = await asyncio.to_thread(snapshot.load, day, tickers)
+        if snap is None:
+            snap = await self._build_snapshot(ctx, day, tickers)
+            ctx.warning("Features snapshot for %s not found - loaded from database", day)
+
+        self._set_cache(snap)
+
+    def _set_cache(self, snap: snapshot.Snapshot) -> None:
+        self._bounds = snap.bounds
+        self._num_feat = torch.from_numpy(snap.num_feat)  # type: ignore[reportUnknownMemberType]
+        self._emb_seq_feat = torch.from_numpy(snap.emb_seq_feat)  # type: ignore[reportUnknownMemberType]
+        self._embedding = torch.from_numpy(snap.embedding)  # type: ignore[reportUnknownMemberType]
+        self._embedding_sizes = snap.embedding_sizes
+        self._returns = self._num_feat[snapshot.NUM_FEAT.index(features.NumFeat.RETURNS)].exp().sub(1)
+        self._labels = {}
+
+        self._day = snap.day
+        self._tickers = snap.tickers
 
+    async def _build_snapshot(
+        self,
+        ctx: fsm.Ctx,
+        day: domain.Day,
+        tickers: tuple[domain.Ticker, ...],
+    ) -> snapshot.Snapshot:
         async with asyncio.TaskGroup() as tg:
+            market_task = tg.create_task(ctx.get(features.MarketFeatures))
             tasks = [tg.create_task(ctx.get(features.Features, domain.UID(ticker))) for ticker in tickers]
 
-        self._cache = [await task for task in tasks]
-
-        first_embedding = self._cache[0].embedding
-        self._embedding_sizes = {feat: desc.size for feat, desc in first_embedding.items()}
-        for n in range(1, len(self._cache)):
-            embedding = self._cache[n].embedding
-            if {feat: desc.size for feat, desc in embedding.items()} != self._embedding_sizes:
-                raise errors.UseCasesError(f"unequal embeddings sizes for {tickers[n]}")
-
-        first_embedding_seq = self._cache[0].embedding_seq
-        self._embedding_seq_sizes = {feat: desc.size for feat, desc in first_embedding_seq.items()}
-        for n in range(1, len(self._cache)):
-            embedding_seq = self._cache[n].embedding_seq
-            if {feat: desc.size for feat, desc in embedding_seq.items()} != self._embedding_seq_sizes:
-                raise errors.UseCasesError("unequal embeddings seq sizes")
+        return snapshot.build(day, tickers, [await task for task in tasks], await market_task)
@@ -0,0 +1,114 @@
+import pickle
+from pathlib import Path
+from typing import Any, Final, NamedTuple, Protocol
+
+import torch
+from torch import optim
+
+from poptimizer.core import consts, domain, errors
+
+_DIR: Final = consts.ROOT / "checkpoints"
+_DAY: Final = "day"
+_TAG: Final = "tag"
+_STATE: Final = "state"
+
+
+class _Stateful(Protocol):
+    def state_dict(self) -> dict[str, Any]: ...
+
+    def load_state_dict(self, state: dict[str, Any], /) -> None: ...
+
+
+class Training(NamedTuple):
+    """Объекты обучения, состояние которых сохраняется в контрольной точке."""
+
+    net: torch.nn.Module
+    opt: optim.Optimizer
+    sch: optim.lr_scheduler.LRScheduler
+    avg_llh: _Stateful
+
+
+class Progress(NamedTuple):
+    train_llh: list[float]
+    step: int
+    total_steps: int
+
+
+def _path(uid: domain.UID) -> Path:
+    return _DIR / f"{uid}.pt"
+
+
+class Checkpoint:
+    """Промежуточное состояние обучения модели.
+
+    Состояние сохраняется для модели и дня, а tag описывает конфигурацию обучения - сохраненное при другой
+    конфигурации состояние не загружается.
+    """
+
+    def __init__(self, uid: domain.UID, day: domain.Day, tag: str, every_steps: int) -> None:
+        self._uid = uid
+        self._path = _path(uid)
+        self._day = str(day)
+        self._tag = tag
+        self._every_steps = every_steps
+
+    def is_due(self, step: int) -> bool:
+        return step % self._every_steps == 0
+
+    def save(self, state: dict[str, Any]) -> None:
+        tmp_path = self._path.with_name(f"{self._path.name}.tmp")
+
+        try:
+            _DIR.mkdir(parents=True, exist_ok=True)
+            torch.save({_DAY: self._day, _TAG: self._tag, _STATE: state}, tmp_path)
+            tmp_path.replace(self._path)
+        except OSError as err:
+            raise errors.AdapterError(f"can't save training checkpoint {self._path}") from err
+
+    def load(self) -> dict[str, Any] | None:
+        try:
+            saved = torch.load(self._path, map_location="cpu", weights_only=True)
+        except OSError, RuntimeError, pickle.UnpicklingError:
+            return None
+
+        if saved.get(_DAY) != self._day or saved.get(_TAG) != self._tag:
+            return None
+
+        return saved[_STATE]
+
+    def save_training(self, training: Training, progress: Progress) -> None:
+        self.save(
+            {
+                "net": training.net.state_dict(),
+                "opt": training.opt.state_dict(),
+                "sch": training.sch.state_dict(),
+                "avg_llh": training.avg_llh.state_dict(),
+                "train_llh": progress.train_llh,
+                "step": progress.step,
+                "total_steps": progress.total_steps,
+            },
+        )
+
+    def restore(self, training: Training, total_steps: int) -> Progress | None:
+        """Загружает состояние обучения, сохраненное для того же количества шагов."""
+        if (state := self.load()) is None or state["total_steps"] != total_steps:
+            return None
+
+        training.net.load_state_dict(state["net"])
+        training.opt.load_state_dict(state["opt"])
+        training.sch.load_state_dict(state["sch"])
+        training.avg_llh.load_state_dict(state["avg_llh"])
+
+        return Progress(state["train_llh"], state["step"], total_steps)
+
+    def delete(self) -> None:
+        delete(self._uid)
+
+
+def delete(uid: domain.UID) -> None:
+    path = _path(uid)
+
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as err:
+        raise errors.AdapterError(f"can't delete training checkpoint {path}") from err
@@ -0,0 +1,135 @@
+import math
+from typing import Final, NamedTuple
+
+from poptimizer.evolve.dl import builder
+from poptimizer.evolve.dl.wave_net import backbone
+from poptimizer.evolve.models import genetics
+
+# Обратный проход требует вдвое больше операций, чем прямой, а для входного слоя без нормализации не нужен
+# градиент по входу
+_TRAIN_FLOPS_MULTIPLIER: Final = 3
+_INPUT_TRAIN_FLOPS_MULTIPLIER: Final = 2
+_BYTES_PER_FLOAT: Final = 4
+_BYTES_PER_INDEX: Final = 8
+# Признаки и их окна в обучающей выборке
+_DATA_COPIES: Final = 2
+# Веса, градиенты и два момента оптимизатора
+_FLOATS_PER_PARAM: Final = 4
+_HEAD_OUTPUTS: Final = 3
+
+
+class Cost(NamedTuple):
+    """Оценка стоимости обучения модели.
+
+    flops - операции с плавающей точкой на обучение по одному примеру за все эпохи, а memory - пиковая память
+    в байтах на параметры, состояние оптимизатора и активации одного обучающего батча.
+    """
+
+    flops: float
+    memory: float
+
+
+class Memory(NamedTuple):
+    """Оценка пиковой памяти оценки модели в байтах.
+
+    data - признаки тикеров и обучающая выборка, train - параметры, состояние оптимизатора, активации и входы
+    обучающего батча, а test - входы и наибольшие одновременно живущие активации тестового батча.
+    """
+
+    data: float
+    train: float
+    test: float
+
+    @property
+    def total(self) -> float:
+        return self.data + max(self.train, self.test)
+
+
+class _Size(NamedTuple):
+    flops: float
+    activations: float
+    params: float
+
+
+def estimate(phenotype: genetics.Phenotype) -> Cost:
+    batch = builder.Batch.model_validate(phenotype["batch"])
+    net = backbone.Cfg.model_validate(phenotype["net"])
+
+    inputs = _inputs(batch, net)
+    size = _Size(flops=0, activations=0, params=0)
+    length = batch.history_days
+
+    for _ in range(int(math.log2(batch.history_days - 1)) + 1):
+        size = _add(size, _block(net, length))
+        length = (length + 1) // 2
+
+    size = _add(size, _head(net))
+    input_multiplier = _TRAIN_FLOPS_MULTIPLIER if net.use_bn else _INPUT_TRAIN_FLOPS_MULTIPLIER
+    flops = input_multiplier * inputs.flops + _TRAIN_FLOPS_MULTIPLIER * size.flops
+    size = _add(size, inputs)
+
+    return Cost(
+        flops=flops * phenotype["scheduler"]["epochs"],
+        memory=_BYTES_PER_FLOAT * (batch.size * size.activations + _FLOATS_PER_PARAM * size.params),
+    )
+
+
+def memory(phenotype: genetics.Phenotype, data_bytes: float, emb_seq_count: int, test_multiplier: int) -> Memory:
+    """Пиковая память для данных размером data_bytes и тестового батча в test_multiplier раз больше обучающего."""
+    batch = builder.Batch.model_validate(phenotype["batch"])
+    net = backbone.Cfg.model_validate(phenotype["net"])
+
+    sample = batch.history_days * (_BYTES_PER_FLOAT * batch.num_feat_count + _BYTES_PER_INDEX * emb_seq_count)
+    test_activations = _BYTES_PER_FLOAT * batch.history_days * (2 * net.residual_channels + 3 * net.gate_channels)
+
+    return Memory(
+        data=_DATA_COPIES * data_bytes,
+        train=estimate(phenotype).memory + batch.size * sample,
+        test=test_multiplier * batch.size * (sample + test_activations),
+    )
+
+
+def _add(first: _Size, second: _Size) -> _Size:
+    return _Size(*(one + other for one, other in zip(first, second, strict=True)))
+
+
+def _conv(in_channels: int, out_channels: int, kernels: int, length: int) -> _Size:
+    return _Size(
+        flops=2 * in_channels * out_channels * kernels * length,
+        activations=out_channels * length,
+        params=(in_channels * kernels + 1) * out_channels,
+    )
+
+
+def _inputs(batch: builder.Batch, net: backbone.Cfg) -> _Size:
+    days = batch.history_days
+    feats = batch.num_feat_count
+
+    return _add(
+        _conv(feats, net.residual_channels, 1, days),
+        _Size(flops=0, activations=feats * days, params=2 * feats * net.use_bn),
+    )
+
+
+def _block(net: backbone.Cfg, length: int) -> _Size:
+    res = net.residual_channels
+    gate = net.gate_channels
+    size = _Size(flops=0, activations=0, params=0)
+
+    for _ in range(net.sub_blocks):
+        size = _add(size, _conv(res, gate, net.kernels, length))
+        size = _add(size, _conv(res, gate, net.kernels, length))
+        size = _add(size, _conv(gate, res, 1, length))
+        # Дополненный вход, функции активации, их произведение и остаточная сумма
+        size = _add(size, _Size(flops=0, activations=res * (length + net.kernels) + 3 * gate * length, params=0))
+
+    size = _add(size, _conv(res, res, 2, (length + 1) // 2))
+
+    return _add(size, _conv(res, net.skip_channels, 1, 1))
+
+
+def _head(net: backbone.Cfg) -> _Size:
+    size = _conv(net.residual_channels, net.skip_channels, 1, 1)
+    size = _add(size, _conv(net.skip_channels, net.head_channels, 1, 1))
+
+    return _add(size, _conv(net.head_channels, net.mixture_size * _HEAD_OUTPUTS, 1, 1))
@@ -1,54 +1,62 @@
+import math
 from collections.abc import Iterator
 
+import torch
 from torch.utils import data
 
-from poptimizer.core import errors
 from poptimizer.evolve.dl import datasets
 
 AllTickersData = list[datasets.TickerData]
 
 
-def train(all_data: AllTickersData, batch_size: int) -> data.DataLoader[datasets.TrainBatch]:
+class _ShuffledBatchSampler(data.Sampler[torch.Tensor]):
+    def __init__(self, size: int, batch_size: int) -> None:
+        super().__init__()
+        self._size = size
+        self._batch_size = batch_size
+
+    def __len__(self) -> int:
+        return math.ceil(self._size / self._batch_size)
+
+    def __iter__(self) -> Iterator[torch.Tensor]:
+        yield from torch.randperm(self._size).split(self._batch_size)  # type: ignore[reportUnknownMemberType]
+
+
+def train(
+    all_data: AllTickersData,
+    batch_size: int,
+    recent_days: int | None = None,
+) -> data.DataLoader[datasets.TrainBatch]:
+    dataset = datasets.TrainDataSet(all_data, recent_days)
+
     return data.DataLoader(  # type: ignore[reportUnknownMemberType]
-        dataset=data.ConcatDataset(ticker.train_dataset() for ticker in all_data),  # type: ignore[reportUnknownMemberType]
-        batch_size=batch_size,
-        shuffle=True,
-        drop_last=False,
+        dataset=dataset,
+        sampler=_ShuffledBatchSampler(len(dataset), batch_size),
+        batch_size=None,
     )
 
 
-class _DaysSampler(data.Sampler[list[int]]):
-    def __init__(self, all_data: list[datasets.TickerTestDataSet]) -> None:
+class _DaysSampler(data.Sampler[torch.Tensor]):
+    def __init__(self, test_days: int, days_per_batch: int) -> None:
         super().__init__()
-        self._test_days = len(all_data[0])
-        self._tests = self._test_days * len(all_data)
-
-        if any(len(dataset) != self._test_days for dataset in all_data):
-            raise errors.DomainError("test length mismatch")
+        self._test_days = test_days
+        self._days_per_batch = days_per_batch
 
     def __len__(self) -> int:
-        return self._test_days
+        return math.ceil(self._test_days / self._days_per_batch)
 
-    def __iter__(self) -> Iterator[list[int]]:
-        yield from (
-            list(
-                range(
-                    day,
-                    self._tests,
-                    self._test_days,
-                ),
-            )
-            for day in reversed(range(self._test_days))
-        )
+    def __iter__(self) -> Iterator[torch.Tensor]:
+        yield from torch.arange(self._test_days).flip(0).split(self._days_per_batch)  # type: ignore[reportUnknownMemberType]
 
 
-def test(all_data: AllTickersData) -> data.DataLoader[datasets.TestBatch]:
-    test_dataset = [ticker.test_dataset() for ticker in all_data]
+def test(all_data: AllTickersData, days_per_batch: int) -> data.DataLoader[datasets.TestBatch]:
+    """Тестовые батчи по days_per_batch дней, начиная с последнего дня."""
+    dataset = datasets.TestDataSet(all_data)
 
     return data.DataLoader(  # type: ignore[reportUnknownMemberType]
-        dataset=data.ConcatDataset(test_dataset),  # type: ignore[reportUnknownMemberType]
-        batch_sampler=_DaysSampler(test_dataset),
-        drop_last=False,
+        dataset=dataset,
+        sampler=_DaysSampler(len(dataset), days_per_batch),
+        batch_size=None,
     )
 
 
@@ -1,14 +1,12 @@
 # pyright: reportPrivateImportUsage=false
+import itertools
 from typing import TYPE_CHECKING, NamedTuple
 
-import numpy as np
-import pandas as pd
 import torch
-from pydantic import BaseModel, FiniteFloat
+from pydantic import BaseModel
 from torch.utils import data
 
 from poptimizer.core import errors
-from poptimizer.data.features import features
 
 if TYPE_CHECKING:
     from poptimizer.core import domain
@@ -67,6 +65,58 @@ class TickerTrainDataSet(data.Dataset[TrainBatch]):
         )
 
 
+def _windows(feats: list[torch.Tensor], history: int) -> torch.Tensor:
+    return torch.cat(feats, dim=1).unfold(1, history, 1).transpose(0, 1)
+
+
+class TrainDataSet(data.Dataset[TrainBatch]):
+    """Обучающие примеры всех тикеров.
+
+    Признаки тикеров объединяются по оси дней, а окна истории представлены strided-видом без копирования.
+    Выборка индексируется тензором номеров примеров, поэтому батч формируется одной операцией gather.
+    При заданном recent_days используются только последние recent_days обучающих примеров каждого тикера.
+    """
+
+    def __init__(self, all_data: list[TickerData], recent_days: int | None = None) -> None:
+        history = all_data[0].days.history
+        sizes = [len(ticker.train_dataset()) for ticker in all_data]
+        skips = [max(0, size - (recent_days or size)) for size in sizes]
+        bounds = itertools.accumulate((ticker.num_feat.shape[1] for ticker in all_data), initial=0)
+        starts = [
+            torch.arange(start + skip, start + size) for start, skip, size in zip(bounds, skips, sizes, strict=False)
+        ]
+
+        self._num_feat = _windows([ticker.num_feat for ticker in all_data], history)
+        self._emb_seq_feat = _windows([ticker.emb_seq_feat for ticker in all_data], history)
+        self._emb_feat = torch.stack([ticker.emb_feat for ticker in all_data])
+        self._lag_feat = all_data[0].lag_feat
+        self._starts = torch.cat(starts)
+        self._tickers = torch.repeat_interleave(
+            torch.arange(len(all_data)),
+            torch.tensor([size - skip for skip, size in zip(skips, sizes, strict=True)]),
+        )
+        self._labels = torch.cat(
+            [ticker.labels[skip:size] for ticker, skip, size in zip(all_data, skips, sizes, strict=True)],
+        )
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, idx: torch.Tensor) -> TrainBatch:
+        starts = self._starts[idx]
+
+        emb_seq_feat = self._emb_seq_feat[starts]
+        if self._lag_feat is not None:
+            emb_seq_feat = torch.cat((emb_seq_feat, self._lag_feat.expand(len(idx), -1, -1)), dim=1)
+
+        return TrainBatch(
+            num_feat=self._num_feat[starts],
+            emb_feat=self._emb_feat[self._tickers[idx]],
+            emb_seq_feat=emb_seq_feat,
+            labels=self._labels[idx].reshape(-1, 1),
+        )
+
+
 class TestBatch(NamedTuple):
     num_feat: torch.Tensor
     emb_feat: torch.Tensor
@@ -75,53 +125,63 @@ class TestBatch(NamedTuple):
     returns: torch.Tensor
 
 
-class TickerTestDataSet(data.Dataset[TestBatch]):
-    def __init__(  # noqa: PLR0913, PLR0917
-        self,
-        days: Days,
-        num_feat: torch.Tensor,
-        emb_feat: torch.Tensor,
-        emb_seq_feat: torch.Tensor,
-        lag_feat: torch.Tensor | None,
-        labels: torch.Tensor,
-        returns: torch.Tensor,
-    ) -> None:
+class ForecastBatch(NamedTuple):
+    num_feat: torch.Tensor
+    emb_feat: torch.Tensor
+    emb_seq_feat: torch.Tensor
+    returns: torch.Tensor
+
+
+class TestDataSet(data.Dataset[TestBatch]):
+    """Тестовые примеры всех тикеров.
+
+    Индексируется тензором номеров дней теста - примеры в батче упорядочены по дням, а внутри дня по тикерам.
+    """
+
+    def __init__(self, all_data: list[TickerData]) -> None:
+        days = all_data[0].days
+        offset = days.history + days.forecast + days.test - 1
+        ends = itertools.accumulate(ticker.num_feat.shape[1] for ticker in all_data)
+
         self._len = days.test
-        self._start = num_feat.shape[1] - (days.history + days.forecast + days.test - 1)
-        self._history = days.history
-        self._num_feat = num_feat
-        self._emb_feat = emb_feat
-        self._emb_seq_feat = emb_seq_feat
-        self._lag_feat = lag_feat
-        self._labels = labels
-        self._returns = returns
+        self._num_feat = _windows([ticker.num_feat for ticker in all_data], days.history)
+        self._emb_seq_feat = _windows([ticker.emb_seq_feat for ticker in all_data], days.history)
+        self._emb_feat = torch.stack([ticker.emb_feat for ticker in all_data])
+        self._lag_feat = all_data[0].lag_feat
+        self._starts = torch.tensor([end - offset for end in ends])
+        self._labels = torch.stack(
+            [ticker.labels[ticker.num_feat.shape[1] - offset :][: days.test] for ticker in all_data],
+            dim=1,
+        )
+        self._returns = torch.cat([ticker.returns for ticker in all_data]).unfold(0, days.history, 1)
 
     def __len__(self) -> int:
         return self._len
 
-    def __getitem__(self, n: int) -> TestBatch:
-        start = self._start + n
+    def __getitem__(self, days: torch.Tensor) -> TestBatch:
+        starts = (days.reshape(-1, 1) + self._starts).flatten()
 
-        emb_seq_feat = torch.tensor([], dtype=torch.long)
-        if len(self._emb_seq_feat):
-            emb_seq_feat = self._emb_seq_feat[:, start : start + self._history]
+        emb_seq_feat = self._emb_seq_feat[starts]
         if self._lag_feat is not None:
-            emb_seq_feat = torch.cat((emb_seq_feat, self._lag_feat), dim=0)
+            emb_seq_feat = torch.cat((emb_seq_feat, self._lag_feat.expand(len(starts), -1, -1)), dim=1)
 
         return TestBatch(
-            num_feat=self._num_feat[:, start : start + self._history],
-            emb_feat=self._emb_feat,
+            num_feat=self._num_feat[starts],
+            emb_feat=self._emb_feat.repeat(len(days), 1),
             emb_seq_feat=emb_seq_feat,
-            labels=self._labels[start].reshape(-1),
-            returns=self._returns[start : start + self._history],
+            labels=self._labels[days].reshape(-1, 1),
+            returns=self._returns[starts],
         )
 
 
-class ForecastBatch(NamedTuple):
-    num_feat: torch.Tensor
-    emb_feat: torch.Tensor
-    emb_seq_feat: torch.Tensor
-    returns: torch.Tensor
+def spans(windows: torch.Tensor, tickers: int) -> torch.Tensor:
+    """Последовательности дней тикеров, покрываемые окнами тестового батча.
+
+    Окна батча упорядочены по убыванию последовательных дней, а внутри дня по тикерам.
+    """
+    days = windows.reshape(-1, tickers, *windows.shape[1:]).flip(0)
+
+    return torch.cat((days[0], days[1:, :, :, -1].permute(1, 2, 0)), dim=2)
 
 
 class TickerForecastDataSet(data.Dataset[ForecastBatch]):
@@ -162,53 +222,79 @@ class TickerForecastDataSet(data.Dataset[ForecastBatch]):
         )
 
 
+def forward_growth(log_returns: torch.Tensor, forecast_days: int) -> torch.Tensor:
+    """Рост за forecast_days, начиная с каждого дня, - для последних дней без полного периода NaN."""
+    growth = torch.full_like(log_returns, torch.nan)
+    if len(log_returns) >= forecast_days:
+        growth[: len(log_returns) - forecast_days + 1] = log_returns.unfold(0, forecast_days, 1).sum(dim=1).exp()
+
+    return growth
+
+
 class TickerData:
     def __init__(  # noqa: PLR0913
         self,
         *,
         ticker: domain.Ticker,
         days: Days,
-        num_feat: list[dict[features.NumFeat, FiniteFloat]],
-        num_feat_selected: list[features.NumFeat],
+        num_feat: torch.Tensor,
         emb_feat: list[int],
-        emb_seq_feat: list[list[int]],
+        emb_seq_feat: torch.Tensor,
         lag_feat: bool,
+        labels: torch.Tensor,
+        returns: torch.Tensor,
     ) -> None:
         self._days = days
 
-        if not num_feat_selected:
+        if not len(num_feat):
             raise errors.DomainError("no features")
 
-        if len(num_feat) < days.minimal_returns_days:
+        if num_feat.shape[1] < days.minimal_returns_days:
             raise errors.TooShortHistoryError(ticker, days.minimal_returns_days)
 
-        all_feat_df = pd.DataFrame(num_feat)
-
-        self._num_feat = torch.from_numpy(  # type: ignore[reportUnknownMemberType]
-            all_feat_df[num_feat_selected].to_numpy(np.float32).copy(),  # type: ignore[reportUnknownMemberType]
-        ).T
-
+        self._num_feat = num_feat
         self._emb_feat = torch.tensor(emb_feat, dtype=torch.long)
-        self._emb_seq_feat = torch.tensor(emb_seq_feat, dtype=torch.long)
+        self._emb_seq_feat = emb_seq_feat
         self._lag_feat = None
         if lag_feat:
             self._lag_feat = torch.tensor([list(reversed(range(days.history)))], dtype=torch.long)
 
-        self._labels = torch.from_numpy(  # type: ignore[reportUnknownMemberType]
-            all_feat_df[features.NumFeat.RETURNS]
-            .rolling(days.forecast)  # type: ignore[reportUnknownMemberType]
-            .sum()
-            .shift(-(days.forecast + days.history - 1))
-            .to_numpy(np.float32),
-        ).exp()
-
-        self._returns = (
-            torch.from_numpy(  # type: ignore[reportUnknownMemberType]
-                all_feat_df[features.NumFeat.RETURNS].to_numpy(np.float32),  # type: ignore[reportUnknownMemberType]
-            )
-            .exp()
-            .sub(1)
-        )
+        self._labels = labels[days.history :]
+        self._returns = returns
+
+    @property
+    def days(self) -> Days:
+        return self._days
+
+    @property
+    def num_feat(self) -> torch.Tensor:
+        return self._num_feat
+
+    @property
+    def emb_feat(self) -> torch.Tensor:
+        return self._emb_feat
+
+    @property
+    def emb_seq_feat(self) -> torch.Tensor:
+        return self._emb_seq_feat
+
+    @property
+    def lag_feat(self) -> torch.Tensor | None:
+        return self._lag_feat
+
+    @property
+    def labels(self) -> torch.Tensor:
+        return self._labels
+
+    @property
+    def returns(self) -> torch.Tensor:
+        return self._returns
+
+    @property
+    def nbytes(self) -> int:
+        tensors = (self._num_feat, self._emb_feat, self._emb_seq_feat, self._labels, self._returns)
+
+        return sum(tensor.nbytes for tensor in tensors)
 
     def train_dataset(self) -> TickerTrainDataSet:
         return TickerTrainDataSet(
@@ -220,17 +306,6 @@ class TickerData:
             labels=self._labels,
         )
 
-    def test_dataset(self) -> TickerTestDataSet:
-        return TickerTestDataSet(
-            days=self._days,
-            num_feat=self._num_feat,
-            emb_feat=self._emb_feat,
-            emb_seq_feat=self._emb_seq_feat,
-            lag_feat=self._lag_feat,
-            labels=self._labels,
-            returns=self._returns,
-        )
-
     def forecast_dataset(self) -> TickerForecastDataSet:
         return TickerForecastDataSet(
             days=self._days,
@@ -1,14 +1,17 @@
+import collections
 from typing import TYPE_CHECKING
 
 import numpy as np
 
-from poptimizer.core import errors
+from poptimizer.core import domain, errors
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
 
-def shrinkage(returns: NDArray[np.double]) -> tuple[NDArray[np.double], float, float]:
+def shrinkage(
+    returns: NDArray[np.double],
+) -> tuple[NDArray[np.double], NDArray[np.double], NDArray[np.double]]:
     """Shrinks sample covariance matrix towards constant correlation unequal variance matrix.
 
     Ledoit & Wolf ("Honey, I shrunk the sample covariance matrix", Portfolio Management, 30(2004),
@@ -24,55 +27,95 @@ def shrinkage(returns: NDArray[np.double]) -> tuple[NDArray[np.double], float, f
     Special thanks to Evgeny Pogrebnyak https://github.com/epogrebnyak
 
     :param returns:
-        t, n - returns of t observations of n shares.
+        ..., t, n - returns of t observations of n shares, leading dimensions are processed as a batch.
     :return:
-        Covariance matrix, sample average correlation, shrinkage.
+        Covariance matrix, sample average correlation, shrinkage for each element of a batch.
     """
-    t, n = returns.shape
-    mean_returns = np.mean(returns, axis=0, keepdims=True)
-    returns -= mean_returns
-    sample_cov = returns.transpose() @ returns / t
+    t, n = returns.shape[-2:]
+    diag: NDArray[np.int_] = np.arange(n, dtype=np.int_)
+    returns = returns - np.mean(returns, axis=-2, keepdims=True)
+    returns_t = returns.swapaxes(-1, -2)
+    sample_cov = returns_t @ returns / t
 
     # sample average correlation
-    variance = np.diag(sample_cov).reshape(-1, 1)
+    variance = np.diagonal(sample_cov, axis1=-2, axis2=-1)[..., np.newaxis]
     sqrt_var = variance**0.5
-    unit_cor_var = sqrt_var * sqrt_var.transpose()
-    average_cor = ((sample_cov / unit_cor_var).sum() - n) / n / (n - 1)
-    prior = average_cor * unit_cor_var
-    np.fill_diagonal(prior, variance)
+    unit_cor_var = sqrt_var * sqrt_var.swapaxes(-1, -2)
+    average_cor = ((sample_cov / unit_cor_var).sum(axis=(-2, -1)) - n) / n / (n - 1)
+    prior = average_cor[..., np.newaxis, np.newaxis] * unit_cor_var
+    prior[..., diag, diag] = variance[..., 0]
 
     # pi-hat
     y = returns**2
-    phi_mat = (y.transpose() @ y) / t - sample_cov**2
-    phi = phi_mat.sum()
+    phi_mat = (y.swapaxes(-1, -2) @ y) / t - sample_cov**2
+    phi = phi_mat.sum(axis=(-2, -1))
 
     # rho-hat
-    theta_mat = ((returns**3).transpose() @ returns) / t - variance * sample_cov
-    np.fill_diagonal(theta_mat, 0)
-    rho = np.diag(phi_mat).sum() + average_cor * (1 / sqrt_var @ sqrt_var.transpose() * theta_mat).sum()
+    theta_mat = ((returns**3).swapaxes(-1, -2) @ returns) / t - variance * sample_cov
+    theta_mat[..., diag, diag] = 0
+    rho = np.diagonal(phi_mat, axis1=-2, axis2=-1).sum(axis=-1) + average_cor * (
+        1 / sqrt_var @ sqrt_var.swapaxes(-1, -2) * theta_mat
+    ).sum(axis=(-2, -1))
 
     # gamma-hat
-    gamma = np.linalg.norm(sample_cov - prior, "fro") ** 2  # pyright: ignore[reportUnknownVariableType]
+    gamma = ((sample_cov - prior) ** 2).sum(axis=(-2, -1))
 
     # shrinkage constant
-    kappa = (phi - rho) / gamma  # pyright: ignore[reportUnknownVariableType]
-    shrink = max(0, min(1, kappa / t))  # pyright: ignore[reportUnknownArgumentType]
+    kappa = (phi - rho) / gamma
+    shrink = np.clip(kappa / t, 0, 1)
 
     # estimator
-    sigma = shrink * prior + (1 - shrink) * sample_cov
+    sigma = shrink[..., np.newaxis, np.newaxis] * prior + (1 - shrink[..., np.newaxis, np.newaxis]) * sample_cov
 
     return sigma, average_cor, shrink
 
 
 def ledoit_wolf_cor(
     tot_ret: NDArray[np.double],
-) -> tuple[NDArray[np.double], float, float]:
-    tot_ret = tot_ret.T
-    centered = tot_ret - tot_ret.mean(axis=0)
-    std = tot_ret.std(axis=0, ddof=0)
+) -> tuple[NDArray[np.double], NDArray[np.double], NDArray[np.double]]:
+    """Корреляционная матрица для доходностей размера ..., n, t - ведущие размерности обрабатываются батчем."""
+    tot_ret = tot_ret.swapaxes(-1, -2)
+    centered = tot_ret - tot_ret.mean(axis=-2, keepdims=True)
+    std = tot_ret.std(axis=-2, ddof=0, keepdims=True)
     if std.min() == 0:
-        raise errors.DomainError(f"constant quotes for ticker {np.argmin(std)} in portfolio")
+        raise errors.DomainError(f"constant quotes for ticker {np.argmin(std) % std.shape[-1]} in portfolio")
 
-    normalized = centered / tot_ret.std(axis=0, ddof=0)
+    return shrinkage(centered / std)
 
-    return shrinkage(normalized)
+
+class CorCache:
+    """Ограниченный кэш корреляционных матриц окон доходностей.
+
+    Окно определяется днем, тикерами, длиной истории и отступом начала окна от последнего дня данных, поэтому
+    модели с одинаковой длиной истории используют одни и те же матрицы для дня.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._cache: collections.OrderedDict[tuple[domain.Day, domain.Tickers, int, int], NDArray[np.double]] = (
+            collections.OrderedDict()
+        )
+
+    def cor(
+        self,
+        day: domain.Day,
+        tickers: domain.Tickers,
+        offsets: list[int],
+        tot_ret: NDArray[np.double],
+    ) -> NDArray[np.double]:
+        """Корреляционные матрицы для окон доходностей размера k, n, t с отступами offsets."""
+        keys = [(day, tickers, tot_ret.shape[-1], offset) for offset in offsets]
+
+        if missed := [n for n, key in enumerate(keys) if key not in self._cache]:
+            for n, cor in zip(missed, ledoit_wolf_cor(tot_ret[missed])[0], strict=True):
+                self._cache[keys[n]] = cor
+
+        for key in keys:
+            self._cache.move_to_end(key)
+
+        cors = np.stack([self._cache[key] for key in keys])
+
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
+
+        return cors
@@ -0,0 +1,149 @@
+import asyncio
+import multiprocessing as mp
+from collections.abc import Callable
+from typing import TYPE_CHECKING, NamedTuple
+
+import torch
+
+from poptimizer.core import domain, fsm
+from poptimizer.evolve.models import evolve
+
+if TYPE_CHECKING:
+    from multiprocessing import pool
+
+
+class Base(NamedTuple):
+    llh: list[float]
+    train_llh: list[float]
+    warm_start: domain.UID | None = None
+    fine_tune: bool = False
+
+
+class Task(NamedTuple):
+    day: domain.Day
+    tickers: domain.Tickers
+    forecast_days: int
+    test_days: int
+    base: Base
+
+
+class Evaluated(NamedTuple):
+    model: evolve.Model
+    results: evolve.TestResults
+    log: list[str]
+
+
+type Evaluate = Callable[[evolve.Model, Task], Evaluated]
+
+
+def _init_worker(threads: int) -> None:
+    torch.set_num_threads(threads)
+
+
+def _set_result(fut: asyncio.Future[Evaluated], result: Evaluated) -> None:
+    if not fut.done():
+        fut.set_result(result)
+
+
+def _set_exception(fut: asyncio.Future[Evaluated], err: BaseException) -> None:
+    if not fut.done():
+        fut.set_exception(err)
+
+
+def _discard(fut: asyncio.Future[Evaluated]) -> None:
+    if not fut.done():
+        fut.cancel()
+    elif not fut.cancelled():
+        fut.exception()
+
+
+class Pool:
+    """Оценивает модели в пуле процессов, каждый из которых использует threads потоков.
+
+    Новые модели оцениваются по одной, так как принятие каждой зависит от предыдущей, а свободные процессы заранее
+    оценивают следующие устаревшие модели. Заранее оцененная модель используется, если к моменту ее оценки задание
+    не изменилось.
+    """
+
+    def __init__(self, workers: int, threads: int, evaluate: Evaluate) -> None:
+        self._workers = workers
+        self._threads = threads
+        self._evaluate = evaluate
+        self._pool: pool.Pool | None = None
+        self._speculative: dict[domain.UID, tuple[Task, asyncio.Future[Evaluated]]] = {}
+
+    async def evaluate(self, ctx: fsm.Ctx, model: evolve.Model, task: Task) -> Evaluated:
+        match self._speculative.pop(model.uid, None):
+            case (speculative_task, fut) if speculative_task == task:
+                ctx.info("Using speculative evaluation")
+            case speculative:
+                if speculative:
+                    _discard(speculative[1])
+
+                fut = self._submit(model, task)
+
+        await self._speculate(ctx, model.uid, task._replace(base=Base(llh=[], train_llh=[], fine_tune=True)))
+
+        try:
+            return await fut
+        except asyncio.CancelledError:
+            self.terminate()
+
+            raise
+
+    def discard(self, uid: domain.UID) -> None:
+        if speculative := self._speculative.pop(uid, None):
+            _discard(speculative[1])
+
+    def terminate(self) -> None:
+        for _, fut in self._speculative.values():
+            _discard(fut)
+
+        self._speculative.clear()
+
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    async def _speculate(self, ctx: fsm.Ctx, current: domain.UID, task: Task) -> None:
+        for uid, (speculative_task, fut) in list(self._speculative.items()):
+            if speculative_task != task:
+                _discard(fut)
+                del self._speculative[uid]
+
+        free = self._workers - 1 - sum(not fut.done() for _, fut in self._speculative.values())
+
+        for candidate in await ctx.next_models(self._workers + len(self._speculative)):
+            if free <= 0:
+                break
+
+            if (
+                candidate.uid == current
+                or candidate.uid in self._speculative
+                or candidate.day == task.day
+                or not candidate.mean
+            ):
+                continue
+
+            self._speculative[candidate.uid] = (task, self._submit(candidate, task))
+            free -= 1
+
+    def _submit(self, model: evolve.Model, task: Task) -> asyncio.Future[Evaluated]:
+        if self._pool is None:
+            self._pool = mp.get_context("spawn").Pool(
+                self._workers,
+                initializer=_init_worker,
+                initargs=(self._threads,),
+            )
+
+        loop = asyncio.get_running_loop()
+        fut: asyncio.Future[Evaluated] = loop.create_future()
+
+        self._pool.apply_async(
+            self._evaluate,
+            (model, task),
+            callback=lambda result: loop.call_soon_threadsafe(_set_result, fut, result),
+            error_callback=lambda err: loop.call_soon_threadsafe(_set_exception, fut, err),
+        )
+
+        return fut
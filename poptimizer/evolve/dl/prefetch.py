@@ -0,0 +1,76 @@
+import asyncio
+import contextlib
+from typing import NamedTuple
+
+from poptimizer.core import domain, errors, fsm
+from poptimizer.evolve.dl import builder, datasets
+from poptimizer.evolve.models import evolve
+
+
+class _Key(NamedTuple):
+    day: domain.Day
+    tickers: domain.Tickers
+    days: datasets.Days
+    batch: builder.Batch
+
+
+def _key(evolution: evolve.Evolution, batch: builder.Batch) -> _Key:
+    return _Key(
+        day=evolution.day,
+        tickers=evolution.tickers,
+        days=datasets.Days(
+            history=batch.history_days,
+            forecast=evolution.forecast_days,
+            test=int(evolution.test_days),
+        ),
+        batch=batch,
+    )
+
+
+class Prefetcher:
+    """Готовит данные следующей по очереди существующей модели, пока обучается текущая.
+
+    Хранятся данные только одной модели, и они используются, если к моменту ее оценки параметры эволюции и
+    батча не изменились.
+    """
+
+    def __init__(self, data_builder: builder.Builder) -> None:
+        self._builder = data_builder
+        self._prefetched: tuple[_Key, builder.Data] | None = None
+
+    async def build(self, ctx: fsm.Ctx, evolution: evolve.Evolution, batch: builder.Batch) -> builder.Data:
+        key = _key(evolution, batch)
+
+        match self._prefetched:
+            case (prefetched_key, data) if prefetched_key == key:
+                self._prefetched = None
+                ctx.info("Using prefetched data")
+
+                return data
+            case _:
+                self._prefetched = None
+
+        return await self._builder.build(ctx, key.day, key.tickers, key.days, key.batch)
+
+    async def prefetch(self, ctx: fsm.Ctx, evolution: evolve.Evolution, current: domain.UID) -> None:
+        candidates = [model for model in await ctx.next_models(2) if model.uid != current]
+        if not candidates:
+            return
+
+        key = _key(evolution, builder.Batch.model_validate(candidates[0].phenotype["batch"]))
+        if self._prefetched is not None and self._prefetched[0] == key:
+            return
+
+        self._prefetched = None
+
+        with contextlib.suppress(errors.POError):
+            self._prefetched = (key, await self._builder.build(ctx, key.day, key.tickers, key.days, key.batch))
+
+
+async def finish(prefetch: asyncio.Task[None], *, cancel: bool) -> None:
+    if cancel:
+        prefetch.cancel()
+
+        return
+
+    await prefetch
@@ -0,0 +1,106 @@
+import collections
+import hashlib
+import json
+from collections.abc import Awaitable, Callable
+from typing import NamedTuple
+
+from pydantic import FiniteFloat
+
+from poptimizer.core import domain, fsm
+from poptimizer.evolve.models import evolve, genetics
+
+
+def key(
+    phenotype: genetics.Phenotype,
+    day: domain.Day,
+    tickers: domain.Tickers,
+    forecast_days: int,
+    test_days: int,
+) -> str:
+    content = json.dumps(
+        [phenotype, str(day), tickers, forecast_days, test_days],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+class _Entry(NamedTuple):
+    results: evolve.TestResults
+    alfa: FiniteFloat
+    llh: FiniteFloat
+    duration: float
+    profile: evolve.Profile
+    mean: list[list[FiniteFloat]]
+    cov: list[list[FiniteFloat]]
+
+
+class ResultCache:
+    """Ограниченный кэш результатов оценки моделей.
+
+    Ключом служит хэш фенотипа, дня, тикеров, количества дней прогноза и тестирования, поэтому потомки, совпадающие
+    по фенотипу с уже оцененными моделями, и повторная оценка моделей в тот же день не требуют обучения.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self._maxsize = maxsize
+        self._cache: collections.OrderedDict[str, _Entry] = collections.OrderedDict()
+
+    async def evaluate(
+        self,
+        ctx: fsm.Ctx,
+        evolution: evolve.Evolution,
+        model: evolve.Model,
+        evaluate: Callable[[], Awaitable[evolve.TestResults]],
+    ) -> evolve.TestResults:
+        cache_key = key(
+            model.phenotype,
+            evolution.day,
+            evolution.tickers,
+            evolution.forecast_days,
+            int(evolution.test_days),
+        )
+
+        if results := self.get(cache_key, model):
+            ctx.info("Using cached results")
+
+            return results
+
+        results = await evaluate()
+
+        # Результаты последовательного теста неполные и зависят от базовой модели
+        if not results.sequential_rejected:
+            self.put(cache_key, model, results)
+
+        return results
+
+    def get(self, cache_key: str, model: evolve.Model) -> evolve.TestResults | None:
+        if (entry := self._cache.get(cache_key)) is None:
+            return None
+
+        self._cache.move_to_end(cache_key)
+
+        model.alfa = entry.alfa
+        model.llh = entry.llh
+        model.duration = entry.duration
+        model.profile = entry.profile.model_copy()
+        model.mean = entry.mean
+        model.cov = entry.cov
+
+        return entry.results.model_copy(deep=True)
+
+    def put(self, cache_key: str, model: evolve.Model, results: evolve.TestResults) -> None:
+        self._cache[cache_key] = _Entry(
+            results=results.model_copy(deep=True),
+            alfa=model.alfa,
+            llh=model.llh,
+            duration=model.duration,
+            profile=model.profile.model_copy(),
+            mean=model.mean,
+            cov=model.cov,
+        )
+        self._cache.move_to_end(cache_key)
+
+        while len(self._cache) > self._maxsize:
+            self._cache.popitem(last=False)
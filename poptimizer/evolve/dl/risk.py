@@ -1,15 +1,19 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Final
 
 import numpy as np
 import scipy  # type: ignore[reportMissingTypeStubs]
 from pydantic import BaseModel, FiniteFloat, ValidationError
 
 from poptimizer.core import consts, errors
-from poptimizer.evolve.dl import ledoit_wolf
 
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
+_MAX_ITER: Final = 10_000
+_MAX_BACKTRACKING: Final = 50
+_TOL: Final = 1e-5
+_ROUNDING: Final = 1e-12
+
 
 class Cfg(BaseModel):
     risk_tolerance: float
@@ -39,48 +43,144 @@ class OptimizationResult(BaseModel):
         )
 
 
-def optimize(  # noqa: PLR0913, PLR0917
+def optimize_days(  # noqa: PLR0913, PLR0917
     mean: NDArray[np.double],
     std: NDArray[np.double],
     labels: NDArray[np.double],
-    tot_ret: NDArray[np.double],
+    cor: NDArray[np.double],
     cfg: Cfg,
     forecast_days: int,
-) -> OptimizationResult:
+    init: NDArray[np.double] | None = None,
+) -> tuple[list[OptimizationResult], NDArray[np.double]]:
+    """Оптимизация портфелей для нескольких дней теста - дни расположены по первой оси массивов.
+
+    Оптимизация для всех дней ведется одновременно и может начинаться с весов init, например, найденных для
+    соседнего дня. Возвращаются результаты и оптимальные веса для каждого дня.
+    """
     year_multiplier = consts.YEAR_IN_TRADING_DAYS / forecast_days
 
-    mean *= year_multiplier
-    std *= year_multiplier**0.5
+    mean = mean[..., 0].astype(np.double) * year_multiplier
+    std = std.astype(np.double) * year_multiplier**0.5
+    sigma = std * cor.astype(np.double) * std.swapaxes(-1, -2)
+
+    days, tickers = mean.shape
+    if init is None:
+        init = np.full(tickers, 1 / tickers)
+
+    weights = _opt_weights(mean, sigma, cfg.risk_tolerance, np.broadcast_to(init, (days, tickers)))
+
+    results = [
+        _optimization_result(*day, year_multiplier) for day in zip(weights, mean, sigma, labels[..., 0], strict=True)
+    ]
 
-    weights, sigma = _opt_weight(mean, std, tot_ret, cfg)
-    port_variance: float = (weights.T @ sigma @ weights).item()
+    return results, weights
 
+
+def _optimization_result(
+    weights: NDArray[np.double],
+    mean: NDArray[np.double],
+    sigma: NDArray[np.double],
+    labels: NDArray[np.double],
+    year_multiplier: float,
+) -> OptimizationResult:
     try:
         return OptimizationResult(
-            ret=np.log1p((weights.T @ labels).item()) * year_multiplier,
-            avr=np.log1p(labels.mean()) * year_multiplier,
-            e_ret=(weights * mean).sum(),
-            e_std=port_variance**0.5,
+            ret=float(np.log1p(weights @ labels)) * year_multiplier,
+            avr=float(np.log1p(labels.mean())) * year_multiplier,
+            e_ret=float(weights @ mean),
+            e_std=float(weights @ sigma @ weights) ** 0.5,
             pos=int(1 / (weights**2).sum()),
-            weight_max=weights.max(),
+            weight_max=float(weights.max()),
         )
     except (ValidationError, ValueError) as err:
         raise errors.DomainError("invalid optimization result") from err
 
 
-def _opt_weight(
+def _opt_weights(
     mean: NDArray[np.double],
-    std: NDArray[np.double],
-    tot_ret: NDArray[np.double],
-    cfg: Cfg,
+    sigma: NDArray[np.double],
+    risk_tolerance: float,
+    init: NDArray[np.double],
+) -> NDArray[np.double]:
+    """Проекционный градиентный подъем на симплексе с подбором шага для каждого дня.
+
+    Целевая функция вогнута, поэтому шаг принимается при выполнении условия достаточного роста для
+    квадратичной миноранты с допуском на ошибки округления, после чего пробуется удвоенный шаг. Дни, для
+    которых выполнено условие стационарности - веса не меняются при единичном шаге, исключаются из расчетов.
+    """
+    weights = _project_to_simplex(init)
+    utility, grad = _utility_and_grad(weights, mean, sigma, risk_tolerance)
+    step = np.ones(len(weights))
+    active = np.arange(len(weights))
+
+    for _ in range(_MAX_ITER):
+        cur_weights, cur_grad, cur_utility, cur_step = weights[active], grad[active], utility[active], step[active]
+        cur_mean, cur_sigma = mean[active], sigma[active]
+        new_weights, new_utility, new_grad = cur_weights, cur_utility, cur_grad
+
+        for _ in range(_MAX_BACKTRACKING):
+            new_weights = _project_to_simplex(cur_weights + cur_step[:, np.newaxis] * cur_grad)
+            diff = new_weights - cur_weights
+            new_utility, new_grad = _utility_and_grad(new_weights, cur_mean, cur_sigma, risk_tolerance)
+
+            minorant = cur_utility + (cur_grad * diff).sum(axis=1) - (diff**2).sum(axis=1) / (2 * cur_step)
+            accepted = new_utility >= minorant - _ROUNDING * np.abs(cur_utility)
+            if accepted.all():
+                break
+
+            cur_step = np.where(accepted, cur_step, cur_step / 2)
+
+        weights[active], utility[active], grad[active], step[active] = new_weights, new_utility, new_grad, cur_step * 2
+
+        stationarity = np.abs(_project_to_simplex(new_weights + new_grad) - new_weights).max(axis=1)
+        active = active[stationarity > _TOL]
+        if not len(active):
+            break
+
+    return weights
+
+
+def _utility_and_grad(
+    weights: NDArray[np.double],
+    mean: NDArray[np.double],
+    sigma: NDArray[np.double],
+    risk_tolerance: float,
 ) -> tuple[NDArray[np.double], NDArray[np.double]]:
-    sigma = std.T * ledoit_wolf.ledoit_wolf_cor(tot_ret)[0] * std
+    sigma_weights = (sigma @ weights[..., np.newaxis])[..., 0]
+    variance = (weights * sigma_weights).sum(axis=1)
+    std = variance**0.5
+
+    utility = risk_tolerance * ((weights * mean).sum(axis=1) - variance / 2) - (1 - risk_tolerance) * std
+    grad = risk_tolerance * (mean - sigma_weights) - (1 - risk_tolerance) * sigma_weights / std[:, np.newaxis]
+
+    return utility, grad
+
+
+def _project_to_simplex(weights: NDArray[np.double]) -> NDArray[np.double]:
+    """Евклидова проекция строк на симплекс.
 
-    weights = np.ones_like(mean).flatten()
+    https://arxiv.org/abs/1309.1541
+    """
+    sorted_weights = -np.sort(-weights, axis=1)
+    cum_sum = sorted_weights.cumsum(axis=1) - 1
+    ranks = np.arange(1, weights.shape[1] + 1, dtype=np.double)
+    rho: NDArray[np.int_] = (sorted_weights - cum_sum / ranks > 0).sum(axis=1)
+    theta: NDArray[np.double] = cum_sum[np.arange(len(weights)), rho - 1] / rho
+
+    return np.maximum(weights - theta[:, np.newaxis], 0)
+
+
+def slsqp_weights(
+    mean: NDArray[np.double],
+    sigma: NDArray[np.double],
+    risk_tolerance: float,
+) -> NDArray[np.double]:
+    """Эталонное решение для одного дня с помощью SLSQP и численных градиентов - для проверки и бенчмарков."""
+    weights = np.ones_like(mean)
     weights /= weights.sum()
 
     rez = scipy.optimize.minimize(
-        _Utility(cfg.risk_tolerance, mean, sigma),
+        _Utility(risk_tolerance, mean.reshape(-1, 1), sigma),
         weights,
         bounds=[(0, None) for _ in weights],
         constraints=[
@@ -92,9 +192,7 @@ def _opt_weight(
         ],
     )
 
-    weights = rez.x / rez.x.sum()
-
-    return weights.reshape(-1, 1), sigma
+    return rez.x / rez.x.sum()
 
 
 def _weight_constraint(weights: NDArray[np.double]) -> float:
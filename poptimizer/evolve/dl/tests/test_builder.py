@@ -0,0 +1,211 @@
+from datetime import date, timedelta
+
+import pytest
+import torch
+
+from poptimizer.core import domain, errors
+from poptimizer.data.features import features, snapshot
+from poptimizer.evolve.dl import builder, datasets
+
+_MARKET_DAYS = 12
+_TICKER_FEAT = (
+    features.NumFeat.OPEN,
+    features.NumFeat.CLOSE,
+    features.NumFeat.HIGH,
+    features.NumFeat.LOW,
+    features.NumFeat.DIVIDENDS,
+    features.NumFeat.RETURNS,
+    features.NumFeat.TURNOVER,
+)
+
+
+class FakeCtx:
+    def __init__(self, feats: dict[str, features.Features], market: features.MarketFeatures) -> None:
+        self._feats = feats
+        self._market = market
+        self.loads = 0
+
+    async def get(self, t_entity, uid=None):
+        self.loads += 1
+
+        if t_entity is features.MarketFeatures:
+            return self._market
+
+        return self._feats[uid]
+
+    def warning(self, msg, *args: object) -> None: ...
+
+
+def _make_features(ticker: str, size: int) -> features.Features:
+    return features.Features(
+        uid=domain.UID(ticker),
+        numerical=[{feat: float(i + n) for n, feat in enumerate(_TICKER_FEAT)} for i in range(size)],
+        embedding={
+            features.EmbFeat.TICKER: features.EmbeddingFeatDesc(value=len(ticker) % 2, size=2),
+        },
+    )
+
+
+def _make_market() -> features.MarketFeatures:
+    market_feat = [feat for feat in features.NumFeat if feat not in _TICKER_FEAT]
+
+    return features.MarketFeatures(
+        uid=domain.UID("MarketFeatures"),
+        df=[
+            features.MarketRow(
+                day=date(2024, 1, 1) + timedelta(days=i),
+                numerical=dict.fromkeys(market_feat, float(100 * i)),
+                embedding_seq=dict.fromkeys(features.EmbSeqFeat, i % 7),
+            )
+            for i in range(_MARKET_DAYS)
+        ],
+    )
+
+
+def _make_batch(num_feats: set[features.NumFeat]) -> builder.Batch:
+    return builder.Batch(
+        size=2,
+        num_feats=builder.NumFeatures(**{feat: feat in num_feats for feat in features.NumFeat}),
+        emb_feats=builder.EmbFeatures(ticker=True, ticker_type=False, sector=False),
+        emb_seq_feats=builder.EmbSeqFeatures(week_day=False, week=True, month_day=False, month=False, year_day=False),
+        use_lag_feat=False,
+        history_days=4,
+    )
+
+
+@pytest.fixture(autouse=True)
+def snapshot_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot, "_DIR", tmp_path)
+
+    return tmp_path
+
+
+@pytest.fixture(name="ctx")
+def make_ctx():
+    tickers = {"AKRN": 12, "GAZP": 11}
+
+    return FakeCtx(
+        {domain.UID(ticker): _make_features(ticker, size) for ticker, size in tickers.items()},
+        _make_market(),
+    )
+
+
+@pytest.fixture(name="days")
+def make_days():
+    return datasets.Days(history=4, forecast=2, test=3)
+
+
+async def test_build_joins_market_features(ctx, days) -> None:
+    data, emb_size, emb_seq_size = await builder.Builder().build(
+        ctx,
+        date(2024, 1, 12),
+        (domain.Ticker("AKRN"), domain.Ticker("GAZP")),
+        days,
+        _make_batch({features.NumFeat.RETURNS, features.NumFeat.RVI}),
+    )
+
+    assert emb_size == [2]
+    assert emb_seq_size == [53]
+
+    case = data[1].train_dataset()[0]
+
+    assert torch.allclose(
+        case.num_feat,
+        torch.tensor(
+            [
+                [5, 6, 7, 8],
+                [100, 200, 300, 400],
+            ],
+            dtype=torch.float32,
+        ),
+    )
+    assert torch.equal(case.emb_feat, torch.tensor([0]))
+    assert torch.equal(case.emb_seq_feat, torch.tensor([[1, 2, 3, 4]]))
+    assert torch.allclose(case.labels, torch.tensor([9 + 10], dtype=torch.float32).exp())
+
+
+async def test_build_reuses_day_cache(ctx, days) -> None:
+    tickers = (domain.Ticker("AKRN"), domain.Ticker("GAZP"))
+    data_builder = builder.Builder()
+
+    await data_builder.build(ctx, date(2024, 1, 12), tickers, days, _make_batch({features.NumFeat.OPEN}))
+    loads = ctx.loads
+    data, _, _ = await data_builder.build(ctx, date(2024, 1, 12), tickers, days, _make_batch({features.NumFeat.LOW}))
+
+    assert ctx.loads == loads
+    assert torch.allclose(data[0].forecast_dataset()[0].num_feat, torch.tensor([[11, 12, 13, 14]], dtype=torch.float32))
+
+
+async def test_short_market_features_error(ctx, days) -> None:
+    ctx._feats[domain.UID("GAZP")] = _make_features("GAZP", _MARKET_DAYS + 1)
+
+    with pytest.raises(errors.UseCasesError, match="market features are shorter"):
+        await builder.Builder().build(
+            ctx,
+            date(2024, 1, 12),
+            (domain.Ticker("AKRN"), domain.Ticker("GAZP")),
+            days,
+            _make_batch({features.NumFeat.OPEN}),
+        )
+
+
+async def test_build_uses_saved_snapshot(ctx, days) -> None:
+    day = date(2024, 1, 12)
+    tickers = (domain.Ticker("AKRN"), domain.Ticker("GAZP"))
+    feats = [await ctx.get(features.Features, domain.UID(ticker)) for ticker in tickers]
+    snapshot.build(day, tickers, feats, await ctx.get(features.MarketFeatures)).save()
+    loads = ctx.loads
+
+    data, emb_size, _ = await builder.Builder().build(
+        ctx,
+        day,
+        tickers,
+        days,
+        _make_batch({features.NumFeat.RETURNS, features.NumFeat.RVI}),
+    )
+
+    assert ctx.loads == loads
+    assert emb_size == [2]
+    assert torch.allclose(
+        data[1].train_dataset()[0].num_feat,
+        torch.tensor([[5, 6, 7, 8], [100, 200, 300, 400]], dtype=torch.float32),
+    )
+
+
+def test_snapshot_keeps_only_last_day(ctx, snapshot_dir) -> None:
+    tickers = (domain.Ticker("AKRN"),)
+    feats = [ctx._feats[domain.UID("AKRN")]]
+
+    for day in (date(2024, 1, 11), date(2024, 1, 12)):
+        snapshot.build(day, tickers, feats, ctx._market).save()
+
+    assert [path.name for path in snapshot_dir.iterdir()] == ["2024-01-12.v1"]
+    assert snapshot.load(date(2024, 1, 11), tickers) is None
+    assert snapshot.load(date(2024, 1, 12), (domain.Ticker("GAZP"),)) is None
+    assert snapshot.load(date(2024, 1, 12), tickers) is not None
+
+
+def test_snapshot_without_features_error(ctx) -> None:
+    with pytest.raises(errors.DomainError, match="no features for snapshot"):
+        snapshot.build(date(2024, 1, 12), (), [], ctx._market)
+
+
+async def test_build_from_saved_snapshot(ctx, days) -> None:
+    day = date(2024, 1, 12)
+    tickers = (domain.Ticker("AKRN"), domain.Ticker("GAZP"))
+    batch = _make_batch({features.NumFeat.RETURNS, features.NumFeat.RVI})
+
+    with pytest.raises(errors.UseCasesError, match="features snapshot for 2024-01-12 not found"):
+        builder.Builder().build_from_snapshot(day, tickers, days, batch)
+
+    await builder.Builder().save_snapshot(ctx, day, tickers)
+    loads = ctx.loads
+    await builder.Builder().save_snapshot(ctx, day, tickers)
+    data, emb_size, _ = builder.Builder().build_from_snapshot(day, tickers, days, batch)
+
+    assert ctx.loads == loads
+    assert emb_size == [2]
+    assert torch.allclose(
+        data[1].train_dataset()[0].num_feat,
+        torch.tensor([[5, 6, 7, 8], [100, 200, 300, 400]], dtype=torch.float32),
+    )
@@ -0,0 +1,91 @@
+from datetime import date
+
+import pytest
+import torch
+
+from poptimizer.core import domain
+from poptimizer.evolve.dl import checkpoint, trainer
+
+_UID = domain.UID("model")
+_DAY = date(2025, 1, 10)
+
+
+@pytest.fixture(autouse=True)
+def checkpoint_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(checkpoint, "_DIR", tmp_path)
+
+    return tmp_path
+
+
+def test_load_saved_checkpoint():
+    ckpt = checkpoint.Checkpoint(_UID, _DAY, "tag", 10)
+    ckpt.save({"step": 20, "weight": torch.arange(3)})
+
+    state = checkpoint.Checkpoint(_UID, _DAY, "tag", 10).load()
+
+    assert state is not None
+    assert state["step"] == 20
+    assert torch.equal(state["weight"], torch.arange(3))
+
+
+def test_load_mismatched_checkpoint():
+    checkpoint.Checkpoint(_UID, _DAY, "tag", 10).save({"step": 20})
+
+    assert checkpoint.Checkpoint(_UID, date(2025, 1, 11), "tag", 10).load() is None
+    assert checkpoint.Checkpoint(_UID, _DAY, "other", 10).load() is None
+    assert checkpoint.Checkpoint(domain.UID("other"), _DAY, "tag", 10).load() is None
+
+
+def test_delete_checkpoint(checkpoint_dir):
+    ckpt = checkpoint.Checkpoint(_UID, _DAY, "tag", 10)
+    ckpt.save({"step": 20})
+
+    ckpt.delete()
+    checkpoint.delete(_UID)
+
+    assert not list(checkpoint_dir.iterdir())
+    assert ckpt.load() is None
+
+
+def test_checkpoint_is_due():
+    ckpt = checkpoint.Checkpoint(_UID, _DAY, "tag", 10)
+
+    assert [step for step in range(1, 31) if ckpt.is_due(step)] == [10, 20, 30]
+
+
+def test_restore_training():
+    ckpt = checkpoint.Checkpoint(_UID, _DAY, "tag", 10)
+    net = torch.nn.Linear(2, 1)
+    opt = torch.optim.SGD(net.parameters(), lr=0.1)
+    avg = trainer.RunningMean(2)
+    avg.append(1.0)
+    training = checkpoint.Training(net, opt, torch.optim.lr_scheduler.StepLR(opt, 1), avg)
+    ckpt.save_training(training, checkpoint.Progress([0.5], 20, 30))
+
+    restored_net = torch.nn.Linear(2, 1)
+    restored_opt = torch.optim.SGD(restored_net.parameters(), lr=0.1)
+    restored_avg = trainer.RunningMean(2)
+    restored = checkpoint.Training(
+        restored_net,
+        restored_opt,
+        torch.optim.lr_scheduler.StepLR(restored_opt, 1),
+        restored_avg,
+    )
+
+    assert ckpt.restore(restored, 31) is None
+    assert ckpt.restore(restored, 30) == ([0.5], 20, 30)
+    assert torch.equal(restored_net.weight, net.weight)
+    assert restored_avg.running_avg() == avg.running_avg()
+
+
+def test_running_mean_state():
+    avg = trainer.RunningMean(2)
+    for num in (1.0, 2.0, 3.0):
+        avg.append(num)
+
+    restored = trainer.RunningMean(2)
+    restored.load_state_dict(avg.state_dict())
+    avg.append(4.0)
+    restored.append(4.0)
+
+    assert restored.running_avg() == avg.running_avg() == 3.5
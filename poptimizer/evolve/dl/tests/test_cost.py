@@ -0,0 +1,57 @@
+import pytest
+import torch
+from torch.utils import flop_counter
+
+from poptimizer.evolve.dl import cost, trainer
+from poptimizer.evolve.dl.wave_net import wave_net
+from poptimizer.evolve.models import genotype
+
+_FLOATS_PER_PARAM_BYTES = 16
+
+
+@pytest.fixture(name="phenotype")
+def make_phenotype():
+    phenotype = genotype.Genotype().phenotype
+    phenotype["scheduler"]["epochs"] = 1
+
+    return phenotype
+
+
+def _make_net(cfg: trainer.Cfg) -> wave_net.Net:
+    return wave_net.Net(
+        cfg=cfg.net,
+        history_days=cfg.batch.history_days,
+        num_feat_count=cfg.batch.num_feat_count,
+        emb_size=[],
+        emb_seq_size=[],
+    )
+
+
+def test_flops_match_counted(phenotype):
+    cfg = trainer.Cfg.model_validate(phenotype)
+    net = _make_net(cfg)
+    num_feat = torch.randn(1, cfg.batch.num_feat_count, cfg.batch.history_days)
+    empty = torch.zeros(1, 0, dtype=torch.long)
+
+    with flop_counter.FlopCounterMode(display=False) as counter:
+        net.llh(num_feat, empty, empty.unsqueeze(2), torch.ones(1, 1, 1)).backward()
+
+    assert cost.estimate(phenotype).flops == counter.get_total_flops()
+
+
+def test_memory_counts_params(phenotype):
+    phenotype["batch"]["size"] = 0
+    net = _make_net(trainer.Cfg.model_validate(phenotype))
+
+    params = sum(param.numel() for param in net.parameters())
+
+    assert cost.estimate(phenotype).memory == _FLOATS_PER_PARAM_BYTES * params
+
+
+def test_cost_grows_with_history(phenotype):
+    short = cost.estimate(phenotype)
+    phenotype["batch"]["history_days"] *= 2
+    long = cost.estimate(phenotype)
+
+    assert long.flops > short.flops
+    assert long.memory > short.memory
@@ -1,11 +1,41 @@
 import pytest
 import torch
+from torch.utils import data
 
 from poptimizer.core import domain, errors
-from poptimizer.data.features import features
 from poptimizer.evolve.dl import data_loaders, datasets
 
 
+class _TickerTestDataSet(data.Dataset[datasets.TestBatch]):
+    """Эталонные тестовые примеры одного тикера для проверки TestDataSet."""
+
+    def __init__(self, ticker: datasets.TickerData) -> None:
+        days = ticker.days
+        self._len = days.test
+        self._start = ticker.num_feat.shape[1] - (days.history + days.forecast + days.test - 1)
+        self._history = days.history
+        self._ticker = ticker
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, n: int) -> datasets.TestBatch:
+        start = self._start + n
+        ticker = self._ticker
+
+        emb_seq_feat = ticker.emb_seq_feat[:, start : start + self._history]
+        if ticker.lag_feat is not None:
+            emb_seq_feat = torch.cat((emb_seq_feat, ticker.lag_feat), dim=0)
+
+        return datasets.TestBatch(
+            num_feat=ticker.num_feat[:, start : start + self._history],
+            emb_feat=ticker.emb_feat,
+            emb_seq_feat=emb_seq_feat,
+            labels=ticker.labels[start].reshape(-1),
+            returns=ticker.returns[start : start + self._history],
+        )
+
+
 @pytest.fixture(name="days")
 def make_days():
     return datasets.Days(
@@ -15,57 +45,41 @@ def make_days():
     )
 
 
+def _make_ticker_data(days: datasets.Days, size: int, shifts: list[int]) -> datasets.TickerData:
+    log_returns = torch.arange(size, dtype=torch.float32)
+
+    return datasets.TickerData(
+        ticker=domain.Ticker("GAZP"),
+        days=days,
+        num_feat=torch.stack([log_returns + shift for shift in shifts]) if shifts else torch.empty(0, size),
+        emb_feat=[],
+        emb_seq_feat=torch.empty(0, size, dtype=torch.long),
+        lag_feat=False,
+        labels=datasets.forward_growth(log_returns, days.forecast),
+        returns=log_returns.exp().sub(1),
+    )
+
+
 def test_no_features_error(days) -> None:
     with pytest.raises(errors.DomainError, match="no features"):
-        datasets.TickerData(
-            ticker=domain.Ticker("GAZP"),
-            days=days,
-            num_feat=[],
-            num_feat_selected=[],
-            emb_feat=[],
-            emb_seq_feat=[],
-            lag_feat=False,
-        )
+        _make_ticker_data(days, 11, [])
 
 
 def test_short_history_error(days) -> None:
     with pytest.raises(errors.TooShortHistoryError):
-        datasets.TickerData(
-            ticker=domain.Ticker("GAZP"),
-            days=days,
-            num_feat=[
-                {
-                    features.NumFeat.RETURNS: i,
-                    features.NumFeat.OPEN: i + 1,
-                    features.NumFeat.CLOSE: i + 2,
-                }
-                for i in range(9)
-            ],
-            num_feat_selected=[features.NumFeat.OPEN, features.NumFeat.CLOSE],
-            emb_feat=[],
-            emb_seq_feat=[],
-            lag_feat=False,
-        )
+        _make_ticker_data(days, 9, [1, 2])
+
+
+def test_forward_growth() -> None:
+    growth = datasets.forward_growth(torch.tensor([1, 2, 3, 4], dtype=torch.float32), 3)
+
+    assert torch.allclose(growth[:2], torch.tensor([6, 9], dtype=torch.float32).exp())
+    assert growth[2:].isnan().all()
 
 
 @pytest.fixture(name="one_ticker_data")
 def make_one_ticker_data(days):
-    return datasets.TickerData(
-        ticker=domain.Ticker("GAZP"),
-        days=days,
-        num_feat=[
-            {
-                features.NumFeat.RETURNS: float(i),
-                features.NumFeat.OPEN: float(i + 1),
-                features.NumFeat.CLOSE: float(i + 2),
-            }
-            for i in range(11)
-        ],
-        num_feat_selected=[features.NumFeat.OPEN, features.NumFeat.CLOSE],
-        emb_feat=[],
-        emb_seq_feat=[],
-        lag_feat=False,
-    )
+    return _make_ticker_data(days, 11, [1, 2])
 
 
 class TestOneTickerData:
@@ -111,12 +125,12 @@ class TestOneTickerData:
         )
 
     def test_test_dataset_size(self, one_ticker_data) -> None:
-        test_dataset = one_ticker_data.test_dataset()
+        test_dataset = _TickerTestDataSet(one_ticker_data)
 
         assert len(test_dataset) == 3
 
     def test_test_dataset_first(self, one_ticker_data) -> None:
-        case_first = one_ticker_data.test_dataset()[0]
+        case_first = _TickerTestDataSet(one_ticker_data)[0]
 
         assert torch.allclose(
             case_first.labels,
@@ -138,7 +152,7 @@ class TestOneTickerData:
         )
 
     def test_test_dataset_last(self, one_ticker_data) -> None:
-        case_last = one_ticker_data.test_dataset()[2]
+        case_last = _TickerTestDataSet(one_ticker_data)[2]
 
         assert torch.allclose(
             case_last.labels,
@@ -197,28 +211,14 @@ def test_train_data_loader(one_ticker_data) -> None:
 
 @pytest.fixture(name="second_ticker_data")
 def make_second_ticker_data(days):
-    return datasets.TickerData(
-        ticker=domain.Ticker("GAZP"),
-        days=days,
-        num_feat=[
-            {
-                features.NumFeat.RETURNS: float(i),
-                features.NumFeat.OPEN: float(i + 1),
-                features.NumFeat.CLOSE: float(i + 2),
-            }
-            for i in range(12)
-        ],
-        num_feat_selected=[features.NumFeat.CLOSE, features.NumFeat.OPEN],
-        emb_feat=[],
-        emb_seq_feat=[],
-        lag_feat=False,
-    )
+    return _make_ticker_data(days, 12, [2, 1])
 
 
 @pytest.fixture(name="test_data_loader")
 def make_test_data_loader(one_ticker_data, second_ticker_data):
     return data_loaders.test(
         [one_ticker_data, second_ticker_data],
+        1,
     )
 
 
@@ -322,3 +322,64 @@ def test_forecast_data_loader(one_ticker_data, second_ticker_data) -> None:
             dtype=torch.float32,
         ),
     )
+
+
+def test_train_dataset_match_ticker_datasets(days) -> None:
+    all_data = [_make_ticker_data(days, 11, [1, 2]), _make_ticker_data(days, 13, [3, 4])]
+    ticker_datasets = [ticker.train_dataset() for ticker in all_data]
+    dataset = datasets.TrainDataSet(all_data)
+
+    assert len(dataset) == sum(len(ticker_dataset) for ticker_dataset in ticker_datasets) == 6
+
+    batch = dataset[torch.tensor([5, 0, 2])]
+
+    for n, case in enumerate([ticker_datasets[1][3], ticker_datasets[0][0], ticker_datasets[1][0]]):
+        assert torch.equal(batch.num_feat[n], case.num_feat)
+        assert torch.equal(batch.emb_feat[n], case.emb_feat)
+        assert torch.equal(batch.emb_seq_feat[n], case.emb_seq_feat.reshape(0, days.history))
+        assert torch.equal(batch.labels[n], case.labels)
+
+
+def test_test_data_loader_days_per_batch(one_ticker_data, second_ticker_data) -> None:
+    all_data = [one_ticker_data, second_ticker_data]
+    by_day = list(data_loaders.test(all_data, 1))
+    by_two_days = list(data_loaders.test(all_data, 2))
+
+    assert len(by_two_days) == 2
+
+    for field in datasets.TestBatch._fields:
+        assert torch.equal(
+            torch.cat([getattr(batch, field) for batch in by_day]),
+            torch.cat([getattr(batch, field) for batch in by_two_days]),
+        )
+
+
+def test_train_dataset_recent_days(days) -> None:
+    all_data = [_make_ticker_data(days, 11, [1, 2]), _make_ticker_data(days, 13, [3, 4])]
+    ticker_datasets = [ticker.train_dataset() for ticker in all_data]
+    dataset = datasets.TrainDataSet(all_data, recent_days=3)
+
+    assert len(dataset) == 5
+
+    batch = dataset[torch.tensor([4, 1, 2])]
+
+    for n, case in enumerate([ticker_datasets[1][3], ticker_datasets[0][1], ticker_datasets[1][1]]):
+        assert torch.equal(batch.num_feat[n], case.num_feat)
+        assert torch.equal(batch.emb_feat[n], case.emb_feat)
+        assert torch.equal(batch.labels[n], case.labels)
+
+
+def test_test_dataset_match_ticker_datasets(one_ticker_data, second_ticker_data) -> None:
+    all_data = [one_ticker_data, second_ticker_data]
+    ticker_datasets = [_TickerTestDataSet(ticker) for ticker in all_data]
+    dataset = datasets.TestDataSet(all_data)
+
+    assert len(dataset) == 3
+
+    batch = dataset[torch.tensor([2, 0])]
+
+    for n, (day, ticker) in enumerate([(2, 0), (2, 1), (0, 0), (0, 1)]):
+        case = ticker_datasets[ticker][day]
+
+        for field in datasets.TestBatch._fields:
+            assert torch.equal(getattr(batch, field)[n].reshape(getattr(case, field).shape), getattr(case, field))
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from poptimizer.core import domain, errors
+from poptimizer.evolve.dl import ledoit_wolf
+
+_DAY = domain.Day(2024, 1, 5)
+_TICKERS = (domain.Ticker("AKRN"), domain.Ticker("GAZP"), domain.Ticker("LKOH"))
+
+
+@pytest.fixture(name="tot_ret")
+def make_tot_ret():
+    return np.random.default_rng(0).normal(size=(4, len(_TICKERS), 20))
+
+
+def test_ledoit_wolf_cor_batch(tot_ret) -> None:
+    cor, average_cor, shrink = ledoit_wolf.ledoit_wolf_cor(tot_ret)
+
+    assert cor.shape == (4, 3, 3)
+
+    for n, window in enumerate(tot_ret):
+        window_cor, window_average_cor, window_shrink = ledoit_wolf.ledoit_wolf_cor(window)
+
+        assert np.allclose(cor[n], window_cor)
+        assert np.allclose(average_cor[n], window_average_cor)
+        assert np.allclose(shrink[n], window_shrink)
+        assert np.allclose(np.diag(window_cor), 1)
+
+
+def test_ledoit_wolf_cor_constant_quotes(tot_ret) -> None:
+    tot_ret[2, 1] = 1
+
+    with pytest.raises(errors.DomainError, match="constant quotes for ticker 1"):
+        ledoit_wolf.ledoit_wolf_cor(tot_ret)
+
+
+def test_cor_cache(monkeypatch, tot_ret) -> None:
+    windows = 0
+    ledoit_wolf_cor = ledoit_wolf.ledoit_wolf_cor
+
+    def counting_cor(tot_ret: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        nonlocal windows
+        windows += len(tot_ret)
+
+        return ledoit_wolf_cor(tot_ret)
+
+    monkeypatch.setattr(ledoit_wolf, "ledoit_wolf_cor", counting_cor)
+    cache = ledoit_wolf.CorCache(3)
+
+    first = cache.cor(_DAY, _TICKERS, [10, 11], tot_ret[:2])
+    second = cache.cor(_DAY, _TICKERS, [11, 12], tot_ret[1:3])
+
+    assert windows == 3
+    assert np.allclose(first[1], second[0])
+    assert np.allclose(second, ledoit_wolf_cor(tot_ret[1:3])[0])
+
+    cache.cor(_DAY, _TICKERS, [13], tot_ret[3:])
+    cache.cor(_DAY, _TICKERS, [10], tot_ret[:1])
+
+    assert windows == 5
+    assert len(cache._cache) == 3
@@ -0,0 +1,59 @@
+from datetime import date
+
+from poptimizer.core import domain
+from poptimizer.evolve.dl import builder, prefetch
+from poptimizer.evolve.models import evolve
+
+
+class FakeBuilder:
+    def __init__(self) -> None:
+        self.builds = 0
+
+    async def build(self, ctx, day, tickers, days, batch):  # noqa: ARG002
+        self.builds += 1
+
+        return [], [], [days.history]
+
+
+class FakeCtx:
+    def __init__(self, models: list[evolve.Model]) -> None:
+        self._models = models
+
+    async def next_models(self, n: int) -> list[evolve.Model]:
+        return self._models[:n]
+
+    def info(self, msg, *args: object) -> None: ...
+
+
+def _batch(model: evolve.Model) -> builder.Batch:
+    return builder.Batch.model_validate(model.phenotype["batch"])
+
+
+async def test_prefetched_data():
+    current, following = evolve.Model(uid=domain.UID("current")), evolve.Model(uid=domain.UID("next"))
+    fake_builder = FakeBuilder()
+    prefetcher = prefetch.Prefetcher(fake_builder)
+    evolution = evolve.Evolution(uid=domain.UID("Evolution"), day=date(2025, 1, 10), tickers=(domain.Ticker("AKRN"),))
+    ctx = FakeCtx([current, following])
+
+    await prefetcher.prefetch(ctx, evolution, current.uid)
+    await prefetcher.prefetch(ctx, evolution, current.uid)
+    data = await prefetcher.build(ctx, evolution, _batch(following))
+
+    assert fake_builder.builds == 1
+    assert data[2] == [following.phenotype["batch"]["history_days"]]
+
+
+async def test_prefetched_data_outdated():
+    current, following = evolve.Model(uid=domain.UID("current")), evolve.Model(uid=domain.UID("next"))
+    fake_builder = FakeBuilder()
+    prefetcher = prefetch.Prefetcher(fake_builder)
+    evolution = evolve.Evolution(uid=domain.UID("Evolution"), day=date(2025, 1, 10), tickers=(domain.Ticker("AKRN"),))
+    ctx = FakeCtx([current, following])
+
+    await prefetcher.prefetch(ctx, evolution, current.uid)
+    evolution.test_days += 1
+    await prefetcher.build(ctx, evolution, _batch(following))
+    await prefetcher.build(ctx, evolution, _batch(following))
+
+    assert fake_builder.builds == 3
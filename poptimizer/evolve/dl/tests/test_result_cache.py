@@ -0,0 +1,67 @@
+from datetime import date
+
+from poptimizer.core import domain
+from poptimizer.evolve.dl import result_cache
+from poptimizer.evolve.models import evolve, genotype
+
+_DAY = date(2025, 1, 10)
+_TICKERS = (domain.Ticker("AKRN"), domain.Ticker("GAZP"))
+
+
+def _evaluated_model(llh: float) -> evolve.Model:
+    return evolve.Model(
+        uid=domain.UID("model"),
+        day=_DAY,
+        alfa=0.1,
+        llh=llh,
+        duration=10,
+        profile=evolve.Profile(data=1, train=8, steps_per_sec=50, test=1.5, risk=0.5),
+        mean=[[0.1], [0.2]],
+        cov=[[1, 0], [0, 1]],
+    )
+
+
+def test_key_depends_on_content():
+    phenotype = genotype.Genotype().phenotype
+    same_phenotype = dict(reversed(phenotype.items()))
+
+    cache_key = result_cache.key(phenotype, _DAY, _TICKERS, 21, 5)
+
+    assert cache_key == result_cache.key(same_phenotype, _DAY, _TICKERS, 21, 5)
+    assert cache_key != result_cache.key(phenotype, date(2025, 1, 11), _TICKERS, 21, 5)
+    assert cache_key != result_cache.key(phenotype, _DAY, _TICKERS[:1], 21, 5)
+    assert cache_key != result_cache.key(phenotype, _DAY, _TICKERS, 21, 6)
+
+
+def test_cached_results_restore_model():
+    cache = result_cache.ResultCache(2)
+    results = evolve.TestResults(llh=[1, 2], alfa=0.1, ret=0.2)
+    cache.put("key", _evaluated_model(1.5), results)
+    model = evolve.Model(uid=domain.UID("child"), day=_DAY)
+
+    cached = cache.get("key", model)
+
+    assert cached == results
+    assert cached is not results
+    assert model.llh == 1.5
+    assert model.alfa == 0.1
+    assert model.duration == 10
+    assert model.profile == evolve.Profile(data=1, train=8, steps_per_sec=50, test=1.5, risk=0.5)
+    assert model.mean == [[0.1], [0.2]]
+    assert model.cov == [[1, 0], [0, 1]]
+    assert cache.get("missing", model) is None
+
+
+def test_cache_evicts_least_recent():
+    cache = result_cache.ResultCache(2)
+    results = evolve.TestResults(llh=[1], alfa=0, ret=0)
+    model = _evaluated_model(1)
+
+    cache.put("first", model, results)
+    cache.put("second", model, results)
+    cache.get("first", model)
+    cache.put("third", model, results)
+
+    assert cache.get("first", model) is not None
+    assert cache.get("second", model) is None
+    assert cache.get("third", model) is not None
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from poptimizer.core import consts
+from poptimizer.evolve.dl import ledoit_wolf, risk
+
+_FORECAST_DAYS = 21
+_YEAR_MULTIPLIER = consts.YEAR_IN_TRADING_DAYS / _FORECAST_DAYS
+
+
+@pytest.fixture(name="market")
+def make_market():
+    rng = np.random.default_rng(0)
+    days, tickers = 3, 20
+
+    mean = rng.normal(0.01, 0.02, (days, tickers, 1))
+    std = np.abs(rng.normal(0.05, 0.01, (days, tickers, 1)))
+    labels = rng.normal(0, 0.05, (days, tickers, 1))
+    cor = ledoit_wolf.ledoit_wolf_cor(rng.normal(0, 0.02, (days, tickers, 60)))[0]
+
+    return mean, std, labels, cor
+
+
+def test_project_to_simplex() -> None:
+    weights = risk._project_to_simplex(np.array([[0.5, 0.2, -0.3], [2, 0, 0], [0.2, 0.3, 0.5]]))
+
+    assert np.allclose(weights, [[0.65, 0.35, 0], [1, 0, 0], [0.2, 0.3, 0.5]])
+
+
+@pytest.mark.parametrize("risk_tolerance", [0.1, 0.5, 0.9])
+def test_optimize_days_match_slsqp(market, risk_tolerance) -> None:
+    mean, std, labels, cor = market
+    cfg = risk.Cfg(risk_tolerance=risk_tolerance)
+
+    results, weights = risk.optimize_days(mean, std, labels, cor, cfg, _FORECAST_DAYS)
+
+    year_mean = mean[..., 0] * _YEAR_MULTIPLIER
+    year_std = std * _YEAR_MULTIPLIER**0.5
+    sigma = year_std * cor * year_std.swapaxes(-1, -2)
+    slsqp = np.stack(
+        [
+            risk.slsqp_weights(day_mean, day_sigma, risk_tolerance)
+            for day_mean, day_sigma in zip(year_mean, sigma, strict=True)
+        ],
+    )
+
+    utility, _ = risk._utility_and_grad(weights, year_mean, sigma, risk_tolerance)
+    slsqp_utility, _ = risk._utility_and_grad(slsqp, year_mean, sigma, risk_tolerance)
+
+    assert len(results) == 3
+    assert np.allclose(weights.sum(axis=1), 1)
+    assert weights.min() >= 0
+    assert (utility >= slsqp_utility - 1e-9).all()
+    assert np.allclose(weights, slsqp, atol=5e-3)
+
+
+def test_optimize_days_warm_start(market) -> None:
+    mean, std, labels, cor = market
+    cfg = risk.Cfg(risk_tolerance=0.5)
+
+    results, weights = risk.optimize_days(mean, std, labels, cor, cfg, _FORECAST_DAYS)
+    warm_results, warm_weights = risk.optimize_days(mean, std, labels, cor, cfg, _FORECAST_DAYS, weights[0])
+
+    assert np.allclose(weights, warm_weights, atol=1e-4)
+    assert [rez.pos for rez in results] == [rez.pos for rez in warm_results]
@@ -0,0 +1,18 @@
+from poptimizer.evolve.dl import datasets, trainer
+from poptimizer.evolve.dl.benchmarks import synthetic
+from poptimizer.evolve.models import genotype
+
+
+async def test_synthetic_features_build():
+    cfg = trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+    cfg.batch.history_days = 20
+    days = datasets.Days(history=20, forecast=3, test=5)
+
+    all_data, emb_size, emb_seq_size = await synthetic.build(synthetic.make_ctx(3, 40), 3, days, cfg.batch)
+
+    assert len(all_data) == 3
+    assert len(emb_size) == sum(on for _, on in cfg.batch.emb_feats)
+    assert len(emb_seq_size) == sum(on for _, on in cfg.batch.emb_seq_feats) + cfg.batch.use_lag_feat
+    for ticker_data in all_data:
+        assert ticker_data.num_feat.shape == (cfg.batch.num_feat_count, 40)
+        assert len(ticker_data.train_dataset()) > 0
@@ -1,5 +1,26 @@
-from poptimizer.evolve.dl import trainer
-from poptimizer.evolve.models import genotype
+import pickle
+from datetime import date
+
+import numpy as np
+import pytest
+import torch
+
+from poptimizer.core import domain, errors
+from poptimizer.evolve import settings
+from poptimizer.evolve.dl import builder, data_loaders, datasets, pool, trainer
+from poptimizer.evolve.dl.wave_net import wave_net
+from poptimizer.evolve.models import evolve, genotype
+
+
+class ShortHistoryBuilder:
+    async def build(self, ctx, day, tickers, days, batch):  # noqa: ARG002
+        raise errors.TooShortHistoryError(tickers[0], days.minimal_returns_days + 1)
+
+
+class FakeCtx:
+    def info(self, msg, *args: object) -> None: ...
+
+    def warning(self, msg, *args: object) -> None: ...
 
 
 def _check_keys(phenotype, cfg) -> None:
@@ -14,3 +35,142 @@ def test_cfg_match_phenotype():
     phenotype = genotype.Genotype().phenotype
     cfg = trainer.Cfg.model_validate(phenotype).model_dump()
     _check_keys(phenotype, cfg)
+
+
+def test_early_abort():
+    cfg = settings.Evolve(early_abort=settings.EarlyAbort(enabled=True, checkpoints=2, llh_margin=0.1))
+    train = trainer.Trainer(builder.Builder(), cfg)
+
+    train._check_early_abort([1.0], [1.05, 1.1])
+    train._check_early_abort([1.0], [])
+
+    with pytest.raises(errors.DomainError, match="early abort at checkpoint 2"):
+        train._check_early_abort([1.0, 0.9], [1.05, 1.1])
+
+
+def test_early_abort_disabled():
+    train = trainer.Trainer(builder.Builder(), settings.Evolve())
+
+    train._check_early_abort([1.0, 0.9], [1.05, 1.1, 1.2])
+
+
+def test_sequential_rejection_day():
+    cfg = settings.Evolve(sequential_test=settings.SequentialTest(enabled=True, min_days=5))
+    train = trainer.Trainer(builder.Builder(), cfg)
+    base_llh = [1.0] * 10
+
+    assert train._sequential_rejection_day([0.5, 0.45], [0.55, 0.5, 0.45, 0.5], base_llh) == 3
+    assert train._sequential_rejection_day([0.5, 0.45, 0.55, 0.5], [0.45], base_llh) == 1
+    assert train._sequential_rejection_day([], [1.1, 0.9, 1.05, 1.0, 0.95, 1.02], base_llh) is None
+    assert train._sequential_rejection_day([], [0.5, 0.45, 0.55], base_llh) is None
+    assert train._sequential_rejection_day([0.5] * 10, [0.55, 0.5], base_llh) is None
+
+
+def test_sequential_test_disabled():
+    train = trainer.Trainer(builder.Builder(), settings.Evolve())
+
+    assert train._sequential_rejection_day([0.5, 0.45], [0.55, 0.5, 0.45, 0.5], [1.0] * 10) is None
+
+
+def test_too_short_history_error_pickle():
+    err = pickle.loads(pickle.dumps(errors.TooShortHistoryError(domain.Ticker("AKRN"), 42)))  # noqa: S301
+
+    assert isinstance(err, errors.TooShortHistoryError)
+    assert err.minimal_returns_days == 42
+    assert str(err) == "AKRN has too short history - required 42 returns"
+
+
+def test_memory_admission():
+    cfg = trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+    unlimited = trainer.Trainer(builder.Builder(), settings.Evolve())
+    lgr = trainer._RecordingLogger()
+
+    admitted, memory = unlimited._admit(lgr, cfg, [], 1)
+
+    assert admitted == cfg
+    assert not lgr.records
+
+    budget_gb = memory.total / 2 / 2**30
+    limited = trainer.Trainer(builder.Builder(), settings.Evolve(memory=settings.Memory(budget_gb=budget_gb)))
+    admitted, reduced = limited._admit(trainer._RecordingLogger(), cfg, [], 1)
+
+    assert 0 < admitted.batch.size < cfg.batch.size
+    assert reduced.total <= budget_gb * 2**30
+
+
+def test_memory_admission_rejects():
+    cfg = trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+    train = trainer.Trainer(builder.Builder(), settings.Evolve(memory=settings.Memory(budget_gb=1e-6)))
+
+    with pytest.raises(errors.DomainError, match="exceeds budget"):
+        train._admit(trainer._RecordingLogger(), cfg, [], 1)
+
+
+async def test_leased_model_left_for_evolution():
+    model = evolve.Model(uid=domain.UID("leased"), day=date(2025, 1, 9))
+    train = trainer.Trainer(ShortHistoryBuilder(), settings.Evolve())
+    evolution = evolve.Evolution(uid=domain.UID("Evolution"), day=date(2025, 1, 10), tickers=(domain.Ticker("AKRN"),))
+    state = evolution.model_dump()
+
+    assert not await train.update_leased_model_metrics(FakeCtx(), evolution, model)
+    assert evolution.model_dump() == state
+
+
+def _make_data(cfg: trainer.Cfg, days: datasets.Days) -> list[datasets.TickerData]:
+    generator = torch.Generator().manual_seed(0)
+    length = days.minimal_returns_days + 5
+
+    return [
+        datasets.TickerData(
+            ticker=domain.Ticker(ticker),
+            days=days,
+            num_feat=torch.randn(cfg.batch.num_feat_count, length, generator=generator),
+            emb_feat=[n],
+            emb_seq_feat=torch.randint(0, 5, (1, length), generator=generator),
+            lag_feat=False,
+            labels=torch.rand(length, generator=generator) + 0.5,
+            returns=torch.randn(length, generator=generator) * 0.02,
+        )
+        for n, ticker in enumerate(("AKRN", "GAZP"))
+    ]
+
+
+def test_sequential_rejection_on_last_day_of_batch(monkeypatch):
+    monkeypatch.setattr(trainer, "_TEST_BATCH_MULTIPLIER", 1)
+    cfg = trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+    cfg.batch.size = 1
+    cfg.batch.history_days = 20
+    days = datasets.Days(history=20, forecast=3, test=7)
+    data = _make_data(cfg, days)
+    torch.manual_seed(0)
+    net = wave_net.Net(cfg.net, days.history, cfg.batch.num_feat_count, [2], [5])
+    train = trainer.Trainer(builder.Builder(), settings.Evolve(sequential_test=settings.SequentialTest(enabled=True)))
+    base = pool.Base(llh=[100.0 + n for n in range(days.test)], train_llh=[])
+    job = trainer._Job(
+        evolve.Model(uid=domain.UID("model")),
+        pool.Task(date(2025, 1, 10), (domain.Ticker("AKRN"), domain.Ticker("GAZP")), days.forecast, days.test, base),
+        builder.Data(data, [2], [5]),
+    )
+
+    results = train._test(trainer._RecordingLogger(), net, cfg, job)
+
+    assert results.sequential_rejected
+    assert len(results.llh) == settings.SequentialTest().min_days
+
+
+def test_sliding_test_batch_matches_windows():
+    cfg = trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+    days = datasets.Days(history=20, forecast=3, test=7)
+    data = _make_data(cfg, days)
+    torch.manual_seed(0)
+    net = wave_net.Net(cfg.net, days.history, cfg.batch.num_feat_count, [2], [5]).eval()
+    train = trainer.Trainer(builder.Builder(), settings.Evolve())
+
+    with torch.inference_mode():
+        for batch in data_loaders.test(data, 3):
+            llh, mean, std = train._test_batch(net, batch, len(data), sliding=False)
+            sliding_llh, sliding_mean, sliding_std = train._test_batch(net, batch, len(data), sliding=True)
+
+            torch.testing.assert_close(sliding_llh, llh)
+            np.testing.assert_allclose(sliding_mean, mean, rtol=1e-5)
+            np.testing.assert_allclose(sliding_std, std, rtol=1e-5)
@@ -0,0 +1,129 @@
+import pytest
+import torch
+
+from poptimizer.evolve.dl import trainer
+from poptimizer.evolve.dl.wave_net import wave_net
+from poptimizer.evolve.models import genotype
+
+_BATCH = 16
+
+
+@pytest.fixture(name="cfg")
+def make_cfg():
+    return trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+
+
+def _make_net(cfg: trainer.Cfg, *, fused: bool) -> wave_net.Net:
+    torch.manual_seed(0)
+
+    return wave_net.Net(
+        cfg=cfg.net,
+        history_days=cfg.batch.history_days,
+        num_feat_count=cfg.batch.num_feat_count,
+        emb_size=[3],
+        emb_seq_size=[5],
+        fused=fused,
+    )
+
+
+def _make_batch(cfg: trainer.Cfg) -> tuple[torch.Tensor, ...]:
+    generator = torch.Generator().manual_seed(1)
+    days = cfg.batch.history_days
+
+    return (
+        torch.randn(_BATCH, cfg.batch.num_feat_count, days, generator=generator),
+        torch.randint(0, 3, (_BATCH, 1), generator=generator),
+        torch.randint(0, 5, (_BATCH, 1, days), generator=generator),
+        torch.rand(_BATCH, 1, generator=generator) + 0.5,
+    )
+
+
+def _llh_and_grads(net: wave_net.Net, batch: tuple[torch.Tensor, ...]) -> tuple[torch.Tensor, list[torch.Tensor]]:
+    llh = net.llh(*batch)
+    llh.backward()
+
+    return llh.detach(), [param.grad for param in net.parameters() if param.grad is not None]
+
+
+def test_fused_net_matches_eager(cfg):
+    batch = _make_batch(cfg)
+    eager = _make_net(cfg, fused=False)
+    fused = _make_net(cfg, fused=True)
+
+    assert eager.state_dict().keys() == fused.state_dict().keys()
+
+    eager_llh, eager_grads = _llh_and_grads(eager, batch)
+    fused_llh, fused_grads = _llh_and_grads(fused, batch)
+
+    torch.testing.assert_close(fused_llh, eager_llh)
+    assert len(fused_grads) == len(eager_grads)
+    for fused_grad, eager_grad in zip(fused_grads, eager_grads, strict=True):
+        torch.testing.assert_close(fused_grad, eager_grad, rtol=1e-4, atol=1e-5)
+
+
+def test_mixture_log_prob_matches_distribution(cfg):
+    batch = _make_batch(cfg)
+    net = _make_net(cfg, fused=False)
+
+    dist = net(*batch[:3])
+    end = net._backbone(net._input(*batch[:3]))
+
+    torch.testing.assert_close(net._head.mixture(end).log_prob(batch[3]), dist.log_prob(batch[3]))
+
+
+def test_compiled_backbone_matches_eager(cfg):
+    batch = _make_batch(cfg)
+    eager = _make_net(cfg, fused=True)
+    compiled = _make_net(cfg, fused=True)
+    compiled.compile_backbone("eager")
+
+    torch.testing.assert_close(compiled.llh(*batch), eager.llh(*batch))
+
+
+def test_bfloat16_autocast_keeps_mixture_in_float32(cfg):
+    batch = _make_batch(cfg)
+    net = _make_net(cfg, fused=False)
+    llh = net.llh(*batch)
+
+    with torch.autocast("cpu", dtype=torch.bfloat16):
+        end = net._backbone(net._input(*batch[:3]))
+        mixture = net._head.mixture(end)
+        bf16_llh = net.llh(*batch)
+
+    assert end.dtype == torch.bfloat16
+    assert mixture.loc.dtype == mixture.scale.dtype == mixture.logits.dtype == torch.float32
+    assert bf16_llh.dtype == torch.float32
+    torch.testing.assert_close(bf16_llh, llh, rtol=0.05, atol=0.05)
+
+
+@pytest.mark.parametrize("fused", [False, True])
+@pytest.mark.parametrize(("history_days", "sub_blocks", "kernels"), [(17, 1, 2), (32, 2, 3), (60, 1, 5)])
+def test_sliding_matches_windows(cfg, fused, history_days, sub_blocks, kernels):
+    cfg.batch.history_days = history_days
+    cfg.net.sub_blocks = sub_blocks
+    cfg.net.kernels = kernels
+    net = _make_net(cfg, fused=fused).eval()
+    generator = torch.Generator().manual_seed(2)
+    windows = 9
+    days = history_days + windows - 1
+
+    num_feat = torch.randn(2, cfg.batch.num_feat_count, days, generator=generator)
+    emb_feat = torch.randint(0, 3, (2, 1), generator=generator)
+    emb_seq_feat = torch.randint(0, 5, (2, 1, days), generator=generator)
+    labels = torch.rand(2, windows, generator=generator) + 0.5
+
+    with torch.inference_mode():
+        llh, mean, std = net.sliding_llh_and_forecast_mean_and_std(num_feat, emb_feat, emb_seq_feat, labels)
+
+    for n in range(windows):
+        with torch.inference_mode():
+            window_llh, window_mean, window_std = net.llh_and_forecast_mean_and_std(
+                num_feat[:, :, n : n + history_days],
+                emb_feat,
+                emb_seq_feat[:, :, n : n + history_days],
+                labels[:, n : n + 1],
+            )
+
+        torch.testing.assert_close(llh[:, n], window_llh[:, 0])
+        torch.testing.assert_close(mean[:, n], window_mean[:, 0])
+        torch.testing.assert_close(std[:, n], window_std[:, 0])
@@ -0,0 +1,83 @@
+import pytest
+import torch
+
+from poptimizer.core import domain
+from poptimizer.evolve.dl import trainer, weights
+from poptimizer.evolve.dl.wave_net import wave_net
+from poptimizer.evolve.models import genotype
+
+_UID = domain.UID("parent")
+
+
+@pytest.fixture(autouse=True)
+def weights_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(weights, "_DIR", tmp_path)
+
+    return tmp_path
+
+
+@pytest.fixture(name="cfg")
+def make_cfg():
+    return trainer.Cfg.model_validate(genotype.Genotype().phenotype)
+
+
+def _make_net_and_arch(cfg: trainer.Cfg, emb_size: list[int]) -> tuple[wave_net.Net, weights.Arch]:
+    net = wave_net.Net(
+        cfg=cfg.net,
+        history_days=cfg.batch.history_days,
+        num_feat_count=cfg.batch.num_feat_count,
+        emb_size=emb_size,
+        emb_seq_size=[3],
+    )
+    arch = weights.Arch(
+        net=cfg.net,
+        num_feats=cfg.batch.num_feats,
+        emb_feats=cfg.batch.emb_feats,
+        emb_seq_feats=cfg.batch.emb_seq_feats,
+        use_lag_feat=cfg.batch.use_lag_feat,
+        history_days=cfg.batch.history_days,
+        emb_size=emb_size,
+        emb_seq_size=[3],
+    )
+
+    return net, arch
+
+
+def test_load_saved_weights(cfg):
+    parent, arch = _make_net_and_arch(cfg, [4])
+    weights.save(_UID, arch, parent.state_dict())
+
+    torch.manual_seed(1)
+    child, _ = _make_net_and_arch(cfg, [4])
+
+    assert weights.load(_UID, arch, child)
+    for (name, saved), (child_name, loaded) in zip(
+        parent.state_dict().items(),
+        child.state_dict().items(),
+        strict=True,
+    ):
+        assert name == child_name
+        assert torch.equal(saved, loaded)
+
+
+def test_load_incompatible_weights(cfg):
+    parent, arch = _make_net_and_arch(cfg, [4])
+    weights.save(_UID, arch, parent.state_dict())
+
+    child, child_arch = _make_net_and_arch(cfg, [5])
+    state = {name: tensor.clone() for name, tensor in child.state_dict().items()}
+
+    assert not weights.load(_UID, child_arch, child)
+    assert not weights.load(domain.UID("missing"), arch, child)
+    assert all(torch.equal(state[name], tensor) for name, tensor in child.state_dict().items())
+
+
+def test_delete_weights(cfg, weights_dir):
+    net, arch = _make_net_and_arch(cfg, [4])
+    weights.save(_UID, arch, net.state_dict())
+
+    weights.delete(_UID)
+    weights.delete(_UID)
+
+    assert not list(weights_dir.iterdir())
+    assert not weights.load(_UID, arch, net)
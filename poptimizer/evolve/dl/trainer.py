@@ -1,20 +1,50 @@
 import asyncio
 import collections
+import functools
 import itertools
+import os
+import resource
 import statistics
+import sys
+import time
 from datetime import datetime
-from typing import Literal, cast
+from typing import TYPE_CHECKING, Any, Final, Literal, NamedTuple, Protocol, cast
 
+import numpy as np
 import torch
 import tqdm
 from pydantic import BaseModel
 from torch import optim
 
-from poptimizer.core import consts, errors, fsm
-from poptimizer.evolve.dl import builder, data_loaders, datasets, ledoit_wolf, risk
+from poptimizer.core import consts, domain, errors, fsm
+from poptimizer.evolve import settings
+from poptimizer.evolve.dl import (
+    builder,
+    checkpoint,
+    cost,
+    data_loaders,
+    datasets,
+    ledoit_wolf,
+    pool,
+    prefetch,
+    result_cache,
+    risk,
+    weights,
+)
 from poptimizer.evolve.dl.wave_net import backbone, wave_net
 from poptimizer.evolve.models import evolve
 
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+# Без градиентов активации сети не сохраняются, поэтому тестовый батч может быть во много раз больше обучающего
+_TEST_BATCH_MULTIPLIER: Final = 32
+# Корреляционные матрицы окон тестовых дней для нескольких длин истории
+_COR_CACHE_SIZE: Final = 256
+_AUTOCAST_DEVICES: Final = frozenset({"cpu", "cuda"})
+_BYTES_IN_MB: Final = 2**20
+_BYTES_IN_GB: Final = 2**30
+
 
 class Optimizer(BaseModel):
     lr: float
@@ -59,6 +89,13 @@ class RunningMean:
     def running_avg(self) -> float:
         return self._sum / len(self._que)
 
+    def state_dict(self) -> dict[str, Any]:
+        return {"sum": self._sum, "que": list(self._que)}
+
+    def load_state_dict(self, state: dict[str, Any]) -> None:
+        self._sum = state["sum"]
+        self._que = collections.deque(state["que"], maxlen=self._que.maxlen)
+
 
 def _get_device() -> Literal["cpu", "cuda", "mps"]:
     if torch.cuda.is_available():
@@ -70,11 +107,82 @@ def _get_device() -> Literal["cpu", "cuda", "mps"]:
     return "cpu"
 
 
+class _Logger(Protocol):
+    def info(self, msg: str, *args: Any) -> None: ...
+
+
+class _RecordingLogger:
+    def __init__(self) -> None:
+        self.records: list[str] = []
+
+    def info(self, msg: str, *args: Any) -> None:
+        self.records.append(msg % args if args else msg)
+
+
+class _Job(NamedTuple):
+    model: evolve.Model
+    task: pool.Task
+    data: builder.Data
+
+
+class _Run(NamedTuple):
+    optimizer: Optimizer
+    scheduler: Scheduler
+    batch_size: int
+    base_train_llh: list[float]
+    recent_days: int | None = None
+
+
+def _task(evolution: evolve.Evolution, base: pool.Base) -> pool.Task:
+    return pool.Task(evolution.day, evolution.tickers, evolution.forecast_days, int(evolution.test_days), base)
+
+
+def _peak_rss() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # На macOS размер в байтах, а на Linux - в килобайтах
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@functools.cache
+def _worker_trainer(cfg_json: str) -> Trainer:
+    cfg = settings.Evolve.model_validate_json(cfg_json).model_copy(update={"pool": settings.Pool()})
+
+    return Trainer(builder.Builder(), cfg, progress=False)
+
+
+def _evaluate_in_worker(cfg_json: str, model: evolve.Model, task: pool.Task) -> pool.Evaluated:
+    return _worker_trainer(cfg_json).evaluate_in_worker(model, task)
+
+
 class Trainer:
-    def __init__(self, builder: builder.Builder) -> None:
+    def __init__(self, builder: builder.Builder, cfg: settings.Evolve, *, progress: bool = True) -> None:
         self._builder = builder
+        self._progress = progress
+        self._early_abort = cfg.early_abort
+        self._sequential_test = cfg.sequential_test
+        self._warm_start = cfg.warm_start
+        self._fine_tune = cfg.fine_tune
+        self._checkpoint = cfg.checkpoint
+        self._memory_budget = None if cfg.memory.budget_gb is None else cfg.memory.budget_gb * _BYTES_IN_GB
         self._device = _get_device()
         self._stopping = False
+        self._cor_cache = ledoit_wolf.CorCache(_COR_CACHE_SIZE)
+        self._pool: pool.Pool | None = None
+        if cfg.pool.workers > 1:
+            self._pool = pool.Pool(
+                cfg.pool.workers,
+                cfg.pool.threads or max(1, (os.cpu_count() or 1) // cfg.pool.workers),
+                functools.partial(_evaluate_in_worker, cfg.model_dump_json()),
+            )
+        self._prefetch = cfg.prefetch.enabled
+        self._prefetcher = prefetch.Prefetcher(builder)
+        self._compiled = cfg.compiled
+        self._bfloat16 = cfg.precision.bfloat16 and self._device in _AUTOCAST_DEVICES
+        self._sliding_test = cfg.sliding_test.enabled
+        self._result_cache: result_cache.ResultCache | None = None
+        if cfg.result_cache.enabled:
+            self._result_cache = result_cache.ResultCache(cfg.result_cache.size)
 
     async def update_model_metrics(
         self,
@@ -83,7 +191,8 @@ class Trainer:
         model: evolve.Model,
     ) -> evolve.TestResults | None:
         prefix = ""
-        if model.day != evolution.day:
+        outdated = model.day != evolution.day
+        if outdated:
             prefix = "outdated "
 
         new = not model.mean
@@ -103,20 +212,106 @@ class Trainer:
         evolution.step += 1
         model.day = evolution.day
 
+        base = pool.Base(llh=[], train_llh=[], fine_tune=outdated)
+        if new:
+            base = pool.Base(llh=evolution.llh, train_llh=evolution.train_llh, warm_start=model.parent)
+
         retry = True
 
         while retry:
             try:
-                return await self._evaluate_in_thread(ctx, evolution, model)
+                return await self._evaluate_cached(ctx, evolution, model, base)
             except* errors.POError as err:
                 root_error = errors.get_root_poptimizer_error(err)
                 if new or not self._retry_root_error(ctx, evolution, root_error):
                     await ctx.delete(model)
+                    self.delete_saved_state(model.uid)
                     ctx.info(f"{model} deleted with {root_error!r}")
                     retry = False
 
         return None
 
+    async def update_leased_model_metrics(
+        self,
+        ctx: fsm.Ctx,
+        evolution: evolve.Evolution,
+        model: evolve.Model,
+    ) -> bool:
+        """Переоценивает арендованную устаревшую модель, не меняя состояние эволюции.
+
+        Если для оценки нужно изменить параметры эволюции, возвращается False, чтобы модель оценил основной процесс.
+        """
+        ctx.info("Day %s leased %s", evolution.day, model)
+        model.day = evolution.day
+        root_error: errors.POError | None = None
+
+        try:
+            await self._evaluate_cached(ctx, evolution, model, pool.Base(llh=[], train_llh=[], fine_tune=True))
+        except* errors.POError as err:
+            root_error = errors.get_root_poptimizer_error(err)
+
+        match root_error:
+            case None:
+                return True
+            case errors.TooShortHistoryError():
+                ctx.warning("%s requires evolution update - %r", model, root_error)
+
+                return False
+            case _:
+                await ctx.delete(model)
+                self.delete_saved_state(model.uid)
+                ctx.info(f"{model} deleted with {root_error!r}")
+
+                return True
+
+    def delete_saved_state(self, uid: domain.UID) -> None:
+        if self._pool is not None:
+            self._pool.discard(uid)
+
+        weights.delete(uid)
+        checkpoint.delete(uid)
+
+    def evaluate_in_worker(self, model: evolve.Model, task: pool.Task) -> pool.Evaluated:
+        """Оценивает модель в процессе пула на данных из снимка признаков и возвращает записи лога."""
+        batch = Cfg.model_validate(model.phenotype).batch
+        days = datasets.Days(history=batch.history_days, forecast=task.forecast_days, test=task.test_days)
+        model.day = task.day
+
+        start = time.perf_counter()
+        data = self._builder.build_from_snapshot(task.day, task.tickers, days, batch)
+        model.profile = evolve.Profile(data=time.perf_counter() - start)
+
+        lgr = _RecordingLogger()
+        results = self._evaluate(lgr, _Job(model, task, data))
+
+        return pool.Evaluated(model=model, results=results, log=lgr.records)
+
+    async def _evaluate_cached(
+        self,
+        ctx: fsm.Ctx,
+        evolution: evolve.Evolution,
+        model: evolve.Model,
+        base: pool.Base,
+    ) -> evolve.TestResults:
+        evaluate = functools.partial(self._evaluate_once, ctx, evolution, model, base)
+
+        if self._result_cache is None:
+            return await evaluate()
+
+        return await self._result_cache.evaluate(ctx, evolution, model, evaluate)
+
+    async def _evaluate_once(
+        self,
+        ctx: fsm.Ctx,
+        evolution: evolve.Evolution,
+        model: evolve.Model,
+        base: pool.Base,
+    ) -> evolve.TestResults:
+        if self._pool is not None:
+            return await self._evaluate_in_pool(ctx, self._pool, evolution, model, base)
+
+        return await self._evaluate_in_thread(ctx, evolution, model, base)
+
     def _retry_root_error(
         self,
         ctx: fsm.Ctx,
@@ -138,77 +333,203 @@ class Trainer:
 
         return True
 
-    async def _evaluate_in_thread(
+    async def _evaluate_in_pool(
         self,
         ctx: fsm.Ctx,
+        workers: pool.Pool,
         evolution: evolve.Evolution,
         model: evolve.Model,
+        base: pool.Base,
     ) -> evolve.TestResults:
-        cfg = Cfg.model_validate(model.phenotype)
-        days = datasets.Days(
-            history=cfg.batch.history_days,
-            forecast=evolution.forecast_days,
-            test=int(evolution.test_days),
-        )
+        await self._builder.save_snapshot(ctx, evolution.day, evolution.tickers)
+        evaluated = await workers.evaluate(ctx, model, _task(evolution, base))
 
-        data, emb_size, emb_seq_size = await self._builder.build(
-            ctx,
-            evolution.day,
-            evolution.tickers,
-            days,
-            cfg.batch,
-        )
+        for record in evaluated.log:
+            ctx.info(record)
 
-        try:
-            return await asyncio.to_thread(
-                self._evaluate,
-                ctx,
-                model,
-                data,
-                emb_size,
-                emb_seq_size,
-                cfg,
-                evolution.forecast_days,
-            )
-        except asyncio.CancelledError:
-            self._stopping = True
+        model.mean = evaluated.model.mean
+        model.cov = evaluated.model.cov
+        model.alfa = evaluated.model.alfa
+        model.llh = evaluated.model.llh
+        model.duration = evaluated.model.duration
+        model.profile = evaluated.model.profile
 
-            raise
+        return evaluated.results
 
-    def _evaluate(  # noqa: PLR0913, PLR0917
+    async def _evaluate_in_thread(
         self,
         ctx: fsm.Ctx,
+        evolution: evolve.Evolution,
         model: evolve.Model,
-        data: list[datasets.TickerData],
-        emb_size: list[int],
-        emb_seq_size: list[int],
-        cfg: Cfg,
-        forecast_days: int,
+        base: pool.Base,
     ) -> evolve.TestResults:
-        net = self._prepare_net(cfg, emb_size, emb_seq_size)
+        start = time.perf_counter()
+        data = await self._prefetcher.build(ctx, evolution, Cfg.model_validate(model.phenotype).batch)
+        model.profile = evolve.Profile(data=time.perf_counter() - start)
+
+        prefetch_task: asyncio.Task[None] | None = None
+        if self._prefetch:
+            prefetch_task = asyncio.create_task(self._prefetcher.prefetch(ctx, evolution, model.uid))
+
+        try:
+            return await asyncio.to_thread(self._evaluate, ctx, _Job(model, _task(evolution, base), data))
+        except asyncio.CancelledError:
+            self._stopping = True
 
+            raise
+        finally:
+            if prefetch_task is not None:
+                await prefetch.finish(prefetch_task, cancel=self._stopping)
+
+    def _evaluate(self, ctx: _Logger, job: _Job) -> evolve.TestResults:
+        model, base = job.model, job.task.base
+        data, emb_size, emb_seq_size = job.data
+        profile = model.profile
+        init_start = time.perf_counter()
+        cfg, memory = self._admit(ctx, Cfg.model_validate(model.phenotype), data, len(emb_seq_size))
+        net = self._prepare_net(cfg, emb_size, emb_seq_size)
+        arch = weights.Arch(
+            net=cfg.net,
+            num_feats=cfg.batch.num_feats,
+            emb_feats=cfg.batch.emb_feats,
+            emb_seq_feats=cfg.batch.emb_seq_feats,
+            use_lag_feat=cfg.batch.use_lag_feat,
+            history_days=cfg.batch.history_days,
+            emb_size=emb_size,
+            emb_seq_size=emb_seq_size,
+        )
+        profile.net_init = time.perf_counter() - init_start
         start = datetime.now()
-        self._train(ctx, net, cfg.optimizer, cfg.scheduler, data, cfg.batch.size)
 
-        test_results = self._test(ctx, net, cfg, forecast_days, data)
+        if base.fine_tune and self._fine_tune.enabled and weights.load(model.uid, arch, net):
+            ctx.info("Fine-tuning on last %d days", self._fine_tune.recent_days)
+            scheduler = cfg.scheduler.model_copy(
+                update={
+                    "epochs": self._fine_tune.epochs,
+                    "max_lr": cfg.scheduler.max_lr * self._fine_tune.lr_scale,
+                },
+            )
+            run = _Run(cfg.optimizer, scheduler, cfg.batch.size, [], self._fine_tune.recent_days)
+            self._train(ctx, net, job, run, self._make_checkpoint(model, arch, run))
+            # Траектория дообучения несопоставима с полным обучением и не годится для досрочной остановки
+            train_llh: list[float] = []
+        else:
+            scheduler = self._warm_start_scheduler(ctx, net, arch, cfg.scheduler, base.warm_start)
+            run = _Run(cfg.optimizer, scheduler, cfg.batch.size, base.train_llh)
+            train_llh = self._train(ctx, net, job, run, self._make_checkpoint(model, arch, run))
+
+        test_start = time.perf_counter()
+        test_results = self._test(ctx, net, cfg, job)
+        test_results.train_llh = train_llh
+        profile.test = time.perf_counter() - test_start
+
+        forecast_start = time.perf_counter()
+        model.mean, model.cov = self._forecast(net, job)
+        profile.forecast = time.perf_counter() - forecast_start
 
-        model.mean, model.cov = self._forecast(net, forecast_days, data)
         model.alfa = test_results.alfa
         model.llh = statistics.mean(test_results.llh)
         model.duration = (datetime.now() - start).total_seconds()
+        profile.peak_rss = _peak_rss()
+        ctx.info(
+            "Phases - data %.1fs / init %.1fs / train %.1fs at %.1f steps/sec / test %.1fs with risk %.1fs / "
+            "forecast %.1fs",
+            profile.data,
+            profile.net_init,
+            profile.train,
+            profile.steps_per_sec,
+            profile.test,
+            profile.risk,
+            profile.forecast,
+        )
+        ctx.info(
+            "Memory estimate / process peak RSS - %.0f / %.0f MB",
+            memory.total / _BYTES_IN_MB,
+            profile.peak_rss / _BYTES_IN_MB,
+        )
+
+        if (self._warm_start.enabled or self._fine_tune.enabled) and not self._stopping:
+            weights.save(model.uid, arch, net.state_dict())
 
         return test_results
 
-    def _train(  # noqa: PLR0913, PLR0917
+    def _admit(
         self,
-        ctx: fsm.Ctx,
+        ctx: _Logger,
+        cfg: Cfg,
+        data: list[datasets.TickerData],
+        emb_seq_count: int,
+    ) -> tuple[Cfg, cost.Memory]:
+        """Уменьшает размер батча, если оценка пиковой памяти превышает бюджет."""
+        data_bytes = sum(ticker.nbytes for ticker in data)
+        memory = cost.memory(cfg.model_dump(), data_bytes, emb_seq_count, _TEST_BATCH_MULTIPLIER)
+
+        if self._memory_budget is None or memory.total <= self._memory_budget:
+            return cfg, memory
+
+        empty = cost.memory(
+            cfg.model_copy(update={"batch": cfg.batch.model_copy(update={"size": 0})}).model_dump(),
+            data_bytes,
+            emb_seq_count,
+            _TEST_BATCH_MULTIPLIER,
+        )
+        per_sample = (memory.total - empty.total) / cfg.batch.size
+        size = int((self._memory_budget - empty.total) / per_sample)
+
+        if size < 1:
+            raise errors.DomainError(f"memory estimate {memory.total / _BYTES_IN_MB:.0f} MB exceeds budget")
+
+        ctx.info(
+            "Batch size reduced %d -> %d - memory estimate %.0f MB exceeds budget",
+            cfg.batch.size,
+            size,
+            memory.total / _BYTES_IN_MB,
+        )
+        cfg = cfg.model_copy(update={"batch": cfg.batch.model_copy(update={"size": size})})
+
+        return cfg, cost.memory(cfg.model_dump(), data_bytes, emb_seq_count, _TEST_BATCH_MULTIPLIER)
+
+    def _make_checkpoint(self, model: evolve.Model, arch: weights.Arch, run: _Run) -> checkpoint.Checkpoint | None:
+        if not self._checkpoint.enabled:
+            return None
+
+        tag = f"{arch.model_dump_json()}/{run.scheduler.model_dump_json()}/{run.batch_size}/{run.recent_days}"
+
+        return checkpoint.Checkpoint(model.uid, model.day, tag, self._checkpoint.every_steps)
+
+    def _warm_start_scheduler(
+        self,
+        ctx: _Logger,
         net: wave_net.Net,
-        optimizer: Optimizer,
+        arch: weights.Arch,
         scheduler: Scheduler,
-        data: list[datasets.TickerData],
-        batch_size: int,
-    ) -> None:
-        train_dl = data_loaders.train(data, batch_size)
+        uid: domain.UID | None,
+    ) -> Scheduler:
+        """Загружает в сеть веса модели с совпадающей архитектурой и сокращает расписание обучения."""
+        if not self._warm_start.enabled or uid is None or not weights.load(uid, arch, net):
+            return scheduler
+
+        ctx.info("Warm start from %s", uid)
+
+        return scheduler.model_copy(update={"epochs": scheduler.epochs * self._warm_start.epochs_scale})
+
+    def _train(
+        self,
+        ctx: _Logger,
+        net: wave_net.Net,
+        job: _Job,
+        run: _Run,
+        ckpt: checkpoint.Checkpoint | None,
+    ) -> list[float]:
+        """Обучает сеть и возвращает скользящее среднее LLH на обучении в контрольных точках.
+
+        Если включена досрочная остановка и известна траектория базовой модели, обучение прерывается
+        в контрольной точке, где LLH существенно хуже базовой. Если задан ckpt, состояние обучения
+        периодически и при остановке сохраняется, а обучение продолжается с сохраненного шага.
+        """
+        start = time.perf_counter()
+        optimizer, scheduler = run.optimizer, run.scheduler
+        train_dl = data_loaders.train(job.data.ticker_data, run.batch_size, run.recent_days)
         opt = optim.NAdam(
             net.parameters(),
             lr=optimizer.lr,
@@ -239,28 +560,46 @@ class Trainer:
         self._log_net_stats(ctx, net, scheduler.epochs, len(train_dl.dataset))  # type: ignore[arg-type]
 
         avg_llh = RunningMean(steps_per_epoch)
+        checkpoints = {
+            total_steps * n // (self._early_abort.checkpoints + 1) for n in range(1, self._early_abort.checkpoints + 1)
+        }
+        training = checkpoint.Training(net, opt, sch, avg_llh)
+        train_llh: list[float] = []
+        first_step = 0
+
+        if ckpt is not None and (progress := ckpt.restore(training, total_steps)) is not None:
+            train_llh, first_step, _ = progress
+            ctx.info("Resume training from step %d", first_step)
+
         net.train()
 
         with tqdm.tqdm(
             itertools.islice(
                 itertools.chain.from_iterable(itertools.repeat(train_dl)),
-                total_steps,
+                total_steps - first_step,
             ),
             total=total_steps,
+            initial=first_step,
             desc="Train",
+            disable=not self._progress,
         ) as progress_bar:
-            for batch in progress_bar:
+            for step, batch in enumerate(progress_bar, first_step + 1):
                 if self._stopping:
-                    return
+                    if ckpt is not None and step > first_step + 1:
+                        ckpt.save_training(training, checkpoint.Progress(train_llh, step - 1, total_steps))
+
+                    return train_llh
 
                 opt.zero_grad()
 
-                loss = -net.llh(
-                    batch.num_feat.to(self._device),
-                    batch.emb_feat.to(self._device),
-                    batch.emb_seq_feat.to(self._device),
-                    batch.labels.to(self._device),
-                )
+                with self._autocast():
+                    loss = -net.llh(
+                        batch.num_feat.to(self._device),
+                        batch.emb_feat.to(self._device),
+                        batch.emb_seq_feat.to(self._device),
+                        batch.labels.to(self._device),
+                    )
+
                 loss.backward()  # type: ignore[no-untyped-call]
                 opt.step()  # type: ignore[reportUnknownMemberType]
                 sch.step()
@@ -268,57 +607,148 @@ class Trainer:
                 avg_llh.append(-loss.item())
                 progress_bar.set_postfix_str(f"{avg_llh.running_avg():.5f}")
 
-    def _test(
-        self,
-        ctx: fsm.Ctx,
-        net: wave_net.Net,
-        cfg: Cfg,
-        forecast_days: int,
-        data: list[datasets.TickerData],
-    ) -> evolve.TestResults:
+                if step in checkpoints:
+                    train_llh.append(avg_llh.running_avg())
+                    self._check_early_abort(train_llh, run.base_train_llh)
+
+                if ckpt is not None and ckpt.is_due(step):
+                    ckpt.save_training(training, checkpoint.Progress(train_llh, step, total_steps))
+
+        profile = job.model.profile
+        profile.train = time.perf_counter() - start
+        profile.steps_per_sec = (total_steps - first_step) / profile.train
+
+        if ckpt is not None:
+            ckpt.delete()
+
+        return train_llh
+
+    def _check_early_abort(self, train_llh: list[float], base_train_llh: list[float]) -> None:
+        if not self._early_abort.enabled or len(base_train_llh) != self._early_abort.checkpoints:
+            return
+
+        n = len(train_llh) - 1
+        if train_llh[n] < base_train_llh[n] - self._early_abort.llh_margin:
+            raise errors.DomainError(
+                f"early abort at checkpoint {n + 1} - train llh {train_llh[n]:.4f} vs base {base_train_llh[n]:.4f}",
+            )
+
+    def _test(self, ctx: _Logger, net: wave_net.Net, cfg: Cfg, job: _Job) -> evolve.TestResults:
+        day, tickers, forecast_days, _, base = job.task
+        data = job.data.ticker_data
+
         with torch.inference_mode():
             net.eval()
 
             llh: list[float] = []
             alfa = 0
             ret = 0
+            rejected = False
 
-            for batch in data_loaders.test(data):
-                if self._stopping:
+            days_per_batch = max(1, cfg.batch.size * _TEST_BATCH_MULTIPLIER // len(tickers))
+            sliding = self._sliding_test and not cfg.batch.use_lag_feat
+            init: NDArray[np.double] | None = None
+
+            for batch in data_loaders.test(data, days_per_batch):
+                if self._stopping or rejected:
                     break
 
-                loss, mean, std = net.loss_and_forecast_mean_and_std(
-                    batch.num_feat.to(self._device),
-                    batch.emb_feat.to(self._device),
-                    batch.emb_seq_feat.to(self._device),
-                    batch.labels.to(self._device),
-                )
-                rez = risk.optimize(
-                    mean,
-                    std,
-                    batch.labels.numpy() - 1,
-                    batch.returns.numpy(),
+                with self._autocast():
+                    batch_llh, mean, std = self._test_batch(net, batch, len(tickers), sliding=sliding)
+
+                days_llh = cast("list[float]", batch_llh.reshape(-1, len(tickers)).mean(dim=1).tolist())  # type: ignore[reportUnknownMemberType]
+                days = self._sequential_rejection_day(llh, days_llh, base.llh)
+                rejected = days is not None
+                if days is None:
+                    days = len(days_llh)
+
+                risk_start = time.perf_counter()
+                tot_ret = batch.returns.numpy().reshape(-1, len(tickers), cfg.batch.history_days)[:days]
+                first_offset = cfg.batch.history_days + forecast_days + len(llh)
+                results, weights = risk.optimize_days(
+                    mean.reshape(-1, len(tickers), 1)[:days],
+                    std.reshape(-1, len(tickers), 1)[:days],
+                    batch.labels.numpy().reshape(-1, len(tickers), 1)[:days] - 1,
+                    self._cor_cache.cor(day, tickers, list(range(first_offset, first_offset + days)), tot_ret),
                     cfg.risk,
                     forecast_days,
+                    init,
                 )
+                init = weights[-1]
+                job.model.profile.risk += time.perf_counter() - risk_start
+
+                for loss, rez in zip(days_llh[:days], results, strict=True):
+                    ctx.info("%s / LLH = %7.4f", rez, loss)
 
-                ctx.info("%s / LLH = %7.4f", rez, loss)
+                    llh.append(loss)
+                    alfa += rez.ret - rez.avr
+                    ret += rez.ret
 
-                llh.append(loss)
-                alfa += rez.ret - rez.avr
-                ret += rez.ret
+        if rejected:
+            ctx.info("Sequential test rejected model after %d of %d test days", len(llh), data[0].days.test)
 
-        return evolve.TestResults(llh=llh, alfa=alfa / len(llh), ret=ret / len(llh))
+        return evolve.TestResults(llh=llh, alfa=alfa / len(llh), ret=ret / len(llh), sequential_rejected=rejected)
 
-    def _forecast(
+    def _test_batch(
         self,
         net: wave_net.Net,
-        forecast_days: int,
-        data: list[datasets.TickerData],
-    ) -> tuple[list[list[float]], list[list[float]]]:
+        batch: datasets.TestBatch,
+        tickers: int,
+        *,
+        sliding: bool,
+    ) -> tuple[torch.Tensor, NDArray[np.double], NDArray[np.double]]:
+        if not sliding:
+            return net.llh_and_forecast_mean_and_std(
+                batch.num_feat.to(self._device),
+                batch.emb_feat.to(self._device),
+                batch.emb_seq_feat.to(self._device),
+                batch.labels.to(self._device),
+            )
+
+        llh, mean, std = net.sliding_llh_and_forecast_mean_and_std(
+            datasets.spans(batch.num_feat, tickers).to(self._device),
+            batch.emb_feat[:tickers].to(self._device),
+            datasets.spans(batch.emb_seq_feat, tickers).to(self._device),
+            batch.labels.reshape(-1, tickers).flip(0).T.to(self._device),
+        )
+
+        return llh.T.flip(0).reshape(-1, 1), mean.T[::-1].reshape(-1, 1), std.T[::-1].reshape(-1, 1)
+
+    def _sequential_rejection_day(self, llh: list[float], days_llh: list[float], base_llh: list[float]) -> int | None:
+        """Номер дня батча, на котором последовательный тест отвергает модель, или None, если модель не отвергнута."""
+        if not self._sequential_test.enabled:
+            return None
+
+        target = llh.copy()
+
+        for n, day_llh in enumerate(days_llh, 1):
+            target.append(day_llh)
+
+            if self._sequential_test.min_days <= len(target) <= len(base_llh) and evolve.is_sequentially_rejected(
+                target, base_llh, self._sequential_test.effect_size
+            ):
+                return n
+
+        return None
+
+        target = llh.copy()
+
+        for n, day_llh in enumerate(days_llh, 1):
+            target.append(day_llh)
+
+            if self._sequential_test.min_days <= len(target) <= len(base_llh) and evolve.is_sequentially_rejected(
+                target, base_llh, self._sequential_test.effect_size
+            ):
+                return n
+
+        return len(days_llh)
+
+    def _forecast(self, net: wave_net.Net, job: _Job) -> tuple[list[list[float]], list[list[float]]]:
+        day, tickers, forecast_days, _, _ = job.task
+
         with torch.inference_mode():
             net.eval()
-            forecast_dl = data_loaders.forecast(data)
+            forecast_dl = data_loaders.forecast(job.data.ticker_data)
             if len(forecast_dl) != 1:
                 raise errors.UseCasesError("invalid forecast dataloader")
 
@@ -334,22 +764,32 @@ class Trainer:
             std *= year_multiplier**0.5
 
             total_ret = batch.returns.numpy()
-            cov = std.T * ledoit_wolf.ledoit_wolf_cor(total_ret)[0] * std
+            cor = self._cor_cache.cor(day, tickers, [total_ret.shape[1]], total_ret[np.newaxis])[0]
+            cov = std.T * cor * std
 
         return cast("list[list[float]]", mean.tolist()), cov.tolist()
 
-    def _log_net_stats(self, ctx: fsm.Ctx, net: wave_net.Net, epochs: float, steps_per_epoch: int) -> None:
+    def _log_net_stats(self, ctx: _Logger, net: wave_net.Net, epochs: float, steps_per_epoch: int) -> None:
         ctx.info("Epochs - %.2f / Train size - %s", epochs, steps_per_epoch)
 
         modules = sum(1 for _ in net.modules())
         model_params = sum(tensor.numel() for tensor in net.parameters())
         ctx.info("Layers / parameters - %d / %d", modules, model_params)
 
+    def _autocast(self) -> torch.autocast:
+        return torch.autocast(self._device, dtype=torch.bfloat16, enabled=self._bfloat16)
+
     def _prepare_net(self, cfg: Cfg, emb_size: list[int], emb_seq_size: list[int]) -> wave_net.Net:
-        return wave_net.Net(
+        net = wave_net.Net(
             cfg=cfg.net,
             history_days=cfg.batch.history_days,
             num_feat_count=cfg.batch.num_feat_count,
             emb_size=emb_size,
             emb_seq_size=emb_seq_size,
+            fused=self._compiled.fused,
         ).to(self._device)
+
+        if self._compiled.compile:
+            net.compile_backbone(self._compiled.backend)
+
+        return net
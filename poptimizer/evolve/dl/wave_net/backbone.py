@@ -1,12 +1,17 @@
 # pyright: reportPrivateImportUsage=false
+from typing import cast
+
 import torch
 from pydantic import BaseModel
 
 
 class _GatedBlock(torch.nn.Module):
-    def __init__(self, residual_channels: int, gate_channels: int, kernels: int) -> None:
+    def __init__(self, residual_channels: int, gate_channels: int, kernels: int, *, fused: bool = False) -> None:
         super().__init__()  # type: ignore[reportUnknownMemberType]
 
+        self._fused = fused
+        self._kernels = kernels
+
         self._pad = torch.nn.ConstantPad1d(
             padding=(kernels - 1, 0),
             value=0,
@@ -32,12 +37,38 @@ class _GatedBlock(torch.nn.Module):
     def forward(self, in_tensor: torch.Tensor) -> torch.Tensor:
         padded_input = self._pad(in_tensor)
 
-        signal = torch.relu(self._signal(padded_input))
-        gate = torch.sigmoid(self._gate(padded_input))
-        gated_signal = self._output(signal * gate)
+        if self._fused:
+            signal, gate = self._signal_and_gate(padded_input)
+        else:
+            signal = self._signal(padded_input)
+            gate = self._gate(padded_input)
+
+        gated_signal = self._output(torch.relu(signal) * torch.sigmoid(gate))
+
+        return in_tensor + gated_signal  # type: ignore[no-any-return]
+
+    def dilated(self, in_tensor: torch.Tensor, dilation: int) -> torch.Tensor:
+        """Блок для последовательности, в которой соседние значения окна отстоят на dilation позиций."""
+        padded_input = torch.nn.functional.pad(in_tensor, ((self._kernels - 1) * dilation, 0))
+
+        if self._fused:
+            signal, gate = self._signal_and_gate(padded_input, dilation)
+        else:
+            signal = torch.nn.functional.conv1d(padded_input, self._signal.weight, self._signal.bias, dilation=dilation)
+            gate = torch.nn.functional.conv1d(padded_input, self._gate.weight, self._gate.bias, dilation=dilation)
+
+        gated_signal = self._output(torch.relu(signal) * torch.sigmoid(gate))
 
         return in_tensor + gated_signal  # type: ignore[no-any-return]
 
+    def _signal_and_gate(self, padded_input: torch.Tensor, dilation: int = 1) -> tuple[torch.Tensor, torch.Tensor]:
+        """Сигнал и гейт одной сверткой с объединенными весами - веса хранятся раздельно для совместимости."""
+        weight = torch.cat((self._signal.weight, self._gate.weight))
+        bias = torch.cat((cast("torch.Tensor", self._signal.bias), cast("torch.Tensor", self._gate.bias)))
+        signal, gate = torch.nn.functional.conv1d(padded_input, weight, bias, dilation=dilation).chunk(2, dim=1)
+
+        return signal, gate
+
 
 class Cfg(BaseModel):
     use_bn: bool
@@ -51,9 +82,11 @@ class Cfg(BaseModel):
 
 
 class _Blocks(torch.nn.Module):
-    def __init__(self, cfg: Cfg) -> None:
+    def __init__(self, cfg: Cfg, *, fused: bool) -> None:
         super().__init__()  # type: ignore[reportUnknownMemberType]
 
+        # Число первых позиций выхода блоков, на которые влияет дополнение нулями начала окна
+        self.edge = cfg.sub_blocks * (cfg.kernels - 1)
         self._blocks = torch.nn.Sequential()
         for _ in range(cfg.sub_blocks):
             self._blocks.append(
@@ -61,6 +94,7 @@ class _Blocks(torch.nn.Module):
                     residual_channels=cfg.residual_channels,
                     gate_channels=cfg.gate_channels,
                     kernels=cfg.kernels,
+                    fused=fused,
                 ),
             )
 
@@ -88,6 +122,34 @@ class _Blocks(torch.nn.Module):
 
         return dilated, skip
 
+    def gated(self, in_tensor: torch.Tensor) -> torch.Tensor:
+        return self._blocks(in_tensor)  # type: ignore[no-any-return]
+
+    def downsample(self, gated: torch.Tensor) -> torch.Tensor:
+        return self._dilated(self._dilated_pad(gated))  # type: ignore[no-any-return]
+
+    def skip(self, gated: torch.Tensor) -> torch.Tensor:
+        return self._skip(gated)  # type: ignore[no-any-return]
+
+    def stream(self, in_tensor: torch.Tensor, dilation: int) -> tuple[torch.Tensor, torch.Tensor]:
+        """Выходы блоков и понижения размерности для всех дней последовательности.
+
+        Значения уровня с прореживанием dilation вычисляются для каждого дня, а не только для дней, кратных dilation,
+        поэтому их разделяют все окна, на сетку которых попадает день.
+        """
+        gated = in_tensor
+        for block in cast("list[_GatedBlock]", self._blocks):
+            gated = block.dilated(gated, dilation)
+
+        dilated = torch.nn.functional.conv1d(
+            torch.nn.functional.pad(gated, (dilation, 0)),
+            self._dilated.weight,
+            self._dilated.bias,
+            dilation=dilation,
+        )
+
+        return gated, dilated
+
 
 class Net(torch.nn.Module):
     def __init__(
@@ -95,13 +157,14 @@ class Net(torch.nn.Module):
         *,
         blocks: int,
         cfg: Cfg,
+        fused: bool = False,
     ) -> None:
         super().__init__()  # type: ignore[reportUnknownMemberType]
 
         self._blocks = torch.nn.ModuleList()
 
         for _ in range(blocks):
-            self._blocks.append(_Blocks(cfg=cfg))
+            self._blocks.append(_Blocks(cfg=cfg, fused=fused))
 
         self._final_skip_conv = torch.nn.Conv1d(
             in_channels=cfg.residual_channels,
@@ -120,3 +183,67 @@ class Net(torch.nn.Module):
         skips = skips + self._final_skip_conv(in_tensor)
 
         return torch.relu(skips)
+
+    def sliding(self, in_tensor: torch.Tensor, windows: int) -> torch.Tensor:
+        """Выход сети для windows последовательных окон, покрывающих последовательности in_tensor.
+
+        Результат совпадает с forward для каждого окна и упорядочен по последовательностям, а внутри по окнам.
+        Значения, на которые не влияет дополнение нулями начала окна, зависят только от дня и считаются один раз
+        для всей последовательности на каждом уровне, а для каждого окна пересчитываются только несколько первых
+        позиций уровней, поэтому стоимость окна пропорциональна количеству уровней, а не длине истории.
+        """
+        batch, channels, days = in_tensor.shape
+        starts = torch.arange(windows, device=in_tensor.device)
+        length = days - windows + 1
+        stream: torch.Tensor | None = in_tensor
+        edge = in_tensor.new_empty(batch * windows, channels, 0)
+        skips = in_tensor.new_zeros(batch * windows, self._final_skip_conv.out_channels, 1)
+
+        for level, block in enumerate(cast("list[_Blocks]", self._blocks)):
+            dilation = 2**level
+            clean = edge.shape[2]
+            gated_clean = clean + block.edge
+            next_clean = (gated_clean + 2) // 2
+            prefix = min(length, max(gated_clean, 2 * next_clean - 1))
+
+            gated = block.gated(_window(edge, stream, starts, dilation, prefix))
+            next_length = (length + 1) // 2
+
+            if stream is not None and length > prefix:
+                gated_stream, next_stream = block.stream(stream, dilation)
+                last = _gather(gated_stream, starts, dilation, length - 1, length)
+            else:
+                next_stream = None
+                last = gated[:, :, length - 1 :]
+
+            skips = skips + block.skip(last)
+            edge = block.downsample(gated)[:, :, : min(next_length, next_clean)]
+            stream = next_stream if next_clean < next_length else None
+            length = next_length
+
+        skips = skips + self._final_skip_conv(_window(edge, stream, starts, 2 ** len(self._blocks), length)[:, :, -1:])
+
+        return torch.relu(skips)
+
+
+def _gather(stream: torch.Tensor, starts: torch.Tensor, dilation: int, first: int, end: int) -> torch.Tensor:
+    """Позиции с first по end уровня с прореживанием dilation для окон, начинающихся в дни starts."""
+    days = starts.unsqueeze(1) + dilation * torch.arange(first, end, device=stream.device)
+    values = stream[:, :, days]
+
+    return values.permute(0, 2, 1, 3).reshape(-1, stream.shape[1], end - first)
+
+
+def _window(
+    edge: torch.Tensor,
+    stream: torch.Tensor | None,
+    starts: torch.Tensor,
+    dilation: int,
+    end: int,
+) -> torch.Tensor:
+    """Первые end позиций уровня для каждого окна - начальные из edge, а остальные из общей последовательности."""
+    clean = edge.shape[2]
+    if end <= clean:
+        return edge[:, :, :end]
+
+    return torch.cat((edge, _gather(cast("torch.Tensor", stream), starts, dilation, clean, end)), dim=2)
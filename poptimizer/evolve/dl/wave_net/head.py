@@ -1,16 +1,39 @@
 # pyright: reportPrivateImportUsage=false
+import math
+from typing import Final, NamedTuple
+
 import torch
 from pydantic import BaseModel
 from torch.distributions import Categorical, MixtureSameFamily
 
 from poptimizer.core import errors
 
+_HALF_LOG_2PI: Final = 0.5 * math.log(2 * math.pi)
+
 
 class Cfg(BaseModel):
     channels: int
     mixture_size: int
 
 
+class Mixture(NamedTuple):
+    """Параметры смеси логнормальных распределений размерности батч x 1 x количество компонент."""
+
+    logits: torch.Tensor
+    loc: torch.Tensor
+    scale: torch.Tensor
+
+    def log_prob(self, labels: torch.Tensor) -> torch.Tensor:
+        """Логарифм правдоподобия меток без построения объектов распределений."""
+        log_labels = torch.log(labels).unsqueeze(-1)
+        log_weights = torch.log_softmax(self.logits, dim=-1)
+        log_comp = (
+            -log_labels - torch.log(self.scale) - _HALF_LOG_2PI - 0.5 * ((log_labels - self.loc) / self.scale) ** 2
+        )
+
+        return torch.logsumexp(log_weights + log_comp, dim=-1)
+
+
 class Net(torch.nn.Module):
     def __init__(
         self,
@@ -49,21 +72,32 @@ class Net(torch.nn.Module):
         )
         self._output_soft_plus_s = torch.nn.Softplus()
 
+    def mixture(self, in_tensor: torch.Tensor) -> Mixture:
+        """Параметры смеси всегда считаются в float32 для устойчивости правдоподобия при пониженной точности."""
+        with torch.autocast(in_tensor.device.type, enabled=False):
+            end = torch.relu(self._end(in_tensor.float()))
+            std = self._output_soft_plus_s(self._std(end)) + self._eps
+
+            return Mixture(
+                logits=self._logit(end).permute(0, 2, 1),
+                loc=self._mean(end).permute((0, 2, 1)),
+                scale=std.permute((0, 2, 1)),
+            )
+
     def forward(self, in_tensor: torch.Tensor) -> MixtureSameFamily:
-        end = torch.relu(self._end(in_tensor))
+        mixture = self.mixture(in_tensor)
 
         try:
             weights_dist = Categorical(
-                logits=self._logit(end).permute(0, 2, 1),
+                logits=mixture.logits,
             )  # type: ignore[no-untyped-call]
         except ValueError as err:
             raise errors.DomainError("error in categorical distribution") from err
 
-        std = self._output_soft_plus_s(self._std(end)) + self._eps
         try:
             comp_dist = torch.distributions.LogNormal(
-                loc=self._mean(end).permute((0, 2, 1)),
-                scale=std.permute((0, 2, 1)),
+                loc=mixture.loc,
+                scale=mixture.scale,
             )  # type: ignore[no-untyped-call]
         except ValueError as err:
             raise errors.DomainError("error in mixture distribution") from err
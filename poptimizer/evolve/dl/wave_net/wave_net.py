@@ -17,16 +17,20 @@ class Net(torch.nn.Module):
     https://arxiv.org/abs/1609.03499
     """
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         cfg: backbone.Cfg,
         history_days: int,
         num_feat_count: int,
         emb_size: list[int],
         emb_seq_size: list[int],
+        *,
+        fused: bool = False,
     ) -> None:
         super().__init__()  # type: ignore[reportUnknownMemberType]
 
+        self._fused = fused
+
         self._input = inputs.Net(
             num_feat_count=num_feat_count,
             emb_size=emb_size,
@@ -37,6 +41,7 @@ class Net(torch.nn.Module):
         self._backbone = backbone.Net(
             blocks=int(np.log2(history_days - 1)) + 1,
             cfg=cfg,
+            fused=fused,
         )
         self._head = head.Net(
             skip_channels=cfg.skip_channels,
@@ -44,6 +49,10 @@ class Net(torch.nn.Module):
             mixture_size=cfg.mixture_size,
         )
 
+    def compile_backbone(self, backend: str) -> None:
+        """Компилирует сверточную часть сети, не зависящую от распределений."""
+        self._backbone.compile(backend=backend, dynamic=True)  # type: ignore[reportUnknownMemberType]
+
     def forward(
         self,
         num_feat: torch.Tensor,
@@ -62,6 +71,9 @@ class Net(torch.nn.Module):
         emb_seq_feat: torch.Tensor,
         labels: torch.Tensor,
     ) -> torch.Tensor:
+        if self._fused:
+            return self._fused_llh(num_feat, emb_feat, emb_seq_feat, labels)
+
         dist = self(num_feat, emb_feat, emb_seq_feat)
 
         try:
@@ -69,22 +81,64 @@ class Net(torch.nn.Module):
         except ValueError as err:
             raise errors.DomainError("error in categorical distribution") from err
 
-    def loss_and_forecast_mean_and_std(
+    def _fused_llh(
         self,
         num_feat: torch.Tensor,
         emb_feat: torch.Tensor,
         emb_seq_feat: torch.Tensor,
         labels: torch.Tensor,
-    ) -> tuple[float, NDArray[np.double], NDArray[np.double]]:
-        """Minus Normal Log Likelihood and forecast means and vars."""
+    ) -> torch.Tensor:
+        end = self._backbone(self._input(num_feat, emb_feat, emb_seq_feat))
+        llh = self._head.mixture(end).log_prob(labels).mean()
+
+        if not torch.isfinite(llh):
+            raise errors.DomainError("error in mixture distribution")
+
+        return llh
+
+    def llh_and_forecast_mean_and_std(
+        self,
+        num_feat: torch.Tensor,
+        emb_feat: torch.Tensor,
+        emb_seq_feat: torch.Tensor,
+        labels: torch.Tensor,
+    ) -> tuple[torch.Tensor, NDArray[np.double], NDArray[np.double]]:
+        """Return Normal Log Likelihood of each example and forecast means and vars."""
         dist = self(num_feat, emb_feat, emb_seq_feat)
 
         try:
-            llh = dist.log_prob(labels).mean()
+            llh = dist.log_prob(labels)
         except ValueError as err:
             raise errors.DomainError("error in categorical distribution") from err
 
-        return llh.item(), dist.mean.cpu().numpy() - 1, dist.variance.cpu().numpy() ** 0.5
+        return llh.cpu(), dist.mean.cpu().numpy() - 1, dist.variance.cpu().numpy() ** 0.5
+
+    def sliding_llh_and_forecast_mean_and_std(
+        self,
+        num_feat: torch.Tensor,
+        emb_feat: torch.Tensor,
+        emb_seq_feat: torch.Tensor,
+        labels: torch.Tensor,
+    ) -> tuple[torch.Tensor, NDArray[np.double], NDArray[np.double]]:
+        """Аналог llh_and_forecast_mean_and_std для всех окон, покрывающих последовательности признаков.
+
+        Признаки содержат последовательности дней для каждого тикера, а метки - по одной на окно. Результаты
+        имеют размерность тикеры x окна. Признаки не должны зависеть от положения дня в окне.
+        """
+        windows = labels.shape[1]
+        end = self._backbone.sliding(self._input(num_feat, emb_feat, emb_seq_feat), windows)
+        dist = self._head(end)
+
+        try:
+            llh = dist.log_prob(labels.reshape(-1, 1))
+        except ValueError as err:
+            raise errors.DomainError("error in categorical distribution") from err
+
+        return (
+            llh.reshape(-1, windows).cpu(),
+            dist.mean.reshape(-1, windows).cpu().numpy() - 1,
+            dist.variance.reshape(-1, windows).cpu().numpy() ** 0.5,
+        )
 
     def forecast_mean_and_std(
         self,
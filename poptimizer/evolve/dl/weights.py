@@ -0,0 +1,78 @@
+import pickle
+from pathlib import Path
+from typing import Final
+
+import torch
+from pydantic import BaseModel
+
+from poptimizer.core import consts, domain, errors
+from poptimizer.evolve.dl import builder
+from poptimizer.evolve.dl.wave_net import backbone
+
+_DIR: Final = consts.ROOT / "weights"
+_VERSION: Final = 1
+_ARCH: Final = "arch"
+_STATE: Final = "state"
+
+
+class Arch(BaseModel):
+    """Параметры модели, определяющие структуру сети и смысл ее входов.
+
+    Веса одной модели можно использовать для инициализации другой только при совпадении архитектуры.
+    """
+
+    version: int = _VERSION
+    net: backbone.Cfg
+    num_feats: builder.NumFeatures
+    emb_feats: builder.EmbFeatures
+    emb_seq_feats: builder.EmbSeqFeatures
+    use_lag_feat: bool
+    history_days: int
+    emb_size: list[int]
+    emb_seq_size: list[int]
+
+
+def _path(uid: domain.UID) -> Path:
+    return _DIR / f"{uid}.pt"
+
+
+def save(uid: domain.UID, arch: Arch, state: dict[str, torch.Tensor]) -> None:
+    path = _path(uid)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+
+    try:
+        _DIR.mkdir(parents=True, exist_ok=True)
+        torch.save({_ARCH: arch.model_dump_json(), _STATE: state}, tmp_path)
+        tmp_path.replace(path)
+    except OSError as err:
+        raise errors.AdapterError(f"can't save model weights {path}") from err
+
+
+def load(uid: domain.UID, arch: Arch, net: torch.nn.Module) -> bool:
+    """Загружает в сеть сохраненные веса модели, если они есть и архитектура совпадает."""
+    try:
+        saved = torch.load(_path(uid), map_location="cpu", weights_only=True)
+    except OSError, RuntimeError, pickle.UnpicklingError:
+        return False
+
+    if saved.get(_ARCH) != arch.model_dump_json():
+        return False
+
+    state: dict[str, torch.Tensor] = saved[_STATE]
+    expected = net.state_dict()
+
+    if state.keys() != expected.keys() or any(state[key].shape != expected[key].shape for key in expected):
+        return False
+
+    net.load_state_dict(state)
+
+    return True
+
+
+def delete(uid: domain.UID) -> None:
+    path = _path(uid)
+
+    try:
+        path.unlink(missing_ok=True)
+    except OSError as err:
+        raise errors.AdapterError(f"can't delete model weights {path}") from err
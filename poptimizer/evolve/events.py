@@ -7,7 +7,8 @@ class BaseModelNotEvaluated(fsm.Event): ...
 class BaseModelEvaluated(fsm.Event): ...
 
 
-class NewModelCreated(fsm.Event): ...
+class NewModelCreated(fsm.Event):
+    accepted: bool = False
 
 
 class ModelRejected(fsm.Event): ...
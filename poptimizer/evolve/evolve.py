@@ -1,13 +1,26 @@
+from datetime import timedelta
+
 from poptimizer.core import fsm
 from poptimizer.data.events import DataUpdated, DayNotChanged
-from poptimizer.evolve import actions, events
+from poptimizer.evolve import actions, events, settings
 from poptimizer.evolve.dl import builder
 from poptimizer.evolve.dl.trainer import Trainer
+from poptimizer.evolve.models import evolve, surrogate
 from poptimizer.fsm import graph
 
 
-def build_graph() -> graph.Graph:
-    trainer = Trainer(builder.Builder())
+def build_graph(cfg: settings.Evolve) -> graph.Graph:
+    trainer = Trainer(builder.Builder(), cfg)
+    screen = None
+    if cfg.surrogate.enabled:
+        screen = surrogate.Surrogate(
+            cfg.surrogate.candidates,
+            cfg.surrogate.history,
+            cfg.surrogate.min_models,
+            cfg.surrogate.exploration,
+        )
+    limits = evolve.CostLimits(cfg.cost.penalty, cfg.cost.time_budget)
+    lease = evolve.Lease(timedelta(seconds=cfg.lease.ttl))
 
     data_graph = graph.Graph("EvolveFSM")
 
@@ -26,17 +39,17 @@ def build_graph() -> graph.Graph:
         [
             graph.Transition(
                 on=events.BaseModelNotEvaluated,
-                action=actions.EvaluateBaseModelAction(trainer),
+                action=actions.EvaluateBaseModelAction(trainer, screen, limits),
                 dst=events.BaseModelNotEvaluated,
             ),
             graph.Transition(
                 on=events.BaseModelEvaluated,
-                action=actions.EvaluateExistingModelAction(trainer),
+                action=actions.EvaluateExistingModelAction(trainer, screen, limits, lease),
                 dst=events.BaseModelEvaluated,
             ),
             graph.Transition(
                 on=events.NewModelCreated,
-                action=actions.EvaluateNewModelAction(trainer),
+                action=actions.EvaluateNewModelAction(trainer, screen, limits),
                 dst=events.NewModelCreated,
             ),
         ],
@@ -46,12 +59,12 @@ def build_graph() -> graph.Graph:
         [
             graph.Transition(
                 on=events.NewModelCreated,
-                action=actions.EvaluateNewModelAction(trainer),
+                action=actions.EvaluateNewModelAction(trainer, screen, limits),
                 dst=events.NewModelCreated,
             ),
             graph.Transition(
                 on=events.BaseModelNotEvaluated,
-                action=actions.EvaluateBaseModelAction(trainer),
+                action=actions.EvaluateBaseModelAction(trainer, screen, limits),
                 dst=events.BaseModelNotEvaluated,
             ),
         ],
@@ -61,12 +74,12 @@ def build_graph() -> graph.Graph:
         [
             graph.Transition(
                 on=events.NewModelCreated,
-                action=actions.EvaluateNewModelAction(trainer),
+                action=actions.EvaluateNewModelAction(trainer, screen, limits),
                 dst=events.NewModelCreated,
             ),
             graph.Transition(
                 on=events.BaseModelNotEvaluated,
-                action=actions.EvaluateBaseModelAction(trainer),
+                action=actions.EvaluateBaseModelAction(trainer, screen, limits),
                 dst=events.BaseModelNotEvaluated,
             ),
             graph.Transition(
@@ -80,12 +93,12 @@ def build_graph() -> graph.Graph:
         [
             graph.Transition(
                 on=events.NewModelCreated,
-                action=actions.EvaluateNewModelAction(trainer),
+                action=actions.EvaluateNewModelAction(trainer, screen, limits),
                 dst=events.NewModelCreated,
             ),
             graph.Transition(
                 on=events.BaseModelNotEvaluated,
-                action=actions.EvaluateBaseModelAction(trainer),
+                action=actions.EvaluateBaseModelAction(trainer, screen, limits),
                 dst=events.BaseModelNotEvaluated,
             ),
             graph.Transition(
@@ -99,7 +112,7 @@ def build_graph() -> graph.Graph:
         [
             graph.Transition(
                 on=DayNotChanged,
-                action=actions.EvaluateExistingModelAction(trainer),
+                action=actions.EvaluateExistingModelAction(trainer, screen, limits, lease),
                 dst=DayNotChanged,
             ),
             graph.Transition(
@@ -114,12 +127,12 @@ def build_graph() -> graph.Graph:
         [
             graph.Transition(
                 on=events.NewModelCreated,
-                action=actions.EvaluateNewModelAction(trainer),
+                action=actions.EvaluateNewModelAction(trainer, screen, limits),
                 dst=events.NewModelCreated,
             ),
             graph.Transition(
                 on=events.BaseModelNotEvaluated,
-                action=actions.EvaluateBaseModelAction(trainer),
+                action=actions.EvaluateBaseModelAction(trainer, screen, limits),
                 dst=events.BaseModelNotEvaluated,
             ),
             graph.Transition(
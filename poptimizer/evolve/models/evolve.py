@@ -1,5 +1,12 @@
+import math
+import os
+import socket
+import statistics
+import uuid
+from collections.abc import Callable
+from datetime import UTC, datetime, timedelta
 from functools import cached_property
-from typing import Final, Self, cast
+from typing import Final, NamedTuple, Self, cast
 
 import bson
 from pydantic import (
@@ -14,8 +21,8 @@ from pydantic import (
 from scipy import stats  # type: ignore[reportMissingTypeStubs]
 
 from poptimizer.core import consts, domain, fsm
-from poptimizer.evolve.dl import datasets
-from poptimizer.evolve.models import genetics, genotype
+from poptimizer.evolve.dl import cost, datasets
+from poptimizer.evolve.models import genetics, genotype, surrogate
 from poptimizer.portfolio.models import portfolio
 
 _INITIAL_MINIMAL_RETURNS_DAYS: Final = datasets.Days(
@@ -26,6 +33,8 @@ _INITIAL_MINIMAL_RETURNS_DAYS: Final = datasets.Days(
 _PARENT_COUNT: Final = 2
 _OPTIMAL_ACCEPTANCE_RATE: Final = 0.234
 MINIMAL_TEST_DAYS: Final = 2
+_COST_SMOOTHING: Final = 0.1
+_MAX_CHILD_ATTEMPTS: Final = 16
 
 
 def random_model_uid() -> domain.UID:
@@ -36,6 +45,8 @@ class TestResults(BaseModel):
     llh: list[FiniteFloat]
     alfa: FiniteFloat
     ret: FiniteFloat
+    train_llh: list[FiniteFloat] = Field(default_factory=list[FiniteFloat])
+    sequential_rejected: bool = False
 
     def is_low_return(self) -> bool:
         return min(self.alfa, self.ret) < 0
@@ -44,14 +55,58 @@ class TestResults(BaseModel):
         return f"{self.__class__.__name__}(ret={self.ret:.2%})"
 
 
+class Lease:
+    """Владелец аренды моделей в общей базе и срок, на который аренда захватывается и продлевается."""
+
+    def __init__(self, ttl: timedelta) -> None:
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.ttl = ttl
+
+    def expires(self) -> datetime:
+        return datetime.now(UTC) + self.ttl
+
+
+class CostLimits(NamedTuple):
+    """Штраф за стоимость новых моделей.
+
+    LLH новой модели при сравнении с базовой уменьшается на penalty * ln(длительность модели / средняя
+    длительность), а потомки с прогнозной и модели с фактической длительностью больше time_budget секунд не
+    принимаются.
+    """
+
+    penalty: float = 0
+    time_budget: float | None = None
+
+
+_NO_LIMITS: Final = CostLimits()
+
+
+class Profile(BaseModel):
+    """Длительность этапов оценки модели в секундах и пиковая память процесса в байтах.
+
+    Оптимизация портфелей risk входит в тестирование test, а подготовка данных data не входит в duration модели.
+    """
+
+    data: NonNegativeFloat = 0
+    net_init: NonNegativeFloat = 0
+    train: NonNegativeFloat = 0
+    steps_per_sec: NonNegativeFloat = 0
+    test: NonNegativeFloat = 0
+    risk: NonNegativeFloat = 0
+    forecast: NonNegativeFloat = 0
+    peak_rss: NonNegativeFloat = 0
+
+
 class Model(domain.Entity):
     day: domain.Day = consts.START_DAY
     genes: genetics.Genes = Field(default_factory=lambda: genotype.Genotype.model_validate({}).genes)
     alfa: FiniteFloat = 0
     llh: FiniteFloat = 0
     duration: NonNegativeFloat = 0
+    profile: Profile = Field(default_factory=Profile)
     mean: list[list[FiniteFloat]] = Field(default_factory=list[list[FiniteFloat]])
     cov: list[list[FiniteFloat]] = Field(default_factory=list[list[FiniteFloat]])
+    parent: domain.UID | None = None
 
     @model_validator(mode="after")
     def _match_length(self) -> Self:
@@ -103,8 +158,11 @@ class Evolution(domain.Entity):
     step: PositiveInt = 1
     alfa: FiniteFloat = 0
     llh: list[FiniteFloat] = Field(default_factory=list[FiniteFloat])
+    train_llh: list[FiniteFloat] = Field(default_factory=list[FiniteFloat])
     previous_model: domain.UID = Field(default_factory=random_model_uid, min_length=1)
     radius: PositiveFloat = Field(default=1, ge=1)
+    duration: NonNegativeFloat = 0
+    seconds_per_flop: NonNegativeFloat = 0
 
     def init_day(
         self,
@@ -115,12 +173,29 @@ class Evolution(domain.Entity):
         self.forecast_days = port.forecast_days
         self.alfa = 0
         self.llh = []
+        self.train_llh = []
         self.cnt = min(self.cnt, self.step // 2 + 1)
         self.step = 1
 
     def new_base(self, results: TestResults) -> None:
         self.alfa = results.alfa
         self.llh = results.llh
+        self.train_llh = results.train_llh
+
+    def model_evaluated(self, model: Model) -> None:
+        seconds_per_flop = model.duration / cost.estimate(model.phenotype).flops
+
+        if not self.duration:
+            self.duration = model.duration
+            self.seconds_per_flop = seconds_per_flop
+
+            return
+
+        self.duration += _COST_SMOOTHING * (model.duration - self.duration)
+        self.seconds_per_flop += _COST_SMOOTHING * (seconds_per_flop - self.seconds_per_flop)
+
+    def predicted_duration(self, genes: genetics.Genes) -> float:
+        return self.seconds_per_flop * cost.estimate(genotype.Genotype.model_validate(genes).phenotype).flops
 
     def model_rejected(self) -> None:
         self.radius += 1 / self.cnt
@@ -133,23 +208,63 @@ class Evolution(domain.Entity):
             self.radius = 1
 
 
-async def make_new_model(ctx: fsm.Ctx, evolution: Evolution, model: Model) -> domain.UID:
+async def make_new_model(
+    ctx: fsm.Ctx,
+    evolution: Evolution,
+    model: Model,
+    screen: surrogate.Surrogate | None = None,
+    limits: CostLimits = _NO_LIMITS,
+) -> domain.UID:
     parents = await ctx.sample_models(_PARENT_COUNT)
     if len({parent.uid for parent in parents}) != _PARENT_COUNT:
         parents = [Model(uid=model.uid) for _ in range(_PARENT_COUNT)]
 
+    def make_child() -> genetics.Genes:
+        children: list[genetics.Genes] = []
+
+        for _ in range(_MAX_CHILD_ATTEMPTS):
+            child = model.child_genes(parents[0], parents[1], 1 / evolution.radius)
+            if limits.time_budget is None or evolution.predicted_duration(child) <= limits.time_budget:
+                return child
+
+            children.append(child)
+
+        return min(children, key=evolution.predicted_duration)
+
     new_model = await ctx.get_for_update(Model, random_model_uid())
-    new_model.genes = model.child_genes(parents[0], parents[1], 1 / evolution.radius)
+    new_model.genes = make_child() if screen is None else await _prescreen(ctx, screen, make_child)
+    new_model.parent = model.uid
 
     return new_model.uid
 
 
+async def _prescreen(
+    ctx: fsm.Ctx,
+    screen: surrogate.Surrogate,
+    make_child: Callable[[], genetics.Genes],
+) -> genetics.Genes:
+    if not screen.seeded:
+        sample = await ctx.sample_models(screen.history)
+        screen.seed([(saved.genotype.genes, saved.llh) for saved in sample if saved.day != consts.START_DAY])
+
+    if not screen.is_ready:
+        return make_child()
+
+    return max((make_child() for _ in range(screen.candidates)), key=screen.score)
+
+
 async def is_accepted(
     ctx: fsm.Ctx,
     evolution: Evolution,
     model: Model,
     results: TestResults,
+    limits: CostLimits = _NO_LIMITS,
 ) -> bool:
+    if limits.time_budget is not None and model.duration > limits.time_budget:
+        ctx.info(f"{model} rejected with {results} - duration {model.duration:.0f}s exceeds time budget")
+
+        return False
+
     if results.is_low_return() and results.alfa < evolution.alfa:
         ctx.info(f"{model} rejected with {results} - low alfa")
         evolution.test_days += 1
@@ -158,7 +273,19 @@ async def is_accepted(
 
     evolution.test_days = max(MINIMAL_TEST_DAYS, evolution.test_days - consts.P_VALUE / (1 - consts.P_VALUE))
 
-    llh_p = _probability(results.llh, evolution.llh)
+    if results.sequential_rejected:
+        ctx.info(
+            f"{model} rejected with {results} - sequential test after {len(results.llh)} of {len(evolution.llh)} days",
+        )
+
+        return False
+
+    llh = results.llh
+    if limits.penalty and evolution.duration and model.duration:
+        penalty = limits.penalty * math.log(model.duration / evolution.duration)
+        llh = [day_llh - penalty for day_llh in llh]
+
+    llh_p = _probability(llh, evolution.llh)
 
     if llh_p < consts.P_VALUE:
         ctx.info(f"{model} rejected with {results} - low llh probability {llh_p:.2%}")
@@ -180,3 +307,20 @@ def _probability(target: list[float], base: list[float]) -> float:
             alternative="less",
         ).pvalue,  # pyright: ignore[reportAttributeAccessIssue]
     )
+
+
+def is_sequentially_rejected(target: list[float], base: list[float], effect_size: float) -> bool:
+    """Последовательный тест отношения правдоподобия Вальда для разностей LLH модели и базовой модели.
+
+    Нулевая гипотеза - разности имеют нулевое среднее, альтернативная - среднее меньше на effect_size
+    стандартных отклонений. Ошибки первого и второго рода равны consts.P_VALUE, а стандартное отклонение
+    оценивается по имеющимся разностям. Модель отвергается, когда логарифм отношения правдоподобия достигает
+    верхней границы.
+    """
+    diff = [t - b for t, b in zip(target, base, strict=False)]
+    if len(diff) < MINIMAL_TEST_DAYS or (std := statistics.stdev(diff)) == 0:
+        return False
+
+    log_likelihood_ratio = -effect_size * sum(diff) / std - len(diff) * effect_size**2 / 2
+
+    return log_likelihood_ratio >= math.log((1 - consts.P_VALUE) / consts.P_VALUE)
@@ -0,0 +1,107 @@
+import collections
+from typing import TYPE_CHECKING, Final
+
+import numpy as np
+
+from poptimizer.core import errors
+from poptimizer.evolve.models import genetics
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+_RIDGE: Final = 1.0
+
+
+def flatten(genes: genetics.Genes) -> list[float]:
+    flat: list[float] = []
+
+    for value in genes.values():
+        match value:
+            case float() | int():
+                flat.append(float(value))
+            case dict():
+                flat.extend(flatten(value))
+
+    return flat
+
+
+class Surrogate:
+    """Байесовская гребневая регрессия LLH моделей на стандартизованные гены.
+
+    Хранит history последних оцененных моделей и переобучается при появлении новых наблюдений. Из candidates
+    потомков на обучение отправляется потомок с лучшей оценкой - прогнозом LLH плюс exploration стандартных
+    отклонений прогноза, поэтому при большом exploration предпочтение отдается генотипам в малоизученных областях.
+    """
+
+    def __init__(self, candidates: int, history: int, min_models: int, exploration: float) -> None:
+        self._candidates = candidates
+        self._observations: collections.deque[tuple[list[float], float]] = collections.deque(maxlen=history)
+        self._min_models = min_models
+        self._exploration = exploration
+        self._seeded = False
+        self._fit: _Fit | None = None
+
+    @property
+    def candidates(self) -> int:
+        return self._candidates
+
+    @property
+    def history(self) -> int:
+        return self._observations.maxlen or 0
+
+    @property
+    def seeded(self) -> bool:
+        return self._seeded
+
+    @property
+    def is_ready(self) -> bool:
+        return len(self._observations) >= self._min_models
+
+    def seed(self, observations: list[tuple[genetics.Genes, float]]) -> None:
+        for genes, llh in observations:
+            self.observe(genes, llh)
+
+        self._seeded = True
+
+    def observe(self, genes: genetics.Genes, llh: float) -> None:
+        flat = flatten(genes)
+        if self._observations and len(self._observations[0][0]) != len(flat):
+            self._observations.clear()
+
+        self._observations.append((flat, llh))
+        self._fit = None
+
+    def score(self, genes: genetics.Genes) -> float:
+        if not self.is_ready:
+            raise errors.DomainError("not enough models for surrogate")
+
+        if self._fit is None:
+            self._fit = _Fit(self._observations)
+
+        mean, std = self._fit.predict(flatten(genes))
+
+        return mean + self._exploration * std
+
+
+class _Fit:
+    def __init__(self, observations: collections.deque[tuple[list[float], float]]) -> None:
+        x = np.array([genes for genes, _ in observations])
+        y = np.array([llh for _, llh in observations])
+
+        self._x_mean = x.mean(axis=0)
+        self._x_std = x.std(axis=0)
+        self._x_std[self._x_std == 0] = 1
+        self._y_mean = y.mean()
+
+        x = (x - self._x_mean) / self._x_std
+        y -= self._y_mean
+
+        self._precision_inv = np.linalg.inv(x.T @ x + _RIDGE * np.eye(x.shape[1]))
+        self._weights = self._precision_inv @ x.T @ y
+        self._noise = float(np.mean((y - x @ self._weights) ** 2))
+
+    def predict(self, genes: list[float]) -> tuple[float, float]:
+        x: NDArray[np.double] = (np.array(genes) - self._x_mean) / self._x_std
+        var = self._noise * (1 + x @ self._precision_inv @ x)
+
+        return float(self._y_mean + x @ self._weights), float(np.sqrt(var))
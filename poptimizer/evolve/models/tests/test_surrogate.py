@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from poptimizer.core import errors
+from poptimizer.evolve.models import genotype, surrogate
+
+
+def _observations(count: int) -> list[tuple[dict, float]]:
+    observations = []
+
+    for _ in range(count):
+        genes = genotype.Genotype().genes
+        observations.append((genes, genes["batch"]["history_days"] + random.gauss(0, 0.1)))
+
+    return observations
+
+
+def test_flatten_genes():
+    genes = genotype.Genotype().genes
+
+    flat = surrogate.flatten(genes)
+
+    assert flat[0] == genes["batch"]["size"]
+    assert flat[-1] == genes["risk"]["risk_tolerance"]
+
+
+def test_surrogate_not_ready():
+    screen = surrogate.Surrogate(candidates=4, history=10, min_models=5, exploration=0)
+    screen.seed(_observations(4))
+
+    assert screen.seeded
+    assert not screen.is_ready
+    with pytest.raises(errors.DomainError):
+        screen.score(genotype.Genotype().genes)
+
+
+def test_surrogate_ranks_candidates():
+    random.seed(0)
+    screen = surrogate.Surrogate(candidates=4, history=200, min_models=5, exploration=0)
+    screen.seed(_observations(200))
+
+    candidates = [genes for genes, _ in _observations(10)]
+    best = max(candidates, key=screen.score)
+
+    assert best["batch"]["history_days"] == max(genes["batch"]["history_days"] for genes in candidates)
+
+
+def test_surrogate_keeps_history():
+    screen = surrogate.Surrogate(candidates=4, history=5, min_models=5, exploration=1)
+    screen.seed(_observations(10))
+
+    assert screen.is_ready
+    assert screen.score(genotype.Genotype().genes) > 0
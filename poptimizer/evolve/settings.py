@@ -0,0 +1,97 @@
+from pydantic import BaseModel, Field, NonNegativeFloat, PositiveFloat, PositiveInt
+
+
+class EarlyAbort(BaseModel):
+    enabled: bool = False
+    checkpoints: PositiveInt = 3
+    llh_margin: NonNegativeFloat = 0.05
+
+
+class SequentialTest(BaseModel):
+    enabled: bool = False
+    min_days: PositiveInt = 5
+    effect_size: PositiveFloat = 0.5
+
+
+class WarmStart(BaseModel):
+    enabled: bool = False
+    epochs_scale: float = Field(default=0.5, gt=0, le=1)
+
+
+class FineTune(BaseModel):
+    enabled: bool = False
+    recent_days: PositiveInt = 21
+    epochs: PositiveFloat = 1
+    lr_scale: float = Field(default=0.1, gt=0, le=1)
+
+
+class Checkpoint(BaseModel):
+    enabled: bool = False
+    every_steps: PositiveInt = 1000
+
+
+class Pool(BaseModel):
+    workers: PositiveInt = 1
+    threads: PositiveInt | None = None
+
+
+class Lease(BaseModel):
+    ttl: PositiveInt = 3600
+
+
+class Surrogate(BaseModel):
+    enabled: bool = False
+    candidates: int = Field(default=8, ge=2)
+    history: PositiveInt = 256
+    min_models: PositiveInt = 16
+    exploration: NonNegativeFloat = 1
+
+
+class Cost(BaseModel):
+    penalty: NonNegativeFloat = 0
+    time_budget: PositiveFloat | None = None
+
+
+class ResultCache(BaseModel):
+    enabled: bool = False
+    size: PositiveInt = 1024
+
+
+class Memory(BaseModel):
+    budget_gb: PositiveFloat | None = None
+
+
+class Prefetch(BaseModel):
+    enabled: bool = False
+
+
+class Compiled(BaseModel):
+    fused: bool = False
+    compile: bool = False
+    backend: str = "inductor"
+
+
+class Precision(BaseModel):
+    bfloat16: bool = False
+
+
+class SlidingTest(BaseModel):
+    enabled: bool = False
+
+
+class Evolve(BaseModel):
+    early_abort: EarlyAbort = EarlyAbort()
+    sequential_test: SequentialTest = SequentialTest()
+    warm_start: WarmStart = WarmStart()
+    fine_tune: FineTune = FineTune()
+    checkpoint: Checkpoint = Checkpoint()
+    pool: Pool = Pool()
+    lease: Lease = Lease()
+    surrogate: Surrogate = Surrogate()
+    cost: Cost = Cost()
+    result_cache: ResultCache = ResultCache()
+    memory: Memory = Memory()
+    prefetch: Prefetch = Prefetch()
+    compiled: Compiled = Compiled()
+    precision: Precision = Precision()
+    sliding_test: SlidingTest = SlidingTest()
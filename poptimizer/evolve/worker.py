@@ -0,0 +1,54 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Final
+
+from poptimizer.core import consts, errors
+from poptimizer.evolve.dl import trainer
+from poptimizer.evolve.models import evolve
+from poptimizer.fsm import tx, uow
+
+_IDLE_DELAY: Final = timedelta(minutes=1)
+
+
+class Worker:
+    """Переобучает устаревшие модели, захватывая их в общей базе в аренду с ограниченным сроком.
+
+    Worker не меняет состояние эволюции, поэтому несколько worker на разных машинах могут работать
+    одновременно с основным процессом. Пока модель обучается, аренда продлевается, а аренда
+    остановившегося worker истекает, и модель захватывает другой. Модель, для оценки которой нужно
+    изменить параметры эволюции, освобождается без сохранения и остается основному процессу.
+    """
+
+    def __init__(self, repo: uow.Repo, trainer: trainer.Trainer, lease: evolve.Lease) -> None:
+        self._lgr = logging.getLogger(self.__class__.__name__)
+        self._repo = repo
+        self._trainer = trainer
+        self._lease = lease
+
+    async def run(self) -> None:
+        self._lgr.info("Starting worker %s", self._lease.owner)
+
+        while True:
+            evaluated = False
+
+            async with errors.suppress_poptimizer(self._lgr, "Worker failed"):
+                evaluated = await self._evaluate_next()
+
+            if not evaluated:
+                await asyncio.sleep(_IDLE_DELAY.total_seconds())
+
+    async def _evaluate_next(self) -> bool:
+        async with tx.Tx(self._lgr, self._repo, tx.Dispatcher()) as ctx:
+            evolution = await ctx.get(evolve.Evolution)
+            if evolution.day == consts.START_DAY:
+                return False
+
+            model = await ctx.claim_model_for_update(evolution.day, self._lease)
+            if model is None:
+                return False
+
+            if not await self._trainer.update_leased_model_metrics(ctx, evolution, model):
+                raise errors.UseCasesError(f"{model} is left for evolution")
+
+        return True
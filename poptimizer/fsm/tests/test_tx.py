@@ -0,0 +1,55 @@
+import logging
+from datetime import timedelta
+
+import pytest
+
+from poptimizer.core import domain, errors
+from poptimizer.evolve.models import evolve
+from poptimizer.fsm import tx, uow
+
+
+class FakeRepo:
+    def __init__(self) -> None:
+        self.model = evolve.Model(uid=domain.UID("model"))
+        self.calls: list[str] = []
+
+    async def claim_next_model(self, owner, expires):  # noqa: ARG002
+        self.calls.append(f"claim {owner}")
+
+        return self.model, uow.Version(1)
+
+    async def renew_lease(self, uid, owner, expires) -> bool:  # noqa: ARG002
+        return True
+
+    async def release_lease(self, uid, owner) -> None:
+        self.calls.append(f"release {uid} {owner}")
+
+    async def save(self, obj, ver) -> None:
+        self.calls.append(f"save {obj.uid} {ver}")
+
+
+async def test_lease_released_after_save():
+    repo = FakeRepo()
+    lease = evolve.Lease(timedelta(hours=1))
+
+    async with tx.Tx(logging.getLogger(), repo, tx.Dispatcher()) as ctx:  # type: ignore[arg-type]
+        assert await ctx.next_model_for_update(lease) is repo.model
+
+    assert repo.calls == [f"claim {lease.owner}", "save model 1", f"release model {lease.owner}"]
+
+
+async def _fail(repo: FakeRepo, lease: evolve.Lease) -> None:
+    async with tx.Tx(logging.getLogger(), repo, tx.Dispatcher()) as ctx:  # type: ignore[arg-type]
+        await ctx.next_model_for_update(lease)
+
+        raise errors.UseCasesError("evaluation failed")
+
+
+async def test_lease_released_on_failure():
+    repo = FakeRepo()
+    lease = evolve.Lease(timedelta(hours=1))
+
+    with pytest.raises(errors.UseCasesError):
+        await _fail(repo, lease)
+
+    assert repo.calls == [f"claim {lease.owner}", f"release model {lease.owner}"]
@@ -1,13 +1,16 @@
 import asyncio
+import contextlib
 import logging
 from collections.abc import AsyncIterator
 from types import TracebackType
-from typing import Any, Self
+from typing import Any, Final, Self
 
-from poptimizer.core import domain, fsm
+from poptimizer.core import domain, errors, fsm
 from poptimizer.evolve.models import evolve
 from poptimizer.fsm import uow
 
+_RENEWALS_PER_LEASE: Final = 3
+
 
 class Dispatcher:
     def __init__(self) -> None:
@@ -36,6 +39,7 @@ class Tx:
 
         self._uow = uow.UOW(repo)
         self._events: list[fsm.Event] = []
+        self._leases: list[tuple[domain.UID, evolve.Lease, asyncio.Task[None]]] = []
 
     async def __aenter__(self) -> Self:
         return self
@@ -46,12 +50,15 @@ class Tx:
         exc_value: BaseException | None,
         traceback: TracebackType | None,
     ) -> None:
-        if exc_type is None:
-            await self._uow.save()
+        try:
+            if exc_type is None:
+                await self._uow.save()
 
-            for event in self._events:
-                self._dispatcher.send(event)
-                self._lgr.info(f"Sending {event}")
+                for event in self._events:
+                    self._dispatcher.send(event)
+                    self._lgr.info(f"Sending {event}")
+        finally:
+            await self._release_leases()
 
     def info(self, msg: str, *args: Any) -> None:
         self._lgr.info(msg, *args)
@@ -82,11 +89,45 @@ class Tx:
     async def count_models(self) -> int:
         return await self._uow.count_models()
 
-    async def next_model_for_update(self) -> evolve.Model:
-        return await self._uow.next_model_for_update()
+    async def next_model_for_update(self, lease: evolve.Lease) -> evolve.Model | None:
+        return self._hold(await self._uow.next_model_for_update(lease.owner, lease.expires()), lease)
+
+    async def next_models(self, n: int) -> list[evolve.Model]:
+        return await self._uow.next_models(n)
+
+    async def claim_model_for_update(self, day: domain.Day, lease: evolve.Lease) -> evolve.Model | None:
+        return self._hold(await self._uow.claim_model_for_update(day, lease.owner, lease.expires()), lease)
+
+    def _hold(self, model: evolve.Model | None, lease: evolve.Lease) -> evolve.Model | None:
+        """Продлевает аренду захваченной модели до завершения транзакции."""
+        if model is not None:
+            self._leases.append((model.uid, lease, asyncio.create_task(self._renew_lease(model.uid, lease))))
+
+        return model
+
+    async def _renew_lease(self, uid: domain.UID, lease: evolve.Lease) -> None:
+        while True:
+            await asyncio.sleep(lease.ttl.total_seconds() / _RENEWALS_PER_LEASE)
+
+            if not await self._repo.renew_lease(uid, lease.owner, lease.expires()):
+                self._lgr.warning("Lease for %s lost", uid)
+
+                return
+
+    async def _release_leases(self) -> None:
+        """Снимает аренду моделей - после сохранения модели аренды уже нет, и снятие ничего не меняет."""
+        for uid, lease, heartbeat in self._leases:
+            heartbeat.cancel()
+
+            with contextlib.suppress(asyncio.CancelledError, errors.POError):
+                await heartbeat
+
+            await self._repo.release_lease(uid, lease.owner)
+
+        self._leases.clear()
 
-    async def delete_worst_model(self) -> None:
-        await self._uow.delete_worst_model()
+    async def delete_worst_model(self) -> domain.UID | None:
+        return await self._uow.delete_worst_model()
 
     async def get_models(self, day: domain.Day) -> list[evolve.Model]:
         return await self._uow.get_models(day)
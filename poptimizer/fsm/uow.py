@@ -1,5 +1,6 @@
 import asyncio
 from collections.abc import AsyncIterator, Iterator
+from datetime import datetime
 from types import TracebackType
 from typing import NewType, Protocol, Self
 
@@ -86,8 +87,17 @@ class Repo(Protocol):
     async def save(self, obj: domain.Object, ver: Version) -> None: ...
     async def delete(self, obj: domain.Object) -> None: ...
     async def count_models(self) -> int: ...
-    async def next_model_for_update(self) -> tuple[evolve.Model, Version]: ...
-    async def delete_worst_model(self) -> None: ...
+    async def claim_next_model(self, owner: str, expires: datetime) -> tuple[evolve.Model, Version] | None: ...
+    async def next_models(self, n: int) -> list[evolve.Model]: ...
+    async def claim_model(
+        self,
+        day: domain.Day,
+        owner: str,
+        expires: datetime,
+    ) -> tuple[evolve.Model, Version] | None: ...
+    async def renew_lease(self, uid: domain.UID, owner: str, expires: datetime) -> bool: ...
+    async def release_lease(self, uid: domain.UID, owner: str) -> None: ...
+    async def delete_worst_model(self) -> domain.UID | None: ...
     async def get_models(self, day: domain.Day) -> list[evolve.Model]: ...
     async def sample_models(self, n: int) -> list[evolve.Model]: ...
     def get_all[E: domain.Object](self, t_obj: type[E]) -> AsyncIterator[E]: ...
@@ -143,9 +153,13 @@ class UOW:
     async def count_models(self) -> int:
         return await self._repo.count_models()
 
-    async def next_model_for_update(self) -> evolve.Model:
+    async def next_model_for_update(self, owner: str, expires: datetime) -> evolve.Model | None:
         async with self._identity_map as identity_map:
-            model, ver = await self._repo.next_model_for_update()
+            claimed = await self._repo.claim_next_model(owner, expires)
+            if claimed is None:
+                return None
+
+            model, ver = claimed
             if loaded := identity_map.get_for_update(evolve.Model, model.uid):
                 obj, _ = loaded
 
@@ -155,8 +169,27 @@ class UOW:
 
             return model
 
-    async def delete_worst_model(self) -> None:
-        await self._repo.delete_worst_model()
+    async def next_models(self, n: int) -> list[evolve.Model]:
+        return await self._repo.next_models(n)
+
+    async def claim_model_for_update(
+        self,
+        day: domain.Day,
+        owner: str,
+        expires: datetime,
+    ) -> evolve.Model | None:
+        async with self._identity_map as identity_map:
+            claimed = await self._repo.claim_model(day, owner, expires)
+            if claimed is None:
+                return None
+
+            model, ver = claimed
+            identity_map.save_for_update(model, ver)
+
+            return model
+
+    async def delete_worst_model(self) -> domain.UID | None:
+        return await self._repo.delete_worst_model()
 
     async def get_models(self, day: domain.Day) -> list[evolve.Model]:
         return await self._repo.get_models(day)
@@ -2,11 +2,19 @@ import logging
 import statistics
 from collections import Counter
 from datetime import timedelta
-from typing import Any
+from typing import Any, Final, cast
 
-from poptimizer.evolve.models import evolve
+from scipy import stats  # type: ignore[reportMissingTypeStubs]
+
+from poptimizer.evolve.dl import cost
+from poptimizer.evolve.models import evolve, genetics
 from poptimizer.fsm import uow
 
+_GIGA: Final = 1e9
+_MIN_CORRELATION_SAMPLES: Final = 2
+_PHASES: Final = ("data", "net_init", "train", "test", "forecast")
+_COST_DRIVERS: Final = 5
+
 
 async def report(lgr: logging.Logger, repo: uow.UOW) -> None:
     evolution = await repo.get(evolve.Evolution)
@@ -16,13 +24,18 @@ async def report(lgr: logging.Logger, repo: uow.UOW) -> None:
         ("Forecast days", evolution.forecast_days),
         ("Test days", int(evolution.test_days)),
         ("Min return days", evolution.minimal_returns_days),
+        ("New model duration", timedelta(seconds=round(evolution.duration))),
     ]
 
     count = 0
     risk_aversion: list[float] = []
     history_days: list[int] = []
     duration: list[float] = []
+    flops: list[float] = []
+    memory: list[float] = []
     features: Counter[str] = Counter()
+    profiles: list[evolve.Profile] = []
+    genes: list[dict[str, float]] = []
 
     async for model in repo.get_all(evolve.Model):
         if not model.duration:
@@ -34,11 +47,18 @@ async def report(lgr: logging.Logger, repo: uow.UOW) -> None:
         batch = phenotype["batch"]
         history_days.append(batch["history_days"])
         duration.append(model.duration)
+        model_cost = cost.estimate(phenotype)
+        flops.append(model_cost.flops)
+        memory.append(model_cost.memory)
         features.update({"use_lag_feat": batch["use_lag_feat"]})
         features.update(batch["num_feats"])
         features.update(batch["emb_feats"])
         features.update(batch["emb_seq_feats"])
 
+        if model.profile.train:
+            profiles.append(model.profile)
+            genes.append(_flatten(phenotype))
+
     data.append(("Model count", count))
     data.append(
         (
@@ -49,6 +69,19 @@ async def report(lgr: logging.Logger, repo: uow.UOW) -> None:
             ),
         )
     )
+    data.append(
+        (
+            "Train GFLOP per sample",
+            f"{min(flops) / _GIGA:.2f} - {statistics.median(flops) / _GIGA:.2f} - {max(flops) / _GIGA:.2f}",
+        )
+    )
+    data.append(
+        (
+            "Train memory, MB",
+            f"{min(memory) / 2**20:.0f} - {statistics.median(memory) / 2**20:.0f} - {max(memory) / 2**20:.0f}",
+        )
+    )
+    data.append(("Cost-duration correlation", f"{_rank_correlation(flops, duration):.2%}"))
     data.append(
         (
             "Risk aversion",
@@ -65,8 +98,65 @@ async def report(lgr: logging.Logger, repo: uow.UOW) -> None:
     for feature, feat_count in features.most_common():
         data.append((f"Feature {feature}", f"{feat_count / count:.2%}"))
 
+    data.extend(_breakdown(profiles, genes))
+
     max_name = max(len(name) for name, _ in data)
 
     lgr.info("Evolution statistics")
     for name, value in data:
         lgr.info(f"{name:<{max_name}} {value}")
+
+
+def _breakdown(profiles: list[evolve.Profile], genes: list[dict[str, float]]) -> list[tuple[str, Any]]:
+    """Медианная длительность и доля этапов в общем времени оценки, а также гены, сильнее всего влияющие на него."""
+    if not profiles:
+        return []
+
+    totals: list[float] = [sum(getattr(profile, phase) for phase in _PHASES) for profile in profiles]
+    data: list[tuple[str, Any]] = [("Profiled models", len(profiles))]
+
+    for phase in _PHASES:
+        values = [getattr(profile, phase) for profile in profiles]
+        data.append((f"Phase {phase}", f"{statistics.median(values):.1f}s - {sum(values) / sum(totals):.2%}"))
+
+    test = sum(profile.test for profile in profiles)
+    data.append(("Risk share of test", f"{sum(profile.risk for profile in profiles) / test:.2%}" if test else "-"))
+
+    steps = [profile.steps_per_sec for profile in profiles]
+    data.append(("Train steps/sec", f"{min(steps):.1f} - {statistics.median(steps):.1f} - {max(steps):.1f}"))
+
+    rss = [profile.peak_rss / 2**20 for profile in profiles]
+    data.append(("Peak RSS, MB", f"{min(rss):.0f} - {statistics.median(rss):.0f} - {max(rss):.0f}"))
+
+    drivers = [
+        (name, _rank_correlation([gene[name] for gene in genes], totals))
+        for name in genes[0]
+        if len({gene[name] for gene in genes}) > 1
+    ]
+    drivers.sort(key=lambda driver: abs(driver[1]), reverse=True)
+
+    data.extend((f"Cost driver {name}", f"{correlation:.2%}") for name, correlation in drivers[:_COST_DRIVERS])
+
+    return data
+
+
+def _flatten(phenotype: genetics.Phenotype, prefix: str = "") -> dict[str, float]:
+    flat: dict[str, float] = {}
+
+    for key, value in phenotype.items():
+        match value:
+            case bool() | int() | float():
+                flat[f"{prefix}{key}"] = float(value)
+            case dict():
+                flat |= _flatten(cast("genetics.Phenotype", value), f"{prefix}{key}.")
+            case _:
+                continue
+
+    return flat
+
+
+def _rank_correlation(first: list[float], second: list[float]) -> float:
+    if len(first) < _MIN_CORRELATION_SAMPLES:
+        return 0
+
+    return cast("float", stats.spearmanr(first, second).statistic)  # type: ignore[reportUnknownMemberType]